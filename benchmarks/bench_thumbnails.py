@@ -0,0 +1,158 @@
+"""
+Thumbnail decode benchmarks
+Generates render-sized PNG, JPEG and WebP images in memory and measures the
+CPU time per thumbnail of three decode paths: a full-resolution decode
+resampled with Lanczos, Pillow's Image.thumbnail, and the draft/reduce
+pipeline in src/ui/thumbnail_decode.py. Reports how far each result is from
+the full-resolution Lanczos reference, and the cost of the bare decode that
+no resampling strategy can avoid for PNG and WebP.
+
+    python benchmarks/bench_thumbnails.py --sizes 2048 4096 --thumbnail 256 --iterations 10
+"""
+
+import argparse
+import io
+import json
+import statistics
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.ui.thumbnail_decode import REDUCING_GAP, decode_thumbnail, thumbnail_size  # noqa: E402
+
+FORMATS = {
+    "png": {"format": "PNG", "compress_level": 6},
+    "jpeg": {"format": "JPEG", "quality": 92},
+    "webp": {"format": "WEBP", "quality": 90},
+}
+
+
+def make_render(size, seed=0):
+    """Smooth gradients plus some grain, roughly what a diffusion render compresses like"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size].astype(np.float32) / size
+    channels = [np.sin(x * f1 * 6.0 + y * f2 * 4.0 + p) for f1, f2, p in rng.uniform(0.5, 3.0, (3, 3))]
+    image = (np.stack(channels, axis=-1) * 0.5 + 0.5) * 230.0
+    image += rng.normal(0.0, 6.0, image.shape)
+    return Image.fromarray(np.clip(image, 0, 255).astype(np.uint8), "RGB")
+
+
+def encode(image, options):
+    buffer = io.BytesIO()
+    image.save(buffer, **options)
+    return buffer.getvalue()
+
+
+def full_lanczos(data, size):
+    img = Image.open(io.BytesIO(data)).convert("RGB")
+    return img.resize(thumbnail_size(img.width, img.height, size), Image.Resampling.LANCZOS)
+
+
+def pillow_thumbnail(data, size):
+    img = Image.open(io.BytesIO(data))
+    img.thumbnail((size, size), Image.Resampling.LANCZOS)
+    return img.convert("RGB")
+
+
+def pipeline(data, size, reducing_gap=REDUCING_GAP):
+    return decode_thumbnail(io.BytesIO(data), size, reducing_gap)
+
+
+def decode_only(data, size):
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    return None
+
+
+METHODS = {
+    "full_lanczos": full_lanczos,
+    "thumbnail": pillow_thumbnail,
+    "pipeline": pipeline,
+    "decode_only": decode_only,
+}
+
+
+def cpu_timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.process_time()
+        result = fn()
+        samples.append(time.process_time() - start)
+    return samples, result
+
+
+def psnr(a, b):
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    mse = np.mean((a - b) ** 2)
+    return float("inf") if mse == 0 else 10.0 * np.log10(255.0 ** 2 / mse)
+
+
+def summarize(name, samples, **extra):
+    ms = sorted(s * 1000.0 for s in samples)
+    result = {
+        "name": name,
+        "count": len(ms),
+        "mean_cpu_ms": statistics.fmean(ms),
+        "p50_cpu_ms": ms[len(ms) // 2],
+        "max_cpu_ms": ms[-1],
+    }
+    result.update(extra)
+    return result
+
+
+def bench(sizes, thumbnail, iterations, reducing_gap=REDUCING_GAP):
+    results = []
+    for size in sizes:
+        render = make_render(size)
+        for fmt, options in FORMATS.items():
+            data = encode(render, options)
+            reference = full_lanczos(data, thumbnail)
+            baseline = None
+            for method, fn in METHODS.items():
+                if method == "pipeline":
+                    fn = partial(pipeline, reducing_gap=reducing_gap)
+                samples, result = cpu_timed(lambda: fn(data, thumbnail), iterations)
+                summary = summarize(f"{fmt}_{size}_{method}", samples,
+                                    file_kb=len(data) // 1024,
+                                    psnr_db=min(psnr(result, reference), 99.0) if result else None)
+                if baseline is None:
+                    baseline = summary["mean_cpu_ms"]
+                summary["speedup"] = baseline / summary["mean_cpu_ms"]
+                results.append(summary)
+    return results
+
+
+def print_table(results):
+    print(f"{'benchmark':<30}{'cpu ms':>10}{'p50 ms':>10}{'max ms':>10}{'speedup':>9}{'psnr dB':>9}")
+    for r in results:
+        psnr_text = f"{r['psnr_db']:.1f}" if r['psnr_db'] is not None else "-"
+        print(f"{r['name']:<30}{r['mean_cpu_ms']:>10.2f}{r['p50_cpu_ms']:>10.2f}{r['max_cpu_ms']:>10.2f}"
+              f"{r['speedup']:>9.2f}{psnr_text:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark thumbnail decoding of large renders")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2048, 4096], help="source image sizes")
+    parser.add_argument("--thumbnail", type=int, default=256, help="thumbnail size")
+    parser.add_argument("--iterations", type=int, default=5, help="decodes per format and method")
+    parser.add_argument("--reducing-gap", type=float, default=REDUCING_GAP,
+                        help="minimum scale left for the pipeline's Lanczos step")
+    parser.add_argument("--json", type=Path, help="also write results to this file")
+    args = parser.parse_args()
+
+    results = bench(args.sizes, args.thumbnail, args.iterations, args.reducing_gap)
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""
+Protocol benchmarks against the fake Cinema4D
+Starts c4d_plugin.py on the fake c4d package and measures the socket path
+end to end: round trips, queued scripts, concurrent clients, scene snapshots,
+compression, mesh streaming, scattering and the bundled scripts.
+
+    python benchmarks/bench_protocol.py --iterations 500 --clients 4 --objects 10000
+"""
+
+import argparse
+import json
+import socket
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVER_DIR))
+sys.path.insert(0, str(SERVER_DIR / "fake_c4d"))
+
+from harness import FakeCinema4D  # noqa: E402
+from mesh_stream import MeshBuffers  # noqa: E402
+from scatter import fibonacci_layout, poisson_disk_layout  # noqa: E402
+from protocol import (available_codecs, codec_from_hello, encode_command, hello_command,  # noqa: E402
+                      recv_message, send_message)
+
+SCRIPTS_DIR = SERVER_DIR / "scripts"
+
+SEED_SCENE = """
+import c4d
+from c4d import documents
+
+doc = documents.GetActiveDocument()
+for i in range({count}):
+    obj = c4d.BaseObject(c4d.Ocube)
+    obj.SetName("{prefix}_%d_{keyword}" % i)
+    obj.SetAbsPos(c4d.Vector(i * 10.0, 0, 0))
+    obj.SetBit(c4d.BIT_ACTIVE)
+    doc.InsertObject(obj)
+c4d.EventAdd()
+print(doc.GetFirstObject().GetName())
+"""
+
+TOUCH_OBJECTS = """
+import c4d
+from c4d import documents
+
+doc = documents.GetActiveDocument()
+obj = doc.GetFirstObject()
+i = 0
+while obj:
+    if i % {stride} == 0:
+        obj.SetAbsPos(obj.GetAbsPos() + c4d.Vector(0, 1, 0))
+    obj = obj.GetNext()
+    i += 1
+"""
+
+
+class Client:
+    """Blocking client speaking the framed protocol"""
+
+    def __init__(self, port, compression=None):
+        self.sock = socket.create_connection(("localhost", port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.bytes_received = 0
+        self.codec = None
+        if compression:
+            self.codec = codec_from_hello(self.request(hello_command([compression])))
+
+    def request(self, command, attachments=None):
+        codec = self.codec
+        send_message(self.sock, encode_command(command, attachments), codec)
+        for payload in attachments or ():
+            send_message(self.sock, payload, codec)
+        before = codec.received_wire_bytes if codec else 0
+        response = recv_message(self.sock, codec)
+        self.bytes_received += codec.received_wire_bytes - before if codec else len(response)
+        return json.loads(response)
+
+    def run_script(self, script):
+        result = self.request({"command": "execute_script", "script": script})
+        if not result.get("success"):
+            raise RuntimeError(result.get("error"))
+        return result
+
+    def close(self):
+        self.sock.close()
+
+
+def summarize(name, samples, total_time=None, **extra):
+    """Latency percentiles (ms) and throughput for a list of durations in seconds"""
+    ms = sorted(s * 1000.0 for s in samples)
+    total_time = total_time if total_time is not None else sum(samples)
+
+    def pct(p):
+        return ms[min(len(ms) - 1, int(round(p / 100.0 * (len(ms) - 1))))]
+
+    result = {
+        "name": name,
+        "count": len(ms),
+        "ops_per_sec": len(ms) / total_time if total_time else 0.0,
+        "mean_ms": statistics.fmean(ms),
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": ms[-1],
+    }
+    result.update(extra)
+    return result
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_roundtrip(port, iterations):
+    """Commands answered on the socket thread (no main-thread hop)"""
+    client = Client(port)
+    try:
+        samples = timed(lambda: client.request({"command": "pump_stats"}), iterations)
+    finally:
+        client.close()
+    return summarize("roundtrip_socket_thread", samples)
+
+
+def bench_script(port, iterations):
+    """Small scripts queued for the main thread"""
+    client = Client(port)
+    try:
+        samples = timed(lambda: client.run_script("x = 1 + 1"), iterations)
+    finally:
+        client.close()
+    return summarize("execute_script_main_thread", samples)
+
+
+def bench_concurrent(port, iterations, clients):
+    """Several clients submitting scripts at once"""
+    samples = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients)
+
+    def worker(index):
+        client = Client(port)
+        try:
+            barrier.wait()
+            local = timed(lambda: client.run_script(f"print({index})"), iterations)
+        finally:
+            client.close()
+        with lock:
+            samples.extend(local)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    client = Client(port)
+    try:
+        pump = client.request({"command": "pump_stats"})["stats"]
+    finally:
+        client.close()
+    return summarize(f"execute_script_{clients}_clients", samples, elapsed,
+                     max_batch=pump["max_batch"], avg_batch=pump["avg_batch"])
+
+
+def bench_snapshot(app, port, objects, iterations):
+    """Full scene snapshots versus incremental ones after touching 1% of objects"""
+    app.reset_scene()
+    client = Client(port)
+    try:
+        client.run_script(SEED_SCENE.format(count=objects, prefix="Obj", keyword="metal"))
+
+        full_bytes = []
+
+        def full():
+            before = client.bytes_received
+            client.request({"command": "scene_snapshot"})
+            full_bytes.append(client.bytes_received - before)
+
+        full_samples = timed(full, iterations)
+
+        version = client.request({"command": "scene_snapshot"})["version"]
+        touch = TOUCH_OBJECTS.format(stride=100)
+        delta_samples = []
+        delta_bytes = []
+        changed = 0
+        for _ in range(iterations):
+            client.run_script(touch)
+            before = client.bytes_received
+            start = time.perf_counter()
+            diff = client.request({"command": "scene_snapshot", "since_version": version})
+            delta_samples.append(time.perf_counter() - start)
+            delta_bytes.append(client.bytes_received - before)
+            version = diff["version"]
+            changed = len(diff["objects"])
+    finally:
+        client.close()
+
+    return [
+        summarize(f"snapshot_full_{objects}", full_samples,
+                  payload_bytes=int(statistics.fmean(full_bytes))),
+        summarize(f"snapshot_incremental_{objects}", delta_samples,
+                  payload_bytes=int(statistics.fmean(delta_bytes)), changed_objects=changed),
+    ]
+
+
+def bench_compression(app, port, objects, iterations):
+    """Full snapshots with each negotiated codec: latency and bytes on the wire"""
+    app.reset_scene()
+    seed = Client(port)
+    try:
+        seed.run_script(SEED_SCENE.format(count=objects, prefix="Obj", keyword="metal"))
+    finally:
+        seed.close()
+
+    results = []
+    for codec in [None] + available_codecs():
+        client = Client(port, compression=codec)
+        try:
+            sizes = []
+
+            def full():
+                before = client.bytes_received
+                client.request({"command": "scene_snapshot"})
+                sizes.append(client.bytes_received - before)
+
+            samples = timed(full, iterations)
+            stats = client.request({"command": "sessions"})
+            mine = next(s for s in stats["sessions"] if s["id"] == stats["session_id"])
+            compression = mine.get("compression") or {}
+        finally:
+            client.close()
+        results.append(summarize(f"snapshot_{objects}_{codec or 'raw'}", samples,
+                                 wire_bytes=int(statistics.fmean(sizes)),
+                                 ratio=compression.get("sent_ratio", 1.0),
+                                 compress_ms=compression.get("compress_ms", 0.0)))
+    return results
+
+
+def grid_mesh(resolution):
+    """Triangulated grid with per-vertex UVs"""
+    u, v = np.meshgrid(np.linspace(0, 1, resolution), np.linspace(0, 1, resolution))
+    vertices = np.stack([u.ravel() * 100, np.sin(u.ravel() * 6) * 5, v.ravel() * 100], axis=1)
+    index = np.arange(resolution * resolution).reshape(resolution, resolution)
+    a, b = index[:-1, :-1].ravel(), index[:-1, 1:].ravel()
+    c, d = index[1:, 1:].ravel(), index[1:, :-1].ravel()
+    faces = np.concatenate([np.stack([a, b, c], 1), np.stack([a, c, d], 1)])
+    return MeshBuffers.from_arrays(vertices, faces, np.stack([u.ravel(), v.ravel()], 1))
+
+
+def bench_mesh(port, resolution, iterations):
+    """Stream a mesh as binary chunks into a PolygonObject"""
+    mesh = grid_mesh(resolution)
+    payload_bytes = sum(len(chunk[3]) for chunk in mesh.iter_chunks())
+    client = Client(port)
+
+    def stream():
+        begin = client.request({
+            "command": "mesh_begin", "name": "BenchMesh",
+            "point_count": mesh.point_count, "polygon_count": mesh.polygon_count,
+            "has_uvs": True,
+        })
+        for channel, offset, count, payload in mesh.iter_chunks():
+            client.request({"command": "mesh_chunk", "stream_id": begin["stream_id"],
+                            "channel": channel, "offset": offset, "count": count}, [payload])
+        result = client.request({"command": "mesh_end", "stream_id": begin["stream_id"]})
+        if not result.get("success"):
+            raise RuntimeError(result.get("error"))
+
+    try:
+        samples = timed(stream, iterations)
+    finally:
+        client.close()
+    mean = statistics.fmean(samples)
+    return summarize(f"mesh_stream_{mesh.polygon_count}_polygons", samples,
+                     payload_bytes=payload_bytes,
+                     mb_per_sec=payload_bytes / mean / 1e6 if mean else 0.0)
+
+
+def bench_scatter(app, port, count, iterations):
+    """Host-computed layouts sent as one matrix payload, instances built in C4D"""
+    results = []
+    client = Client(port)
+    sources = [f"Hy3D_{i}_wood" for i in range(3)]
+    radii = [10.0, 15.0, 25.0]
+    layouts = {
+        "spiral": lambda: fibonacci_layout(count, len(sources), radius=10000.0),
+        # Disc sized for the footprints to cover about 30% of it
+        "poisson": lambda: poisson_disk_layout(count, radii, radius=float(np.sqrt(count) * 32.0)),
+    }
+    try:
+        app.reset_scene()
+        client.run_script(SEED_SCENE.format(count=len(sources), prefix="Hy3D", keyword="wood"))
+        for method, make_layout in layouts.items():
+            layout_times = []
+
+            def scatter():
+                start = time.perf_counter()
+                layout = make_layout()
+                layout_times.append(time.perf_counter() - start)
+                result = client.request({"command": "scatter_instances", "sources": sources,
+                                         "count": len(layout)}, layout.payload())
+                if not result.get("success"):
+                    raise RuntimeError(result.get("error"))
+
+            samples = timed(scatter, iterations)
+            results.append(summarize(f"scatter_{method}_{count}_instances", samples,
+                                     layout_ms=statistics.fmean(layout_times) * 1000.0,
+                                     payload_bytes=count * (12 + 1) * 4))
+    finally:
+        client.close()
+    return results
+
+
+def bench_scripts(app, port, objects, iterations):
+    """The bundled scripts, unchanged, on a scene they have something to work on"""
+    results = []
+    client = Client(port)
+    try:
+        for path in sorted(SCRIPTS_DIR.glob("*.py")):
+            script = path.read_text(encoding="utf-8")
+            samples = []
+            for _ in range(iterations):
+                app.reset_scene()
+                client.run_script(SEED_SCENE.format(count=objects, prefix="Hy3D", keyword="wood"))
+                start = time.perf_counter()
+                output = client.run_script(script).get("output", "")
+                samples.append(time.perf_counter() - start)
+            status = output.strip().splitlines()[-1] if output.strip() else ""
+            results.append(summarize(f"script_{path.stem}", samples, status=status))
+    finally:
+        client.close()
+    return results
+
+
+def print_table(results):
+    print(f"{'benchmark':<44}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  extra")
+    for r in results:
+        extra = {k: v for k, v in r.items()
+                 if k not in ("name", "count", "ops_per_sec", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")}
+        extra_text = " ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}" for k, v in extra.items())
+        print(f"{r['name']:<44}{r['ops_per_sec']:>10.1f}{r['p50_ms']:>10.3f}"
+              f"{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}  {extra_text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Cinema4D socket protocol against the fake c4d")
+    parser.add_argument("--port", type=int, default=54400)
+    parser.add_argument("--iterations", type=int, default=300, help="requests per latency benchmark")
+    parser.add_argument("--clients", type=int, default=4, help="concurrent clients")
+    parser.add_argument("--objects", type=int, default=10000, help="scene size for snapshot benchmarks")
+    parser.add_argument("--mesh-resolution", type=int, default=300, help="grid resolution for mesh streaming")
+    parser.add_argument("--scatter-count", type=int, default=100000, help="instances per scatter call")
+    parser.add_argument("--json", type=Path, help="also write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    with FakeCinema4D(port=args.port) as app:
+        results.append(bench_roundtrip(args.port, args.iterations))
+        results.append(bench_script(args.port, args.iterations))
+        results.append(bench_concurrent(args.port, args.iterations, args.clients))
+        results.extend(bench_snapshot(app, args.port, args.objects, max(3, args.iterations // 30)))
+        results.extend(bench_compression(app, args.port, args.objects, max(3, args.iterations // 30)))
+        results.append(bench_mesh(args.port, args.mesh_resolution, max(3, args.iterations // 60)))
+        results.extend(bench_scatter(app, args.port, args.scatter_count, max(3, args.iterations // 60)))
+        results.extend(bench_scripts(app, args.port, 50, max(3, args.iterations // 60)))
+
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Connection from the MCP server to the Cinema4D plugin
+Keeps one framed socket open, measures it with periodic heartbeats and
+reconnects with exponential backoff when Cinema4D goes away. Every new
+connection starts with a hello that negotiates payload compression. Idempotent
+requests issued (or interrupted) while disconnected are queued and replayed
+once the link is back; anything else fails fast, since it may already have
+run in Cinema4D.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from latency import LatencyHistogram, LatencyRecorder
+from protocol import COMPRESSION_THRESHOLD, HEADER, codec_from_hello, encode_command, hello_command
+
+logger = logging.getLogger("cinema4d-mcp-server")
+
+# Commands that only read state and are safe to send twice
+IDEMPOTENT_COMMANDS = {
+    "ping",
+    "scene_snapshot",
+    "pump_stats",
+    "sessions",
+    "script_cache_stats",
+}
+
+
+class Cinema4DUnavailable(ConnectionError):
+    """Cinema4D could not be reached, or the connection dropped mid-request"""
+
+
+class Cinema4DLink:
+    """Framed, self-healing asyncio connection to the Cinema4D plugin.
+
+    The plugin answers requests on a connection strictly in order, so one
+    request is in flight at a time; the asyncio lock is FIFO, which keeps
+    queued requests in the order they were issued.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 54321,
+                 heartbeat_interval: float = 5.0, heartbeat_timeout: float = 5.0,
+                 request_timeout: float = 300.0, replay_timeout: float = 30.0,
+                 max_replays: int = 3, min_backoff: float = 0.25, max_backoff: float = 10.0,
+                 compression: Optional[List[str]] = None,
+                 compression_threshold: int = COMPRESSION_THRESHOLD):
+        self.host = host
+        self.port = port
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.request_timeout = request_timeout
+        self.replay_timeout = replay_timeout
+        self.max_replays = max_replays
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.compression = compression  # codecs to offer, None for all available
+        self.compression_threshold = compression_threshold
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._codec = None
+        self._lock = asyncio.Lock()
+        self._connected = asyncio.Event()
+        self._lost = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._closing = False
+
+        # Statistics
+        self.connects = 0
+        self.connect_failures = 0
+        self.disconnects = 0
+        self.replayed = 0
+        self.queued = 0
+        self.last_error = None
+        self.connected_since = None
+        self.last_rtt_ms = None
+        self.pending_in_c4d = 0
+        self.heartbeat = LatencyHistogram()
+        self.commands = LatencyRecorder()
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    async def start(self):
+        """Connect in the background and keep the link alive"""
+        self._closing = False
+        self._tasks = [
+            asyncio.create_task(self._maintain_connection()),
+            asyncio.create_task(self._heartbeat_loop())
+        ]
+
+    async def close(self):
+        self._closing = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._drop("closed")
+
+    async def wait_connected(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _maintain_connection(self):
+        backoff = self.min_backoff
+        while not self._closing:
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.heartbeat_timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                self.connect_failures += 1
+                self.last_error = f"connect: {e or type(e).__name__}"
+                # Full jitter keeps several servers from reconnecting in lockstep
+                await asyncio.sleep(random.uniform(backoff / 2, backoff))
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+
+            self._reader, self._writer = reader, writer
+            self._lost.clear()
+            if not await self._negotiate():
+                await asyncio.sleep(random.uniform(backoff / 2, backoff))
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            
+            backoff = self.min_backoff
+            self._connected.set()
+            self.connects += 1
+            self.connected_since = time.time()
+            logger.info(f"Connected to Cinema4D on {self.host}:{self.port}")
+
+            await self._lost.wait()
+            logger.warning(f"Lost connection to Cinema4D: {self.last_error}")
+
+    async def _negotiate(self) -> bool:
+        """Exchange capabilities on a fresh connection, False if it dropped"""
+        self._codec = None
+        try:
+            response = await self._roundtrip(
+                hello_command(self.compression, self.compression_threshold), None, self.heartbeat_timeout)
+        except Cinema4DUnavailable:
+            return False
+        try:
+            # Plugins without hello answer with an error and stay uncompressed
+            self._codec = codec_from_hello(json.loads(response))
+        except json.JSONDecodeError:
+            self._codec = None
+        return True
+
+    def _drop(self, reason: str):
+        """Tear down the current connection, the maintain task reconnects"""
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+            self.disconnects += 1
+            self.last_error = reason
+        self.connected_since = None
+        self._connected.clear()
+        self._lost.set()
+
+    async def _heartbeat_loop(self):
+        while not self._closing:
+            await asyncio.sleep(self.heartbeat_interval)
+            # A busy link is a live link, and a ping would only queue behind it
+            if not self.connected or self._lock.locked():
+                continue
+            try:
+                start = time.perf_counter()
+                response = await self._roundtrip({"command": "ping", "sent": time.time()},
+                                                 None, self.heartbeat_timeout)
+            except Cinema4DUnavailable:
+                continue
+            rtt = time.perf_counter() - start
+            self.heartbeat.record(rtt)
+            self.last_rtt_ms = round(rtt * 1000.0, 3)
+            try:
+                self.pending_in_c4d = json.loads(response).get("pending", 0)
+            except (json.JSONDecodeError, AttributeError):
+                pass
+
+    async def _roundtrip(self, command: Dict[str, Any], attachments: Optional[List[bytes]],
+                         timeout: float) -> str:
+        async with self._lock:
+            if self._writer is None:
+                raise Cinema4DUnavailable("Not connected to Cinema4D")
+            reader, writer, codec = self._reader, self._writer, self._codec
+            try:
+                for payload in [encode_command(command, attachments)] + list(attachments or []):
+                    if codec is not None:
+                        payload = codec.encode(payload)
+                    writer.write(HEADER.pack(len(payload)))
+                    writer.write(payload)
+                await writer.drain()
+
+                async def read_response():
+                    (size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+                    return await reader.readexactly(size)
+
+                response = await asyncio.wait_for(read_response(), timeout)
+                if codec is not None:
+                    response = codec.decode(response)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+                # A late response would desynchronize the stream, start over
+                reason = "timed out" if isinstance(e, asyncio.TimeoutError) else str(e) or type(e).__name__
+                self._drop(reason)
+                raise Cinema4DUnavailable(f"Connection to Cinema4D lost: {reason}") from e
+            except BaseException as e:
+                # Cancelled mid-flight: the reply is still coming, same as a timeout
+                self._drop(f"request interrupted: {type(e).__name__}")
+                raise
+            return response.decode('utf-8')
+
+    async def send(self, command: Dict[str, Any], attachments: Optional[List[bytes]] = None,
+                   idempotent: Optional[bool] = None) -> str:
+        """Send a command and return the raw JSON response.
+
+        Idempotent requests wait for a reconnect (up to replay_timeout) and are
+        replayed if the connection drops while they are in flight.
+        """
+        if idempotent is None:
+            idempotent = command.get("command") in IDEMPOTENT_COMMANDS
+        name = command.get("command") or "execute_script"
+        replays = 0
+
+        while True:
+            if not self.connected:
+                if not idempotent:
+                    raise Cinema4DUnavailable("Not connected to Cinema4D")
+                self.queued += 1
+                if not await self.wait_connected(self.replay_timeout):
+                    raise Cinema4DUnavailable(
+                        f"Cinema4D did not reconnect within {self.replay_timeout:.0f}s")
+            start = time.perf_counter()
+            try:
+                response = await self._roundtrip(command, attachments, self.request_timeout)
+            except Cinema4DUnavailable:
+                if not idempotent or replays >= self.max_replays:
+                    raise
+                replays += 1
+                self.replayed += 1
+                continue
+            self.commands.record(name, time.perf_counter() - start)
+            return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Connection health, heartbeat RTT and per-command round trip latency"""
+        return {
+            "connected": self.connected,
+            "host": self.host,
+            "port": self.port,
+            "uptime_s": round(time.time() - self.connected_since, 1) if self.connected_since else 0.0,
+            "connects": self.connects,
+            "connect_failures": self.connect_failures,
+            "disconnects": self.disconnects,
+            "queued": self.queued,
+            "replayed": self.replayed,
+            "last_error": self.last_error,
+            "pending_in_c4d": self.pending_in_c4d,
+            "compression": self._codec.get_stats() if self._codec else None,
+            "heartbeat": dict(self.heartbeat.summary(), last_rtt_ms=self.last_rtt_ms),
+            "commands": self.commands.summary()
+        }
@@ -8,77 +8,1398 @@ import socket
 import json
 import threading
 import time
+import hashlib
+import io
+import os
+import itertools
+import array
+import sys
+import struct
+import zlib
+from collections import OrderedDict, deque
 from c4d import gui
 
+# lz4 is optional, zlib ships with Python
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
 # Global variables
 g_socket = None
 g_connected = False
 g_server_thread = None
+g_sessions = {}  # session id -> ClientSession
+g_sessions_lock = threading.Lock()
+g_pump_dialog = None
+
+# Listening port, override with C4D_MCP_PORT to run several instances
+SERVER_PORT = int(os.environ.get('C4D_MCP_PORT', 54321))
+
+# Pending connections queued by the OS while clients are being accepted
+SERVER_BACKLOG = 8
+
+# Maximum number of compiled scripts kept in memory
+SCRIPT_CACHE_SIZE = 128
+
+# Framed messages are prefixed with their payload length (4 bytes, big-endian)
+HEADER = struct.Struct('!I')
+MAX_MESSAGE_SIZE = 512 * 1024 * 1024
+
+# Compression negotiated by the hello command. Once enabled, payloads start
+# with a codec byte and only those above the threshold are compressed.
+COMPRESSION_THRESHOLD = 4096
+CODEC_RAW = 0
+CODEC_IDS = {"zlib": 1, "lz4": 2}
+SUPPORTED_CODECS = ["lz4", "zlib"] if lz4_frame is not None else ["zlib"]
+
+# Removed-object tombstones kept for incremental scene diffs
+SNAPSHOT_MAX_TOMBSTONES = 10000
+
+# Documents with a name/GUID lookup index, least recently used are dropped
+SCENE_INDEX_DOCUMENTS = 8
+
+# Material container ids for the deduplication key and reuse count. They are
+# saved with the document, so reuse works across sessions.
+MATERIAL_KEY_ID = 1062982
+MATERIAL_REUSE_ID = 1062983
+
+# Scene work runs on Cinema4D's main thread. Socket threads queue requests
+# and wake the pump with SpecialEventAdd, the dialog timer is a fallback.
+PUMP_MESSAGE_ID = 1062981
+PUMP_INTERVAL_MS = 50
+PUMP_TIME_BUDGET = 0.025  # seconds of queued work per tick before yielding to the UI
+
+# Scene pattern build functions kept compiled, least recently used are dropped
+PATTERN_CACHE_SIZE = 64
+
+# Components per element of each mesh stream channel, and their array typecode
+MESH_CHANNELS = {
+    "points": (3, 'f'),    # x, y, z
+    "polygons": (3, 'I'),  # triangle indices a, b, c
+    "uvs": (6, 'f'),       # u, v for each of the three corners
+}
+
 
-def execute_script(script_code):
+class CompiledScriptCache:
+    """Bounded LRU of compiled code objects keyed by script hash.
+    
+    Agent scripts are frequently re-sent verbatim (retries, helper snippets),
+    so parsing and compiling them again on every request is wasted work.
+    Compile errors are cached as well so a broken script fails fast.
+    """
+    
+    def __init__(self, max_entries=SCRIPT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # script hash -> (code, error)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.compile_errors = 0
+    
+    def get(self, script_code):
+        """Return (code, error) for a script, compiling it on first use"""
+        key = hashlib.sha1(script_code.encode('utf-8')).hexdigest()
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        
+        # Compile outside the lock, large scripts can take a while
+        try:
+            entry = (compile(script_code, '<string>', 'exec'), None)
+        except (SyntaxError, ValueError) as e:
+            entry = (None, str(e))
+        
+        with self._lock:
+            if entry[1] is not None:
+                self.compile_errors += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        
+        return entry
+    
+    def clear(self):
+        """Drop all cached code objects"""
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self):
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "compile_errors": self.compile_errors
+            }
+
+
+g_script_cache = CompiledScriptCache()
+
+def execute_script(script_code, session=None):
     """Execute Python script and return result"""
+    # Compile (or fetch the cached code object) once per distinct script
+    code, compile_error = g_script_cache.get(script_code)
+    if compile_error is not None:
+        return {"success": False, "error": compile_error}
+    
+    # Capture print output in a buffer owned by this request. Swapping the
+    # global sys.stdout would mix output of concurrent clients and of
+    # anything else printing in Cinema4D.
+    output = io.StringIO()
+    
+    def script_print(*args, **kwargs):
+        kwargs.setdefault('file', output)
+        print(*args, **kwargs)
+    
+    # Create a fresh namespace for script execution
+    local_namespace = {
+        '__name__': '__main__',
+        'c4d': c4d,
+        'documents': c4d.documents,
+        'gui': c4d.gui,
+        'print': script_print,
+        'find_object': find_object,
+        'find_object_by_guid': find_object_by_guid,
+        'find_material': find_material,
+        'find_material_by_key': find_material_by_key,
+        '__output__': output,
+        '__session__': session.info() if session else None
+    }
+    
     try:
-        # Create a local namespace for script execution
-        local_namespace = {
-            'c4d': c4d,
-            'documents': c4d.documents,
-            'gui': c4d.gui
-        }
+        # Execute the script
+        exec(code, local_namespace)
+        return {"success": True, "output": output.getvalue()}
+        
+    except Exception as e:
+        return {"success": False, "error": str(e), "output": output.getvalue()}
+
+def _iter_objects(doc):
+    """Yield every object in the document hierarchy, depth-first"""
+    obj = doc.GetFirstObject()
+    while obj:
+        yield obj
+        down = obj.GetDown()
+        if down:
+            obj = down
+            continue
+        while obj and not obj.GetNext():
+            obj = obj.GetUp()
+        if obj:
+            obj = obj.GetNext()
+
+def _object_guid(obj):
+    """Stable identifier of an object within its document"""
+    return obj.GetGUID()
+
+def _vector_to_list(v):
+    return [v.x, v.y, v.z]
+
+def _object_record(obj, parent_guid):
+    """Serializable description of a single object"""
+    tags = []
+    materials = []
+    for tag in obj.GetTags():
+        tags.append(tag.GetTypeName())
+        if tag.GetType() == c4d.Ttexture:
+            mat = tag[c4d.TEXTURETAG_MATERIAL]
+            if mat:
+                materials.append(mat.GetName())
+    
+    return {
+        "guid": _object_guid(obj),
+        "parent": parent_guid,
+        "name": obj.GetName(),
+        "type": obj.GetTypeName(),
+        "position": _vector_to_list(obj.GetAbsPos()),
+        "rotation": _vector_to_list(obj.GetAbsRot()),
+        "scale": _vector_to_list(obj.GetAbsScale()),
+        "tags": tags,
+        "materials": materials
+    }
+
+
+class SceneSnapshotTracker:
+    """Versioned scene snapshots with per-object checksums.
+    
+    Each call walks the full hierarchy but only rebuilds records for objects
+    whose dirty counters moved, and bumps the scene version when any record
+    checksum changed. Clients pass back the version they already have and
+    receive only the objects changed or removed since then.
+    """
+    
+    DIRTY_FLAGS = c4d.DIRTYFLAGS_DATA | c4d.DIRTYFLAGS_MATRIX
+    
+    def __init__(self):
+        self.version = 0
+        self._base_version = 0  # oldest version a diff can be computed from
+        self._doc_key = None
+        self._objects = {}  # guid -> [dirty stamp, checksum, record, version]
+        self._order = []  # guids in hierarchy order
+        self._removed = OrderedDict()  # guid -> version it was removed in
+        self._lock = threading.Lock()
+    
+    def _dirty_stamp(self, obj, parent_guid):
+        """Cheap fingerprint used to skip rebuilding unchanged records"""
+        tag_dirty = tuple(tag.GetDirty(self.DIRTY_FLAGS) for tag in obj.GetTags())
+        return (obj.GetDirty(self.DIRTY_FLAGS), parent_guid, tag_dirty)
+    
+    def _reset(self):
+        self._objects.clear()
+        self._order = []
+        self._removed.clear()
+        self.version += 1
+        self._base_version = self.version
+    
+    def update(self, doc):
+        """Walk the document and record what changed since the last walk"""
+        doc_key = (doc.GetDocumentPath(), doc.GetDocumentName())
+        if doc_key != self._doc_key:
+            self._doc_key = doc_key
+            self._reset()
         
-        # Capture print output
-        import io
-        import sys
-        old_stdout = sys.stdout
-        sys.stdout = io.StringIO()
+        next_version = self.version + 1
+        changed = False
+        order = []
         
-        # Execute the script
-        exec(script_code, local_namespace)
+        for obj in _iter_objects(doc):
+            guid = _object_guid(obj)
+            parent = obj.GetUp()
+            parent_guid = _object_guid(parent) if parent else None
+            order.append(guid)
+            
+            stamp = self._dirty_stamp(obj, parent_guid)
+            entry = self._objects.get(guid)
+            if entry is not None and entry[0] == stamp:
+                continue
+            
+            record = _object_record(obj, parent_guid)
+            checksum = zlib.crc32(json.dumps(record, sort_keys=True).encode('utf-8'))
+            if entry is not None and entry[1] == checksum:
+                entry[0] = stamp
+                continue
+            
+            self._objects[guid] = [stamp, checksum, record, next_version]
+            self._removed.pop(guid, None)
+            changed = True
+        
+        seen = set(order)
+        for guid in [g for g in self._objects if g not in seen]:
+            del self._objects[guid]
+            self._removed[guid] = next_version
+            changed = True
+        
+        # Forget the oldest tombstones, clients older than that get a full dump
+        while len(self._removed) > SNAPSHOT_MAX_TOMBSTONES:
+            _, removed_version = self._removed.popitem(last=False)
+            self._base_version = max(self._base_version, removed_version)
+        
+        self._order = order
+        if changed:
+            self.version = next_version
+    
+    def snapshot(self, doc, since_version=None):
+        """Full snapshot, or only the changes after since_version"""
+        with self._lock:
+            self.update(doc)
+            
+            full = since_version is None or since_version < self._base_version
+            if full:
+                objects = [self._objects[guid][2] for guid in self._order]
+                removed = []
+            else:
+                objects = [self._objects[guid][2] for guid in self._order
+                           if self._objects[guid][3] > since_version]
+                removed = [guid for guid, version in self._removed.items()
+                           if version > since_version]
+            
+            return {
+                "version": self.version,
+                "full": full,
+                "object_count": len(self._order),
+                "objects": objects,
+                "removed": removed
+            }
+
+
+g_scene_tracker = SceneSnapshotTracker()
+
+def _cmd_scene_snapshot(command, session):
+    """Hierarchical scene snapshot, incremental when since_version is given"""
+    doc = c4d.documents.GetActiveDocument()
+    if not doc:
+        return {"success": False, "error": "No active document"}
+    
+    snapshot = g_scene_tracker.snapshot(doc, command.get('since_version'))
+    snapshot["success"] = True
+    return snapshot
+
+
+class SceneIndex:
+    """Name and GUID lookups for one document.
+    
+    Entries are validated on read (alive, same name, still in the document),
+    so renamed or deleted objects are never returned, and a failed entry is
+    repaired on its own: a name miss falls back to SearchObject and remembers
+    the result, which also covers objects the running script inserted
+    itself. The document is walked once, and again only for a GUID the index
+    cannot find or when a different document takes over its key.
+    
+    With duplicate names, a lookup returns the first match indexed, not the
+    first in hierarchy order: inserts are not observed, so an entry that is
+    still valid keeps hiding a same-named object inserted before it later,
+    which SearchObject would return instead. Use unique names or GUIDs where
+    that matters.
+    """
+    
+    def __init__(self):
+        self.doc = None
+        self.objects_by_name = {}
+        self.objects_by_guid = {}
+        self.materials_by_name = {}
+        self.materials_by_key = {}
+        self.builds = 0
+        self.repairs = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def rebuild(self, doc):
+        objects_by_name = {}
+        objects_by_guid = {}
+        for obj in _iter_objects(doc):
+            # First in hierarchy order wins, but only until a same-named
+            # object is inserted earlier (see the class docstring)
+            objects_by_name.setdefault(obj.GetName(), obj)
+            objects_by_guid[_object_guid(obj)] = obj
+        
+        self.doc = doc
+        self.objects_by_name = objects_by_name
+        self.objects_by_guid = objects_by_guid
+        self._index_materials(doc)
+        self.builds += 1
+    
+    def _ensure(self, doc):
+        """Build on first use, and for a new document under the same path and name"""
+        try:
+            same = self.doc is not None and self.doc == doc
+        except ReferenceError:
+            same = False  # the indexed document was closed
+        if not same:
+            self.rebuild(doc)
+        return not same
+    
+    def _index_materials(self, doc):
+        materials_by_name = {}
+        materials_by_key = {}
+        for mat in doc.GetMaterials():
+            materials_by_name.setdefault(mat.GetName(), mat)
+            key = mat.GetDataInstance().GetString(MATERIAL_KEY_ID)
+            if key:
+                materials_by_key.setdefault(key, mat)
+        self.materials_by_name = materials_by_name
+        self.materials_by_key = materials_by_key
+    
+    @staticmethod
+    def _in_document(item, doc):
+        try:
+            return item.GetDocument() == doc
+        except ReferenceError:
+            # The object was freed by Cinema4D
+            return False
+    
+    def _find_named(self, table, name, doc, search):
+        self._ensure(doc)
+        item = table.get(name)
+        if item is not None and self._in_document(item, doc) and item.GetName() == name:
+            self.hits += 1
+            return item
+        
+        # Repair just this entry
+        self.misses += 1
+        self.repairs += 1
+        item = search(name)
+        if item is not None:
+            table[name] = item
+        else:
+            table.pop(name, None)
+        return item
+    
+    def find_object(self, name, doc):
+        """First indexed object with this name (may differ from SearchObject for duplicates)"""
+        obj = self._find_named(self.objects_by_name, name, doc, doc.SearchObject)
+        if obj is not None:
+            self.objects_by_guid[_object_guid(obj)] = obj
+        return obj
+    
+    def find_material(self, name, doc):
+        return self._find_named(self.materials_by_name, name, doc, doc.SearchMaterial)
+    
+    def find_material_by_key(self, key, doc):
+        """Material created for the same parameter key, if still in the document"""
+        rescanned = self._ensure(doc)
+        for attempt in range(2):
+            mat = self.materials_by_key.get(key)
+            if (mat is not None and self._in_document(mat, doc)
+                    and mat.GetDataInstance().GetString(MATERIAL_KEY_ID) == key):
+                self.hits += 1
+                return mat
+            if rescanned:
+                break
+            # Materials are few, rescanning them is cheap
+            self._index_materials(doc)
+            self.repairs += 1
+            rescanned = True
+        self.misses += 1
+        return None
+    
+    def find_object_by_guid(self, guid, doc):
+        rebuilt = self._ensure(doc)
+        obj = self.objects_by_guid.get(guid)
+        if (obj is None or not self._in_document(obj, doc)) and not rebuilt:
+            # Unknown GUID or dead entry, and no SearchObject for GUIDs: one
+            # more walk picks up new objects
+            self.rebuild(doc)
+            obj = self.objects_by_guid.get(guid)
+        if obj is not None and self._in_document(obj, doc):
+            self.hits += 1
+            return obj
+        self.misses += 1
+        return None
+    
+    def get_stats(self):
+        return {
+            "objects": len(self.objects_by_guid),
+            "names": len(self.objects_by_name),
+            "materials": len(self.materials_by_name),
+            "keyed_materials": len(self.materials_by_key),
+            "builds": self.builds,
+            "repairs": self.repairs,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+g_scene_indexes = OrderedDict()  # (document path, document name) -> SceneIndex
+g_scene_indexes_lock = threading.Lock()
+
+def _scene_index(doc):
+    """The lookup index of a document, created on first use"""
+    key = (doc.GetDocumentPath(), doc.GetDocumentName())
+    with g_scene_indexes_lock:
+        index = g_scene_indexes.get(key)
+        if index is None:
+            index = g_scene_indexes[key] = SceneIndex()
+            while len(g_scene_indexes) > SCENE_INDEX_DOCUMENTS:
+                g_scene_indexes.popitem(last=False)
+        else:
+            g_scene_indexes.move_to_end(key)
+        return index
+
+def find_object(name, doc=None):
+    """Find an object by name, O(1) for repeated lookups (exposed to scripts)
+    
+    With duplicate names this is the first indexed match, which can differ
+    from doc.SearchObject once a same-named object is inserted earlier in the
+    hierarchy; look up by GUID when names are not unique.
+    """
+    doc = doc or c4d.documents.GetActiveDocument()
+    return _scene_index(doc).find_object(name, doc) if doc else None
+
+def find_object_by_guid(guid, doc=None):
+    """Find an object by the GUID reported in scene snapshots (exposed to scripts)"""
+    doc = doc or c4d.documents.GetActiveDocument()
+    return _scene_index(doc).find_object_by_guid(guid, doc) if doc else None
+
+def find_material(name, doc=None):
+    """Find a material by name (exposed to scripts)"""
+    doc = doc or c4d.documents.GetActiveDocument()
+    return _scene_index(doc).find_material(name, doc) if doc else None
+
+def find_material_by_key(key, doc=None):
+    """Find a material by the key stored under MATERIAL_KEY_ID (exposed to scripts)"""
+    doc = doc or c4d.documents.GetActiveDocument()
+    return _scene_index(doc).find_material_by_key(key, doc) if doc else None
+
+def _cmd_find_objects(command, session):
+    """Look up objects by name and/or GUID through the scene index"""
+    doc = c4d.documents.GetActiveDocument()
+    if not doc:
+        return {"success": False, "error": "No active document"}
+    
+    def record(obj):
+        if obj is None:
+            return None
+        parent = obj.GetUp()
+        return _object_record(obj, _object_guid(parent) if parent else None)
+    
+    return {
+        "success": True,
+        "by_name": [record(find_object(name, doc)) for name in command.get('names') or []],
+        "by_guid": [record(find_object_by_guid(guid, doc)) for guid in command.get('guids') or []]
+    }
+
+g_material_stats = {"created": 0, "reused": 0}
+
+def _cmd_create_material(command, session):
+    """Create a standard material, or reuse the one made for the same key"""
+    doc = c4d.documents.GetActiveDocument()
+    if not doc:
+        return {"success": False, "error": "No active document"}
+    
+    key = command.get('key')
+    index = _scene_index(doc)
+    if key:
+        mat = index.find_material_by_key(key, doc)
+        if mat is not None:
+            bc = mat.GetDataInstance()
+            reuse_count = bc.GetInt32(MATERIAL_REUSE_ID) + 1
+            bc.SetInt32(MATERIAL_REUSE_ID, reuse_count)
+            g_material_stats["reused"] += 1
+            return {
+                "success": True,
+                "name": mat.GetName(),
+                "key": key,
+                "reused": True,
+                "reuse_count": reuse_count,
+                "stats": dict(g_material_stats)
+            }
+    
+    color = command.get('color', [0.8, 0.8, 0.8])
+    roughness = float(command.get('roughness', 0.3))
+    metallic = min(max(float(command.get('metallic', 0.0)), 0.0), 1.0)
+    
+    mat = c4d.BaseMaterial(c4d.Mmaterial)
+    if not mat:
+        return {"success": False, "error": "Failed to create material"}
+    mat.SetName(command.get('name', 'Material'))
+    
+    # Color, from a bitmap when a texture is given
+    mat[c4d.MATERIAL_COLOR_COLOR] = c4d.Vector(color[0], color[1], color[2])
+    mat[c4d.MATERIAL_USE_COLOR] = True
+    texture_path = command.get('texture_path')
+    if texture_path:
+        shader = c4d.BaseShader(c4d.Xbitmap)
+        shader[c4d.BITMAPSHADER_FILENAME] = texture_path
+        mat.InsertShader(shader)
+        mat[c4d.MATERIAL_COLOR_SHADER] = shader
+    
+    # Reflection properties. Metals reflect in their own color and have
+    # next to no diffuse color, so metallic tints one and dims the other.
+    mat[c4d.MATERIAL_USE_REFLECTION] = True
+    mat[c4d.MATERIAL_REFLECTION_BRIGHTNESS] = 1.0 - roughness
+    mat[c4d.MATERIAL_REFLECTION_COLOR] = c4d.Vector(*(1.0 + (c - 1.0) * metallic for c in color[:3]))
+    mat[c4d.MATERIAL_COLOR_BRIGHTNESS] = 1.0 - metallic
+    
+    if key:
+        mat.GetDataInstance().SetString(MATERIAL_KEY_ID, key)
+        index.materials_by_key[key] = mat
+    doc.InsertMaterial(mat)
+    c4d.EventAdd()
+    g_material_stats["created"] += 1
+    
+    return {
+        "success": True,
+        "name": mat.GetName(),
+        "key": key,
+        "reused": False,
+        "reuse_count": 0,
+        "stats": dict(g_material_stats)
+    }
+
+def _cmd_scene_index_stats(command, session):
+    """Report lookup index statistics per document"""
+    with g_scene_indexes_lock:
+        stats = [{"document": key[1], "path": key[0], **index.get_stats()}
+                 for key, index in g_scene_indexes.items()]
+    return {"success": True, "documents": stats}
+
+def _unpack_array(typecode, payload):
+    """Decode a little-endian buffer into an array"""
+    values = array.array(typecode)
+    values.frombytes(payload)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+class MeshStream:
+    """PolygonObject filled in place from binary mesh chunks"""
+    
+    def __init__(self, name, point_count, polygon_count, has_uvs, position=(0, 0, 0), scale=1.0):
+        self.point_count = point_count
+        self.polygon_count = polygon_count
+        self.obj = c4d.PolygonObject(point_count, polygon_count)
+        self.obj.SetName(name)
+        # Points are collected here and set in one SetAllPoints call at the end
+        self.points = [None] * point_count
+        self.uvw_tag = c4d.UVWTag(polygon_count) if has_uvs else None
+        self.position = position
+        self.scale = scale
+        # Elements written so far, counted once however often a chunk is resent
+        self.received = {"points": 0, "polygons": 0, "uvs": 0}
+        self.covered = {
+            "points": bytearray(point_count),
+            "polygons": bytearray(polygon_count),
+            "uvs": bytearray(polygon_count if has_uvs else 0)
+        }
+        self.started = time.time()
+    
+    def write(self, channel, offset, count, payload):
+        """Apply one chunk of points, polygons or UVs"""
+        if channel not in MESH_CHANNELS:
+            raise ValueError(f"Unknown mesh channel: {channel}")
+        width, typecode = MESH_CHANNELS[channel]
+        total = self.point_count if channel == "points" else self.polygon_count
+        if offset < 0 or offset + count > total:
+            raise ValueError(f"{channel} chunk out of range: {offset}+{count} > {total}")
+        
+        values = _unpack_array(typecode, payload)
+        if len(values) != count * width:
+            raise ValueError(f"{channel} chunk holds {len(values)} values, expected {count * width}")
+        if channel == "polygons" and count and max(values) >= self.point_count:
+            raise ValueError(f"polygons chunk at {offset} indexes point {max(values)}, "
+                             f"the mesh has {self.point_count}")
         
-        # Get the output
-        output = sys.stdout.getvalue()
-        sys.stdout = old_stdout
+        Vector = c4d.Vector
+        if channel == "points":
+            self.points[offset:offset + count] = map(Vector, values[0::3], values[1::3], values[2::3])
+        elif channel == "polygons":
+            obj = self.obj
+            CPolygon = c4d.CPolygon
+            for i in range(count):
+                j = i * 3
+                obj.SetPolygon(offset + i, CPolygon(values[j], values[j + 1], values[j + 2]))
+        else:
+            if self.uvw_tag is None:
+                raise ValueError("Stream was started without UVs")
+            tag = self.uvw_tag
+            for i in range(count):
+                j = i * 6
+                c = Vector(values[j + 4], values[j + 5], 0)
+                tag.SetSlow(offset + i, Vector(values[j], values[j + 1], 0),
+                            Vector(values[j + 2], values[j + 3], 0), c, c)
         
-        return {"success": True, "output": output}
+        covered = self.covered[channel]
+        self.received[channel] += covered.count(0, offset, offset + count)
+        covered[offset:offset + count] = b"\x01" * count
+    
+    def is_complete(self):
+        """Every point, polygon and UV written at least once"""
+        return (self.received["points"] == self.point_count
+                and self.received["polygons"] == self.polygon_count
+                and (self.uvw_tag is None or self.received["uvs"] == self.polygon_count))
+    
+    def finish(self):
+        """The object with every streamed point applied"""
+        self.obj.SetAllPoints(self.points)
+        self.points = None
+        return self.obj
+
+
+class FrameCodec:
+    """Compression for one connection, with ratio and timing statistics"""
+    
+    def __init__(self, name, threshold=COMPRESSION_THRESHOLD):
+        self.name = name
+        self.codec_id = CODEC_IDS[name]
+        self.threshold = threshold
+        self.sent = 0
+        self.sent_compressed = 0
+        self.sent_raw_bytes = 0
+        self.sent_wire_bytes = 0
+        self.compress_time = 0.0
+        self.received = 0
+        self.received_compressed = 0
+        self.received_raw_bytes = 0
+        self.received_wire_bytes = 0
+        self.decompress_time = 0.0
+    
+    def encode(self, payload):
+        """Prefix the codec byte, compressing large payloads when it pays off"""
+        self.sent += 1
+        self.sent_raw_bytes += len(payload)
+        frame = None
+        if len(payload) >= self.threshold:
+            start = time.perf_counter()
+            if self.codec_id == CODEC_IDS["lz4"]:
+                compressed = lz4_frame.compress(payload)
+            else:
+                compressed = zlib.compress(payload, 1)
+            self.compress_time += time.perf_counter() - start
+            if len(compressed) < len(payload):
+                self.sent_compressed += 1
+                frame = bytes((self.codec_id,)) + compressed
+        if frame is None:
+            frame = bytes((CODEC_RAW,)) + payload
+        self.sent_wire_bytes += len(frame)
+        return frame
+    
+    def decode(self, frame):
+        self.received += 1
+        self.received_wire_bytes += len(frame)
+        codec_id, data = frame[0], frame[1:]
+        if codec_id != CODEC_RAW:
+            start = time.perf_counter()
+            if codec_id == CODEC_IDS["lz4"] and lz4_frame is not None:
+                data = lz4_frame.decompress(data)
+            elif codec_id == CODEC_IDS["zlib"]:
+                data = zlib.decompress(data)
+            else:
+                raise ValueError(f"Unsupported codec: {codec_id}")
+            self.decompress_time += time.perf_counter() - start
+            self.received_compressed += 1
+        self.received_raw_bytes += len(data)
+        return data
+    
+    def get_stats(self):
+        return {
+            "codec": self.name,
+            "threshold": self.threshold,
+            "sent": self.sent,
+            "sent_compressed": self.sent_compressed,
+            "sent_ratio": self.sent_raw_bytes / self.sent_wire_bytes if self.sent_wire_bytes else 1.0,
+            "compress_ms": self.compress_time * 1000.0,
+            "received": self.received,
+            "received_compressed": self.received_compressed,
+            "received_ratio": self.received_raw_bytes / self.received_wire_bytes if self.received_wire_bytes else 1.0,
+            "decompress_ms": self.decompress_time * 1000.0
+        }
+
+
+class ClientSession:
+    """State of one connected client (desktop app, MCP agent, ...)"""
+    
+    _ids = itertools.count(1)
+    
+    def __init__(self, client_socket, addr):
+        self.id = next(self._ids)
+        self.socket = client_socket
+        self.addr = addr
+        self.connected_at = time.time()
+        self.request_count = 0
+        # Mesh streams in progress, keyed by stream id. Kept per session so
+        # clients streaming at the same time never see each other's data.
+        self.mesh_streams = {}
+        self._stream_ids = itertools.count(1)
+        # Set by the hello command, applies from the next message on
+        self.codec = None
+    
+    def next_stream_id(self):
+        return next(self._stream_ids)
+    
+    def get_mesh_stream(self, stream_id):
+        stream = self.mesh_streams.get(stream_id)
+        if stream is None:
+            raise ValueError(f"Unknown mesh stream: {stream_id}")
+        return stream
+    
+    def info(self):
+        return {
+            "id": self.id,
+            "address": f"{self.addr[0]}:{self.addr[1]}" if self.addr else None,
+            "connected_seconds": time.time() - self.connected_at,
+            "requests": self.request_count,
+            "mesh_streams": len(self.mesh_streams),
+            "compression": self.codec.get_stats() if self.codec else None
+        }
+
+def _cmd_mesh_begin(command, session):
+    """Allocate a PolygonObject that following mesh_chunk messages fill"""
+    stream = MeshStream(
+        command.get('name', 'Mesh'),
+        int(command['point_count']),
+        int(command['polygon_count']),
+        bool(command.get('has_uvs', False)),
+        command.get('position', [0, 0, 0]),
+        float(command.get('scale', 1.0))
+    )
+    
+    stream_id = session.next_stream_id()
+    session.mesh_streams[stream_id] = stream
+    return {"success": True, "stream_id": stream_id}
+
+def _cmd_mesh_chunk(command, session):
+    """Write a binary chunk (first attachment) into a mesh stream"""
+    stream = session.get_mesh_stream(command.get('stream_id'))
+    attachments = command.get('attachments') or []
+    if len(attachments) != 1:
+        return {"success": False, "error": "mesh_chunk expects exactly one binary attachment"}
+    
+    stream.write(command['channel'], int(command['offset']), int(command['count']), attachments[0])
+    return {"success": True}
+
+def _cmd_mesh_end(command, session):
+    """Insert a fully streamed mesh into the active document"""
+    stream = session.get_mesh_stream(command.get('stream_id'))
+    if not stream.is_complete():
+        return {"success": False, "error": f"Mesh stream incomplete: {stream.received}"}
+    
+    # The stream survives a missing document, mesh_end can be retried
+    doc = c4d.documents.GetActiveDocument()
+    if not doc:
+        return {"success": False, "error": "No active document"}
+    
+    obj = stream.finish()
+    if stream.uvw_tag is not None:
+        obj.InsertTag(stream.uvw_tag)
+    obj.MakeTag(c4d.Tphong)
+    position = stream.position
+    obj.SetAbsPos(c4d.Vector(position[0], position[1], position[2]))
+    obj.SetAbsScale(c4d.Vector(stream.scale, stream.scale, stream.scale))
+    obj.Message(c4d.MSG_UPDATE)
+    
+    doc.InsertObject(obj)
+    c4d.EventAdd()
+    del session.mesh_streams[command['stream_id']]
+    
+    return {
+        "success": True,
+        "name": obj.GetName(),
+        "guid": _object_guid(obj),
+        "points": stream.point_count,
+        "polygons": stream.polygon_count,
+        "seconds": time.time() - stream.started
+    }
+
+def _cmd_mesh_abort(command, session):
+    """Discard a mesh stream"""
+    session.mesh_streams.pop(command.get('stream_id'), None)
+    return {"success": True}
+
+def _cmd_scatter_instances(command, session):
+    """Place instances of source objects from a binary matrix payload.
+    
+    Attachments are the matrices (12 float32 per instance: off, v1, v2, v3)
+    and the source index of each instance (uint32). Instances reference the
+    source geometry instead of cloning it; where Cinema4D supports it, each
+    source gets a single multi-instance object holding all of its matrices.
+    """
+    attachments = command.get('attachments') or []
+    if len(attachments) != 2:
+        return {"success": False, "error": "scatter_instances expects matrix and source attachments"}
+    
+    doc = c4d.documents.GetActiveDocument()
+    if not doc:
+        return {"success": False, "error": "No active document"}
+    
+    names = command.get('sources') or []
+    sources = [find_object(name, doc) for name in names]
+    missing = [name for name, obj in zip(names, sources) if obj is None]
+    if missing:
+        return {"success": False, "error": f"Source objects not found: {missing}"}
+    
+    values = _unpack_array('f', attachments[0])
+    source_ids = _unpack_array('I', attachments[1])
+    count = len(source_ids)
+    if len(values) != count * 12:
+        return {"success": False, "error": f"Matrix payload holds {len(values)} values, expected {count * 12}"}
+    if count and max(source_ids) >= len(sources):
+        return {"success": False, "error": "Source index out of range"}
+    
+    Vector = c4d.Vector
+    matrices = [[] for _ in sources]
+    for i in range(count):
+        j = i * 12
+        matrices[source_ids[i]].append(c4d.Matrix(
+            Vector(values[j], values[j + 1], values[j + 2]),
+            Vector(values[j + 3], values[j + 4], values[j + 5]),
+            Vector(values[j + 6], values[j + 7], values[j + 8]),
+            Vector(values[j + 9], values[j + 10], values[j + 11])))
+    
+    parent = c4d.BaseObject(c4d.Onull)
+    parent.SetName(command.get('name', 'Scattered Objects'))
+    
+    # Multi-instances need R23+, older versions get one render instance per point
+    multi_instance = hasattr(c4d, 'InstanceObject')
+    created = []
+    for source, source_matrices in zip(sources, matrices):
+        if not source_matrices:
+            continue
+        if multi_instance:
+            instance = c4d.InstanceObject()
+            instance.SetName(source.GetName())
+            instance.SetReferenceObject(source)
+            instance[c4d.INSTANCEOBJECT_RENDERINSTANCE_MODE] = c4d.INSTANCEOBJECT_RENDERINSTANCE_MODE_MULTIINSTANCE
+            instance.SetInstanceMatrices(source_matrices)
+            created.append(instance)
+        else:
+            for matrix in source_matrices:
+                instance = c4d.BaseObject(c4d.Oinstance)
+                instance.SetName(source.GetName())
+                instance[c4d.INSTANCEOBJECT_LINK] = source
+                instance[c4d.INSTANCEOBJECT_RENDERINSTANCE] = True
+                instance.SetMl(matrix)
+                created.append(instance)
+    
+    # Build the hierarchy before it goes into the document
+    for instance in reversed(created):
+        instance.InsertUnder(parent)
+    if command.get('collider'):
+        tag = parent.MakeTag(c4d.Tcollider)
+        tag[c4d.COLLIDER_MODE] = c4d.COLLIDER_MODE_STATIC
+    doc.InsertObject(parent)
+    c4d.EventAdd()
+    
+    return {
+        "success": True,
+        "name": parent.GetName(),
+        "guid": _object_guid(parent),
+        "instances": count,
+        "objects": len(created),
+        "mode": "multi-instance" if multi_instance else "render-instance"
+    }
+
+g_patterns = OrderedDict()  # pattern key -> (name, build function)
+
+def _cmd_define_patterns(command, session):
+    """Compile scene pattern build functions once, keyed by their content hash.
+    
+    Each pattern is the source of a build(doc, parent, params) function. It
+    sees the same helpers as scripts and stays cached until evicted, so
+    instantiating it later only costs the parameters.
+    """
+    defined, errors = [], {}
+    for pattern in command.get('patterns') or []:
+        key, name = pattern.get('key'), pattern.get('name')
+        namespace = {
+            '__name__': f"pattern_{name}",
+            'c4d': c4d,
+            'find_object': find_object,
+            'find_object_by_guid': find_object_by_guid,
+            'find_material': find_material,
+            'find_material_by_key': find_material_by_key,
+        }
+        try:
+            exec(compile(pattern['source'], f"<pattern {name}>", 'exec'), namespace)
+            build = namespace[name]
+        except Exception as e:
+            errors[key] = f"{name}: {e}"
+            continue
+        g_patterns[key] = (name, build)
+        g_patterns.move_to_end(key)
+        defined.append(key)
+    while len(g_patterns) > PATTERN_CACHE_SIZE:
+        g_patterns.popitem(last=False)
+    
+    return {"success": not errors, "defined": defined, "errors": errors}
+
+def _cmd_instantiate_patterns(command, session):
+    """Build every queued pattern instance in one pass with a single EventAdd.
+    
+    Each instance gets its own null in the document and runs the pattern's
+    build function under it; a failing instance is removed again without
+    affecting the others, and so is the null of one that built no objects
+    (materials only). Unknown keys are reported as missing so the client
+    can define them and retry.
+    """
+    instances = command.get('instances') or []
+    missing = sorted({i.get('key') for i in instances if i.get('key') not in g_patterns})
+    if missing:
+        return {"success": False, "error": "Unknown patterns", "missing": missing}
+    
+    doc = c4d.documents.GetActiveDocument()
+    if not doc:
+        return {"success": False, "error": "No active document"}
+    
+    start = time.time()
+    results, failed = [], 0
+    for instance in instances:
+        key = instance['key']
+        g_patterns.move_to_end(key)
+        name, build = g_patterns[key]
         
+        parent = c4d.BaseObject(c4d.Onull)
+        parent.SetName(instance.get('name') or name)
+        doc.InsertObject(parent)
+        try:
+            result = build(doc, parent, instance.get('params') or {})
+        except Exception as e:
+            parent.Remove()
+            failed += 1
+            results.append({"pattern": name, "success": False, "error": str(e)})
+            continue
+        empty = parent.GetDown() is None
+        if empty:
+            parent.Remove()
+        results.append({
+            "pattern": name,
+            "success": True,
+            "name": None if empty else parent.GetName(),
+            "guid": None if empty else _object_guid(parent),
+            "result": result
+        })
+    c4d.EventAdd()
+    
+    return {
+        "success": not failed,
+        "built": len(instances) - failed,
+        "failed": failed,
+        "results": results,
+        "seconds": time.time() - start
+    }
+
+def _cmd_script_cache_stats(command, session):
+    """Report compiled script cache statistics"""
+    return {"success": True, "stats": g_script_cache.get_stats()}
+
+def _cmd_sessions(command, session):
+    """List connected clients"""
+    with g_sessions_lock:
+        sessions = [s.info() for s in g_sessions.values()]
+    return {"success": True, "session_id": session.id, "sessions": sessions}
+
+def _cmd_pump_stats(command, session):
+    """Report main-thread command queue statistics"""
+    return {"success": True, "stats": g_command_queue.get_stats()}
+
+def _cmd_ping(command, session):
+    """Heartbeat, echoes the client's timestamp and reports queued main-thread work"""
+    pending = g_command_queue.get_stats()["pending"]
+    return {"success": True, "sent": command.get('sent'), "pending": pending}
+
+def _cmd_hello(command, session):
+    """Capability exchange, picks the first offered codec this side supports"""
+    offered = command.get('compression') or []
+    name = next((codec for codec in offered if codec in SUPPORTED_CODECS), None)
+    threshold = max(64, int(command.get('threshold', COMPRESSION_THRESHOLD)))
+    session.codec = FrameCodec(name, threshold) if name else None
+    return {
+        "success": True,
+        "session_id": session.id,
+        "compression": name,
+        "threshold": threshold,
+        "codecs": SUPPORTED_CODECS,
+        "commands": sorted(COMMAND_HANDLERS)
+    }
+
+def _cmd_clear_script_cache(command, session):
+    """Drop all compiled scripts"""
+    g_script_cache.clear()
+    return {"success": True}
+
+# Built-in commands handled by the plugin itself instead of exec'ing a script
+COMMAND_HANDLERS = {
+    "script_cache_stats": _cmd_script_cache_stats,
+    "clear_script_cache": _cmd_clear_script_cache,
+    "scene_snapshot": _cmd_scene_snapshot,
+    "mesh_begin": _cmd_mesh_begin,
+    "mesh_chunk": _cmd_mesh_chunk,
+    "mesh_end": _cmd_mesh_end,
+    "mesh_abort": _cmd_mesh_abort,
+    "sessions": _cmd_sessions,
+    "pump_stats": _cmd_pump_stats,
+    "ping": _cmd_ping,
+    "hello": _cmd_hello,
+    "find_objects": _cmd_find_objects,
+    "scene_index_stats": _cmd_scene_index_stats,
+    "create_material": _cmd_create_material,
+    "scatter_instances": _cmd_scatter_instances,
+    "define_patterns": _cmd_define_patterns,
+    "instantiate_patterns": _cmd_instantiate_patterns,
+}
+
+# Commands that never touch the active document and can run on the socket
+# thread. mesh_chunk only fills an object that is not inserted yet, so the
+# heavy per-point work stays off the main thread.
+THREAD_SAFE_COMMANDS = {
+    "script_cache_stats",
+    "clear_script_cache",
+    "sessions",
+    "pump_stats",
+    "ping",
+    "hello",
+    "scene_index_stats",
+    "mesh_chunk",
+    "mesh_abort",
+}
+
+def _recv_exact(client_socket, size):
+    """Receive exactly size bytes, or None if the peer closed the connection"""
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = client_socket.recv(min(size - len(buf), 1024 * 1024))
+        if not chunk:
+            return None
+        buf.extend(chunk)
+    return bytes(buf)
+
+def _recv_message(client_socket, codec=None):
+    """Receive one length-prefixed message"""
+    header = _recv_exact(client_socket, HEADER.size)
+    if header is None:
+        return None
+    (size,) = HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message too large: {size} bytes")
+    payload = _recv_exact(client_socket, size)
+    if payload is not None and codec is not None:
+        payload = codec.decode(payload)
+    return payload
+
+def _send_message(client_socket, payload, codec=None):
+    """Send one length-prefixed message"""
+    if codec is not None:
+        payload = codec.encode(payload)
+    client_socket.sendall(HEADER.pack(len(payload)) + payload)
+
+def _decode_command(data):
+    """Parse a JSON command, returns None for malformed input"""
+    try:
+        command = json.loads(data.decode('utf-8'))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return command if isinstance(command, dict) else None
+
+def _encode_result(result):
+    return json.dumps(result, separators=(',', ':')).encode('utf-8')
+
+def process_command(command, session):
+    """Run a decoded command on behalf of a client session"""
+    script = command.get('script', '')
+    handler = COMMAND_HANDLERS.get(command.get('command'))
+    session.request_count += 1
+    
+    try:
+        if handler:
+            return handler(command, session)
+        elif script:
+            return execute_script(script, session)
+        else:
+            return {"success": False, "error": "No script provided"}
     except Exception as e:
-        import sys
-        sys.stdout = old_stdout
         return {"success": False, "error": str(e)}
 
-def handle_client(client_socket):
+class PendingRequest:
+    """A command waiting for the main thread, and its result once done"""
+    
+    def __init__(self, command, session):
+        self.command = command
+        self.session = session
+        self.result = None
+        self.done = threading.Event()
+        self.queued_at = time.perf_counter()
+
+
+class CommandQueue:
+    """Requests handed from socket threads to Cinema4D's main thread.
+    
+    The pump drains the queue in time-sliced batches: it keeps running
+    requests until PUMP_TIME_BUDGET is used up, then yields to the UI and
+    reschedules itself if work is left. While no pump is running (e.g. the
+    pump dialog was closed) requests run inline, one at a time.
+    """
+    
+    def __init__(self):
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._inline_lock = threading.Lock()
+        self.pump_active = False
+        self.processed = 0
+        self.batches = 0
+        self.max_batch = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    def _run_inline(self, command, session):
+        with self._inline_lock:
+            return process_command(command, session)
+    
+    def submit(self, command, session):
+        """Run a command on the main thread and wait for its result"""
+        if command.get('command') in THREAD_SAFE_COMMANDS:
+            return process_command(command, session)
+        if not self.pump_active:
+            return self._run_inline(command, session)
+        
+        request = PendingRequest(command, session)
+        with self._lock:
+            self._pending.append(request)
+        c4d.SpecialEventAdd(PUMP_MESSAGE_ID)
+        
+        while not request.done.wait(0.5):
+            if g_connected and self.pump_active:
+                continue
+            # The pump went away, take the request back if it has not started
+            with self._lock:
+                try:
+                    self._pending.remove(request)
+                except ValueError:
+                    continue
+            if not g_connected:
+                return {"success": False, "error": "Server stopped"}
+            return self._run_inline(command, session)
+        
+        return request.result
+    
+    def drain(self, budget=PUMP_TIME_BUDGET):
+        """Run queued requests until the time budget is used (main thread only)"""
+        deadline = time.perf_counter() + budget
+        count = 0
+        
+        while True:
+            with self._lock:
+                if not self._pending:
+                    break
+                request = self._pending.popleft()
+            
+            wait = time.perf_counter() - request.queued_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            
+            request.result = process_command(request.command, request.session)
+            request.done.set()
+            count += 1
+            
+            if time.perf_counter() >= deadline:
+                break
+        
+        if count:
+            self.processed += count
+            self.batches += 1
+            self.max_batch = max(self.max_batch, count)
+        
+        # Let Cinema4D handle UI events before continuing with the rest
+        with self._lock:
+            remaining = len(self._pending)
+        if remaining:
+            c4d.SpecialEventAdd(PUMP_MESSAGE_ID)
+        return count
+    
+    def get_stats(self):
+        """Get queue statistics"""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "pump_active": self.pump_active,
+            "pending": pending,
+            "processed": self.processed,
+            "batches": self.batches,
+            "avg_batch": self.processed / self.batches if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "avg_wait_ms": 1000.0 * self.total_wait / self.processed if self.processed else 0.0,
+            "max_wait_ms": 1000.0 * self.max_wait
+        }
+
+
+g_command_queue = CommandQueue()
+
+
+class CommandPumpDialog(gui.GeDialog):
+    """Small async dialog that drains the command queue on the main thread"""
+    
+    def CreateLayout(self):
+        self.SetTitle("Cinema4D MCP Server")
+        self.AddStaticText(1000, c4d.BFH_SCALEFIT, name="Processing MCP commands")
+        return True
+    
+    def InitValues(self):
+        self.SetTimer(PUMP_INTERVAL_MS)
+        g_command_queue.pump_active = True
+        return True
+    
+    def Timer(self, msg):
+        g_command_queue.drain()
+    
+    def CoreMessage(self, id, msg):
+        if id == PUMP_MESSAGE_ID:
+            g_command_queue.drain()
+            return True
+        return gui.GeDialog.CoreMessage(self, id, msg)
+    
+    def DestroyWindow(self):
+        g_command_queue.pump_active = False
+
+
+def start_pump():
+    """Open the command pump dialog (must be called from the main thread)"""
+    global g_pump_dialog
+    
+    if not c4d.threading.GeIsMainThread():
+        print("Command pump must be started from the main thread, running commands inline")
+        return False
+    
+    if g_pump_dialog is None:
+        g_pump_dialog = CommandPumpDialog()
+    if not g_pump_dialog.IsOpen():
+        g_pump_dialog.Open(c4d.DLG_TYPE_ASYNC, defaultw=240, defaulth=40)
+    return True
+
+def stop_pump():
+    """Close the command pump dialog, queued requests fall back to inline"""
+    g_command_queue.pump_active = False
+    if g_pump_dialog is not None and c4d.threading.GeIsMainThread():
+        g_pump_dialog.Close()
+
+def handle_client(session):
     """Handle client connection and commands"""
     global g_connected
+    client_socket = session.socket
     
     try:
+        # Old clients send bare JSON without a length prefix. A framed message
+        # can never start with '{' (that would be a >2GB length), so the first
+        # byte tells the two protocols apart.
+        first = client_socket.recv(1, socket.MSG_PEEK)
+        framed = bool(first) and first != b'{'
+        
         while g_connected:
+            # A hello switches codecs after its own response has been sent
+            codec = session.codec
+            
             # Receive data
-            data = client_socket.recv(4096)
+            if framed:
+                data = _recv_message(client_socket, codec)
+            else:
+                data = client_socket.recv(4096)
             if not data:
                 break
-                
-            try:
-                # Parse JSON command
-                command = json.loads(data.decode('utf-8'))
-                script = command.get('script', '')
-                
-                if script:
-                    # Execute script in main thread context
-                    result = execute_script(script)
-                    response = json.dumps(result)
-                else:
-                    response = json.dumps({"success": False, "error": "No script provided"})
-                
-                # Send response
-                client_socket.send(response.encode('utf-8'))
-                
-            except json.JSONDecodeError:
-                error_response = json.dumps({"success": False, "error": "Invalid JSON"})
-                client_socket.send(error_response.encode('utf-8'))
+            
+            command = _decode_command(data)
+            if command is None:
+                result = {"success": False, "error": "Invalid JSON"}
+            else:
+                # Binary attachments follow their command as separate frames
+                attachment_count = command.get('attachments') if framed else None
+                if isinstance(attachment_count, int) and attachment_count > 0:
+                    attachments = []
+                    for _ in range(attachment_count):
+                        payload = _recv_message(client_socket, codec)
+                        if payload is None:
+                            return
+                        attachments.append(payload)
+                    command['attachments'] = attachments
+                # Scene work is queued for the main thread
+                result = g_command_queue.submit(command, session)
+            response = _encode_result(result)
+            
+            # Send response
+            if framed:
+                _send_message(client_socket, response, codec)
+            else:
+                client_socket.sendall(response)
                 
     except Exception as e:
-        print(f"Client handler error: {e}")
+        if g_connected:
+            print(f"Client handler error: {e}")
     finally:
+        with g_sessions_lock:
+            g_sessions.pop(session.id, None)
         client_socket.close()
+        print(f"MCP Client {session.id} disconnected")
 
 def socket_server_thread():
     """Socket server thread function"""
@@ -88,20 +1409,24 @@ def socket_server_thread():
         # Create socket
         g_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         g_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        g_socket.bind(('localhost', 54321))
-        g_socket.listen(1)
+        g_socket.bind(('localhost', SERVER_PORT))
+        g_socket.listen(SERVER_BACKLOG)
         
-        print("Cinema4D MCP Server listening on port 54321")
-        gui.MessageDialog("Cinema4D MCP Server listening on port 54321")
+        print(f"Cinema4D MCP Server listening on port {SERVER_PORT}")
+        gui.MessageDialog(f"Cinema4D MCP Server listening on port {SERVER_PORT}")
         
         while g_connected:
             try:
                 # Accept connections
                 client_socket, addr = g_socket.accept()
-                print(f"MCP Client connected from {addr}")
+                session = ClientSession(client_socket, addr)
+                with g_sessions_lock:
+                    g_sessions[session.id] = session
+                print(f"MCP Client {session.id} connected from {addr}")
                 
-                # Handle client in the same thread (Cinema4D requirement)
-                handle_client(client_socket)
+                # Each client gets its own thread so the desktop app and
+                # MCP agents can stay connected at the same time
+                threading.Thread(target=handle_client, args=(session,), daemon=True).start()
                 
             except socket.error as e:
                 if g_connected:
@@ -127,17 +1452,29 @@ def start_server():
     g_connected = True
     g_server_thread = threading.Thread(target=socket_server_thread, daemon=True)
     g_server_thread.start()
+    
+    start_pump()
 
 def stop_server():
     """Stop the MCP server"""
     global g_connected, g_socket, g_server_thread
     
     g_connected = False
+    stop_pump()
     
     if g_socket:
         g_socket.close()
         g_socket = None
     
+    # Disconnect clients, their threads exit once recv fails
+    with g_sessions_lock:
+        sessions = list(g_sessions.values())
+    for session in sessions:
+        try:
+            session.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    
     if g_server_thread:
         g_server_thread.join(timeout=1)
         g_server_thread = None
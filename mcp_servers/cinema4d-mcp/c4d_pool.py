@@ -0,0 +1,171 @@
+"""
+Pool of Cinema4D plugin endpoints
+Each endpoint is a Cinema4DLink to one Cinema4D instance. Requests for a
+document stick to the instance that holds it, and new documents go to the
+least loaded healthy instance. Requests without a document all go to one
+default instance, since tools called one after another (create a material,
+then assign it) expect the same scene. An endpoint that stays down is
+evicted from routing and its documents, or the default, are reassigned,
+while its link keeps trying to reconnect so it can rejoin the pool.
+"""
+
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from c4d_link import Cinema4DLink, Cinema4DUnavailable
+
+logger = logging.getLogger("cinema4d-mcp-server")
+
+DEFAULT_PORT = 54321
+
+
+def parse_ports(spec: Optional[str]) -> List[int]:
+    """Parse "54321,54322" or "54321-54324" (or a mix) into a list of ports"""
+    ports = []
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = (int(p) for p in part.split("-", 1))
+            ports.extend(range(first, last + 1))
+        else:
+            ports.append(int(part))
+    return list(dict.fromkeys(ports))
+
+
+def ports_from_env() -> List[int]:
+    """C4D_MCP_PORTS for a pool, else C4D_MCP_PORT, else the default port"""
+    ports = parse_ports(os.environ.get("C4D_MCP_PORTS"))
+    return ports or [int(os.environ.get("C4D_MCP_PORT", DEFAULT_PORT))]
+
+
+class Endpoint:
+    """One Cinema4D instance and its routing state"""
+
+    def __init__(self, link: Cinema4DLink):
+        self.link = link
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.down_since: Optional[float] = time.monotonic()
+
+    @property
+    def name(self) -> str:
+        return f"{self.link.host}:{self.link.port}"
+
+    def load(self) -> float:
+        """Requests waiting on this instance, ours plus its queued main-thread work"""
+        return self.in_flight + self.link.pending_in_c4d
+
+    def update_health(self):
+        if self.link.connected:
+            self.down_since = None
+        elif self.down_since is None:
+            self.down_since = time.monotonic()
+
+    def down_for(self) -> float:
+        return time.monotonic() - self.down_since if self.down_since is not None else 0.0
+
+
+class Cinema4DPool:
+    """Routes requests across Cinema4D instances with per-document affinity"""
+
+    def __init__(self, ports: List[int], host: str = "localhost",
+                 evict_after: float = 30.0, **link_options):
+        self.endpoints = [Endpoint(Cinema4DLink(host, port, **link_options)) for port in ports]
+        self.evict_after = evict_after
+        self.affinity: Dict[str, Endpoint] = {}
+        self.default: Optional[Endpoint] = None  # for requests without a document
+        self.reassigned = 0
+
+    @property
+    def connected(self) -> bool:
+        return any(endpoint.link.connected for endpoint in self.endpoints)
+
+    async def start(self):
+        for endpoint in self.endpoints:
+            await endpoint.link.start()
+
+    async def close(self):
+        for endpoint in self.endpoints:
+            await endpoint.link.close()
+
+    def _healthy(self) -> List[Endpoint]:
+        for endpoint in self.endpoints:
+            endpoint.update_health()
+        return [endpoint for endpoint in self.endpoints if endpoint.link.connected]
+
+    def _evicted(self, endpoint: Endpoint) -> bool:
+        return endpoint.down_for() > self.evict_after
+
+    def pick(self, document: Optional[str] = None) -> Endpoint:
+        """Endpoint for a request, pinning documents to the instance that has them.
+
+        Requests without a document stick to the default endpoint, chosen
+        like a new document's on first use.
+        """
+        healthy = self._healthy()
+
+        pinned = self.affinity.get(document) if document is not None else self.default
+        # A briefly disconnected instance keeps its documents, the link
+        # queues or fails requests until it is back or gets evicted
+        if pinned is not None and not self._evicted(pinned):
+            return pinned
+        if pinned is not None:
+            self.reassigned += 1
+            what = f"document {document!r}" if document is not None else "the default"
+            logger.warning(f"Evicted {pinned.name}, moving {what}")
+
+        candidates = healthy or [e for e in self.endpoints if not self._evicted(e)] or self.endpoints
+        endpoint = min(candidates, key=lambda e: (e.load(), e.requests))
+        if document is not None:
+            self.affinity[document] = endpoint
+        else:
+            self.default = endpoint
+        return endpoint
+
+    def pin_to_default(self, document: str) -> Endpoint:
+        """Pin a document to the default endpoint, for work that must not move mid-way"""
+        self.affinity[document] = self.pick()
+        return self.affinity[document]
+
+    def release(self, document: str):
+        """Forget a document's affinity (e.g. once a mesh stream is complete)"""
+        self.affinity.pop(document, None)
+
+    async def send(self, command: Dict[str, Any], attachments: Optional[List[bytes]] = None,
+                   document: Optional[str] = None) -> str:
+        endpoint = self.pick(document)
+        endpoint.in_flight += 1
+        endpoint.requests += 1
+        try:
+            return await endpoint.link.send(command, attachments)
+        except Cinema4DUnavailable:
+            endpoint.failures += 1
+            raise
+        finally:
+            endpoint.in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        self._healthy()
+        endpoints = []
+        for endpoint in self.endpoints:
+            stats = endpoint.link.get_stats()
+            stats.update({
+                "in_flight": endpoint.in_flight,
+                "requests": endpoint.requests,
+                "failures": endpoint.failures,
+                "evicted": self._evicted(endpoint),
+                "documents": sorted(d for d, e in self.affinity.items() if e is endpoint)
+            })
+            endpoints.append(stats)
+        return {
+            "endpoints": endpoints,
+            "healthy": sum(1 for endpoint in self.endpoints if endpoint.link.connected),
+            "documents": len(self.affinity),
+            "default": self.default.name if self.default else None,
+            "reassigned": self.reassigned
+        }
@@ -0,0 +1,973 @@
+"""
+In-memory stand-in for Cinema4D's c4d module
+Models documents, objects, materials, shaders, tags and the main-thread event
+loop closely enough to host c4d_plugin.py and the scripts in scripts/
+unchanged, so the socket protocol can be exercised and benchmarked on a
+machine without Cinema4D.
+
+Only behaviour the bridge relies on is modelled. Unknown constants resolve to
+stable unique integers so scripts that set arbitrary parameters still run.
+"""
+
+import copy
+import itertools
+import math
+import queue
+import re
+import threading as _threading
+import time
+
+# Object, tag, material and shader type ids (values match the C4D SDK)
+_TYPE_NAMES = {
+    5100: "Polygon", 5101: "Spline", 5102: "Light", 5103: "Camera",
+    5106: "Environment", 5126: "Instance", 5140: "Null", 5159: "Cube",
+    5160: "Sphere", 5162: "Cone", 5163: "Torus", 5165: "Tube",
+    5168: "Plane", 5170: "Cylinder", 5171: "Capsule", 1018544: "Cloner",
+    5612: "Phong", 5616: "Texture", 5671: "UVW", 5676: "Target",
+    5703: "Material", 5833: "Bitmap", 1011116: "Noise",
+}
+
+Opolygon = 5100
+Ospline = 5101
+Olight = 5102
+Ocamera = 5103
+Oenvironment = 5106
+Oinstance = 5126
+Onull = 5140
+Ocube = 5159
+Osphere = 5160
+Ocone = 5162
+Otorus = 5163
+Otube = 5165
+Oplane = 5168
+Ocylinder = 5170
+Ocapsule = 5171
+Omgcloner = 1018544
+Tphong = 5612
+Ttexture = 5616
+Tuvw = 5671
+Ttargetexpression = 5676
+Mmaterial = 5703
+Xbitmap = 5833
+Xnoise = 1011116
+Tposemorph = 1024237
+CTRACK_TYPE = 5350
+RDATA_TYPE = 110304
+DOCUMENT_TYPE = 110059
+TEXTURETAG_MATERIAL = 1010
+INSTANCEOBJECT_LINK = 1001
+
+DIRTYFLAGS_NONE = 0
+DIRTYFLAGS_MATRIX = 1 << 1
+DIRTYFLAGS_DATA = 1 << 2
+DIRTYFLAGS_CHILDREN = 1 << 5
+DIRTYFLAGS_ALL = -1
+
+BIT_ACTIVE = 1 << 1
+
+MSG_UPDATE = 14
+EVMSG_CHANGE = 604
+ID_USERDATA = 700
+DTYPE_BOOL = 400006001
+DTYPE_REAL = 19
+DLG_TYPE_ASYNC = 2
+BFH_SCALEFIT = 1 << 3
+
+_constant_ids = itertools.count(2000000000)
+_constant_lock = _threading.Lock()
+
+
+_CONSTANT_NAME = re.compile(r"[A-Z][A-Z0-9_]*[a-z0-9]*$")
+
+
+def __getattr__(name):
+    """Give any other C4D constant a stable unique id on first use"""
+    # Only constant-style names (BIT_ACTIVE, Tcollider): submodule imports and
+    # feature checks such as hasattr(c4d, "InstanceObject") must still fail
+    if not _CONSTANT_NAME.match(name):
+        raise AttributeError(name)
+    with _constant_lock:
+        value = globals().get(name)
+        if value is None:
+            value = next(_constant_ids)
+            globals()[name] = value
+    return value
+
+
+def _type_name(type_id):
+    if type_id in _TYPE_NAMES:
+        return _TYPE_NAMES[type_id]
+    for name, value in list(globals().items()):
+        if value == type_id and name[:1] in "OTMXV" and name[1:2].isalpha():
+            return name[1:]
+    return str(type_id)
+
+
+class Vector:
+    """3D vector"""
+
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x=0.0, y=None, z=None):
+        if y is None and z is None:
+            y = z = x
+        self.x, self.y, self.z = float(x), float(y), float(z)
+
+    def __add__(self, other):
+        return Vector(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __mul__(self, other):
+        if isinstance(other, Vector):
+            return self.x * other.x + self.y * other.y + self.z * other.z
+        return Vector(self.x * other, self.y * other, self.z * other)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Vector(-self.x, -self.y, -self.z)
+
+    def __eq__(self, other):
+        return isinstance(other, Vector) and (self.x, self.y, self.z) == (other.x, other.y, other.z)
+
+    def __hash__(self):
+        return hash((self.x, self.y, self.z))
+
+    def GetLength(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def GetNormalized(self):
+        length = self.GetLength()
+        return Vector(self.x / length, self.y / length, self.z / length) if length else Vector()
+
+    def __repr__(self):
+        return f"Vector({self.x}, {self.y}, {self.z})"
+
+
+class Matrix:
+    """Affine transform as offset plus three axis vectors"""
+
+    def __init__(self, off=None, v1=None, v2=None, v3=None):
+        self.off = off or Vector(0, 0, 0)
+        self.v1 = v1 or Vector(1, 0, 0)
+        self.v2 = v2 or Vector(0, 1, 0)
+        self.v3 = v3 or Vector(0, 0, 1)
+
+    def __repr__(self):
+        return f"Matrix({self.off}, {self.v1}, {self.v2}, {self.v3})"
+
+
+class BaseTime:
+    def __init__(self, value=0.0, fps=None):
+        self.value = value / fps if fps else float(value)
+
+    def Get(self):
+        return self.value
+
+
+class BaseContainer(dict):
+    """Parameter container (plain dict with the C4D accessor names)"""
+
+    def GetString(self, id, default=""):
+        return self.get(id, default)
+
+    def SetString(self, id, value):
+        self[id] = value
+
+    def GetInt32(self, id, default=0):
+        return self.get(id, default)
+
+    def SetInt32(self, id, value):
+        self[id] = value
+
+    def GetFloat(self, id, default=0.0):
+        return self.get(id, default)
+
+    def SetFloat(self, id, value):
+        self[id] = value
+
+    def GetBool(self, id, default=False):
+        return self.get(id, default)
+
+    def SetBool(self, id, value):
+        self[id] = value
+
+    def GetContainer(self, id):
+        return self.get(id, BaseContainer())
+
+    def SetContainer(self, id, value):
+        self[id] = value
+
+
+def GetCustomDatatypeDefault(type_id):
+    bc = BaseContainer()
+    bc['dtype'] = type_id
+    return bc
+
+
+_guids = itertools.count(1)
+
+
+class BaseList2D:
+    """Named, typed node with a parameter container and dirty counters"""
+
+    def __init__(self, type_id=0):
+        self._type = type_id
+        self._name = _type_name(type_id)
+        self._data = BaseContainer()
+        self._dirty_data = 0
+        self._dirty_matrix = 0
+        self._bits = 0
+        self._guid = next(_guids)
+        self._shaders = []
+        self._tracks = []
+
+    def GetType(self):
+        return self._type
+
+    def GetTypeName(self):
+        return _type_name(self._type)
+
+    def GetName(self):
+        return self._name
+
+    def SetName(self, name):
+        self._name = str(name)
+        self._dirty_data += 1
+
+    def GetGUID(self):
+        return self._guid
+
+    def GetDirty(self, flags):
+        dirty = 0
+        if flags & DIRTYFLAGS_DATA:
+            dirty += self._dirty_data
+        if flags & DIRTYFLAGS_MATRIX:
+            dirty += self._dirty_matrix
+        return dirty
+
+    def SetDirty(self, flags):
+        if flags & DIRTYFLAGS_MATRIX:
+            self._dirty_matrix += 1
+        else:
+            self._dirty_data += 1
+
+    def GetDataInstance(self):
+        return self._data
+
+    def GetData(self):
+        return BaseContainer(self._data)
+
+    def __getitem__(self, key):
+        return self._data.get(key)
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        self._dirty_data += 1
+
+    def GetParameter(self, key, flags=0):
+        return self._data.get(key)
+
+    def SetParameter(self, key, value, flags=0):
+        self[key] = value
+        return True
+
+    def GetBit(self, bit):
+        return bool(self._bits & bit)
+
+    def SetBit(self, bit):
+        self._bits |= bit
+
+    def DelBit(self, bit):
+        self._bits &= ~bit
+
+    def IsAlive(self):
+        return True
+
+    def Message(self, msg_type, data=None):
+        if msg_type == MSG_UPDATE:
+            self._dirty_data += 1
+        return True
+
+    def InsertShader(self, shader, pred=None):
+        self._shaders.append(shader)
+
+    def GetFirstShader(self):
+        return self._shaders[0] if self._shaders else None
+
+    def MakeTrack(self, *description_id):
+        """Not part of the real API, but used by scripts/organic_growth_system.py"""
+        return CTrack(self, description_id)
+
+    def InsertTrackSorted(self, track):
+        self._tracks.append(track)
+
+    def GetCTracks(self):
+        return list(self._tracks)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} '{self._name}' ({self.GetTypeName()})>"
+
+
+class GeListNode(BaseList2D):
+    """BaseList2D that lives in a doubly linked hierarchy"""
+
+    def __init__(self, type_id=0):
+        super().__init__(type_id)
+        self._up = None
+        self._down = None
+        self._next = None
+        self._prev = None
+        self._doc = None
+
+    def GetNext(self):
+        return self._next
+
+    def GetPred(self):
+        return self._prev
+
+    def GetUp(self):
+        return self._up
+
+    def GetDown(self):
+        return self._down
+
+    def GetDownLast(self):
+        child = self._down
+        while child and child._next:
+            child = child._next
+        return child
+
+    def GetChildren(self):
+        children = []
+        child = self._down
+        while child:
+            children.append(child)
+            child = child._next
+        return children
+
+    def GetDocument(self):
+        return self._doc
+
+    def _set_doc(self, doc):
+        self._doc = doc
+        child = self._down
+        while child:
+            child._set_doc(doc)
+            child = child._next
+
+    def Remove(self):
+        doc = self._doc
+        if self._prev:
+            self._prev._next = self._next
+        elif self._up:
+            self._up._down = self._next
+        elif doc is not None and doc._first_object is self:
+            doc._first_object = self._next
+        if self._next:
+            self._next._prev = self._prev
+        if doc is not None:
+            doc._objects_changed()
+        self._up = self._next = self._prev = None
+        self._set_doc(None)
+
+    def _link_after(self, pred):
+        self._prev = pred
+        self._next = pred._next
+        self._up = pred._up
+        if pred._next:
+            pred._next._prev = self
+        pred._next = self
+        self._set_doc(pred._doc)
+
+    def InsertUnder(self, parent):
+        self.Remove()
+        self._up = parent
+        self._next = parent._down
+        if parent._down:
+            parent._down._prev = self
+        parent._down = self
+        self._set_doc(parent._doc)
+        if self._doc is not None:
+            self._doc._objects_changed()
+
+    def InsertUnderLast(self, parent):
+        last = parent.GetDownLast()
+        if last is None:
+            return self.InsertUnder(parent)
+        self.Remove()
+        self._link_after(last)
+        if self._doc is not None:
+            self._doc._objects_changed()
+
+    def InsertAfter(self, pred):
+        self.Remove()
+        self._link_after(pred)
+        if self._doc is not None:
+            self._doc._objects_changed()
+
+    def InsertBefore(self, succ):
+        self.Remove()
+        if succ._prev:
+            self._link_after(succ._prev)
+        else:
+            self._up = succ._up
+            self._next = succ
+            succ._prev = self
+            if succ._up:
+                succ._up._down = self
+            elif succ._doc is not None:
+                succ._doc._first_object = self
+            self._set_doc(succ._doc)
+        if self._doc is not None:
+            self._doc._objects_changed()
+
+
+class BaseTag(BaseList2D):
+    def __init__(self, type_id=0):
+        super().__init__(type_id)
+        self._object = None
+
+    def GetObject(self):
+        return self._object
+
+    def Remove(self):
+        if self._object is not None:
+            self._object._tags.remove(self)
+            self._object = None
+
+
+class TextureTag(BaseTag):
+    def __init__(self):
+        super().__init__(Ttexture)
+
+    def SetMaterial(self, material):
+        self[TEXTURETAG_MATERIAL] = material
+
+    def GetMaterial(self):
+        return self[TEXTURETAG_MATERIAL]
+
+
+class UVWTag(BaseTag):
+    def __init__(self, count):
+        super().__init__(Tuvw)
+        self._uvs = [None] * count
+
+    def GetDataCount(self):
+        return len(self._uvs)
+
+    def SetSlow(self, index, a, b, c, d):
+        self._uvs[index] = (a, b, c, d)
+
+    def GetSlow(self, index):
+        a, b, c, d = self._uvs[index]
+        return {"a": a, "b": b, "c": c, "d": d}
+
+
+class PoseMorphTag(BaseTag):
+    def __init__(self, type_id):
+        super().__init__(type_id)
+        self._morphs = []
+
+    def ExitEditMode(self):
+        return True
+
+    def AddMorph(self):
+        morph = BaseList2D()
+        self._morphs.append(morph)
+        return morph
+
+    def GetMorph(self, index):
+        return self._morphs[index]
+
+    def GetMorphCount(self):
+        return len(self._morphs)
+
+
+def _make_tag(type_id):
+    if type_id == Ttexture:
+        return TextureTag()
+    if type_id == Tuvw:
+        return UVWTag(0)
+    if type_id == Tposemorph:
+        return PoseMorphTag(type_id)
+    return BaseTag(type_id)
+
+
+class BaseObject(GeListNode):
+    """Scene object with transform, tags and user data"""
+
+    def __init__(self, type_id=Onull):
+        super().__init__(type_id)
+        self._pos = Vector(0, 0, 0)
+        self._rot = Vector(0, 0, 0)
+        self._scale = Vector(1, 1, 1)
+        self._tags = []
+        self._user_data = []
+
+    def _matrix_changed(self):
+        self._dirty_matrix += 1
+
+    def GetAbsPos(self):
+        return Vector(self._pos.x, self._pos.y, self._pos.z)
+
+    def SetAbsPos(self, v):
+        self._pos = Vector(v.x, v.y, v.z)
+        self._matrix_changed()
+
+    def GetAbsRot(self):
+        return Vector(self._rot.x, self._rot.y, self._rot.z)
+
+    def SetAbsRot(self, v):
+        self._rot = Vector(v.x, v.y, v.z)
+        self._matrix_changed()
+
+    def GetAbsScale(self):
+        return Vector(self._scale.x, self._scale.y, self._scale.z)
+
+    def SetAbsScale(self, v):
+        self._scale = Vector(v.x, v.y, v.z)
+        self._matrix_changed()
+
+    GetRelPos = GetAbsPos
+    SetRelPos = SetAbsPos
+    GetRelRot = GetAbsRot
+    SetRelRot = SetAbsRot
+    GetRelScale = GetAbsScale
+    SetRelScale = SetAbsScale
+
+    def GetMg(self):
+        return Matrix(self.GetAbsPos())
+
+    def SetMg(self, m):
+        self.SetAbsPos(m.off)
+
+    GetMl = GetMg
+    SetMl = SetMg
+
+    def GetRad(self):
+        return Vector(100, 100, 100)
+
+    def GetMp(self):
+        return Vector(0, 0, 0)
+
+    def GetTags(self):
+        return list(self._tags)
+
+    def GetTag(self, type_id, nr=0):
+        matches = [tag for tag in self._tags if tag._type == type_id]
+        return matches[nr] if nr < len(matches) else None
+
+    def GetFirstTag(self):
+        return self._tags[0] if self._tags else None
+
+    def MakeTag(self, type_id, pred=None):
+        tag = _make_tag(type_id)
+        self.InsertTag(tag, pred)
+        return tag
+
+    def InsertTag(self, tag, pred=None):
+        if tag._object is not None:
+            tag.Remove()
+        tag._object = self
+        index = self._tags.index(pred) + 1 if pred in self._tags else 0
+        self._tags.insert(index, tag)
+        self._dirty_data += 1
+
+    def KillTag(self, type_id, nr=0):
+        tag = self.GetTag(type_id, nr)
+        if tag:
+            tag.Remove()
+
+    def AddUserData(self, bc):
+        self._user_data.append(bc)
+        return (ID_USERDATA, len(self._user_data))
+
+    def GetUserDataContainer(self):
+        return [((ID_USERDATA, i + 1), bc) for i, bc in enumerate(self._user_data)]
+
+    def GetClone(self, flags=0):
+        clone = copy.copy(self)
+        clone._guid = next(_guids)
+        clone._data = BaseContainer(self._data)
+        clone._tags = []
+        clone._user_data = list(self._user_data)
+        clone._up = clone._down = clone._next = clone._prev = None
+        clone._doc = None
+        self._clone_payload(clone)
+        for tag in reversed(self._tags):
+            tag_clone = copy.copy(tag)
+            tag_clone._guid = next(_guids)
+            tag_clone._data = BaseContainer(tag._data)
+            tag_clone._object = None
+            clone.InsertTag(tag_clone)
+        for child in reversed(self.GetChildren()):
+            child.GetClone(flags).InsertUnder(clone)
+        return clone
+
+    def _clone_payload(self, clone):
+        pass
+
+
+class PointObject(BaseObject):
+    def __init__(self, type_id, point_count):
+        super().__init__(type_id)
+        self._points = [Vector(0, 0, 0)] * point_count
+
+    def GetPointCount(self):
+        return len(self._points)
+
+    def GetAllPoints(self):
+        return list(self._points)
+
+    def SetAllPoints(self, points):
+        self._points = list(points)
+
+    def GetPoint(self, index):
+        return self._points[index]
+
+    def SetPoint(self, index, v):
+        self._points[index] = v
+
+    def ResizeObject(self, point_count, polygon_count=None):
+        self._points = (self._points + [Vector(0, 0, 0)] * point_count)[:point_count]
+        return True
+
+    def _clone_payload(self, clone):
+        clone._points = list(self._points)
+
+
+class CPolygon:
+    __slots__ = ('a', 'b', 'c', 'd')
+
+    def __init__(self, a, b, c, d=None):
+        self.a, self.b, self.c = a, b, c
+        self.d = c if d is None else d
+
+    def IsTriangle(self):
+        return self.c == self.d
+
+
+class PolygonObject(PointObject):
+    def __init__(self, point_count=0, polygon_count=0):
+        super().__init__(Opolygon, point_count)
+        self._polygons = [None] * polygon_count
+
+    def GetPolygonCount(self):
+        return len(self._polygons)
+
+    def GetAllPolygons(self):
+        return list(self._polygons)
+
+    def GetPolygon(self, index):
+        return self._polygons[index]
+
+    def SetPolygon(self, index, polygon):
+        self._polygons[index] = polygon
+
+    def ResizeObject(self, point_count, polygon_count=None):
+        super().ResizeObject(point_count)
+        if polygon_count is not None:
+            self._polygons = (self._polygons + [None] * polygon_count)[:polygon_count]
+        return True
+
+    def _clone_payload(self, clone):
+        super()._clone_payload(clone)
+        clone._polygons = list(self._polygons)
+
+
+class InstanceObject(BaseObject):
+    """Instance object, with the multi-instance matrices of R23+"""
+
+    def __init__(self):
+        super().__init__(Oinstance)
+        self._matrices = []
+
+    def GetReferenceObject(self, doc=None):
+        return self._data.get(INSTANCEOBJECT_LINK)
+
+    def SetReferenceObject(self, obj):
+        self._data[INSTANCEOBJECT_LINK] = obj
+        self._dirty_data += 1
+
+    def GetInstanceCount(self):
+        return len(self._matrices)
+
+    def GetInstanceMatrices(self):
+        return list(self._matrices)
+
+    def SetInstanceMatrices(self, matrices):
+        self._matrices = list(matrices)
+        self._dirty_data += 1
+        return True
+
+    def _clone_payload(self, clone):
+        super()._clone_payload(clone)
+        clone._matrices = list(self._matrices)
+
+
+class BaseMaterial(BaseList2D):
+    def __init__(self, type_id=Mmaterial):
+        super().__init__(type_id)
+        self._doc = None
+
+    def GetDocument(self):
+        return self._doc
+
+    def Remove(self):
+        if self._doc is not None:
+            self._doc._materials.remove(self)
+            self._doc = None
+
+    def GetClone(self, flags=0):
+        clone = copy.copy(self)
+        clone._guid = next(_guids)
+        clone._data = BaseContainer(self._data)
+        clone._doc = None
+        return clone
+
+    def Update(self, preview, rttm):
+        return True
+
+
+Material = BaseMaterial
+
+
+class BaseShader(BaseList2D):
+    pass
+
+
+class BaseVideoPost(BaseList2D):
+    pass
+
+
+class RenderData(BaseList2D):
+    def __init__(self):
+        super().__init__(RDATA_TYPE)
+        self._video_posts = []
+
+    def GetFirstVideoPost(self):
+        return self._video_posts[0] if self._video_posts else None
+
+    def InsertVideoPost(self, video_post, pred=None):
+        self._video_posts.append(video_post)
+        video_post.GetNext = lambda vp=video_post: self._next_video_post(vp)
+
+    def _next_video_post(self, video_post):
+        index = self._video_posts.index(video_post) + 1
+        return self._video_posts[index] if index < len(self._video_posts) else None
+
+
+class InExcludeData:
+    def __init__(self):
+        self._objects = []
+
+    def InsertObject(self, obj, flags):
+        self._objects.append((obj, flags))
+        return True
+
+    def GetObjectCount(self):
+        return len(self._objects)
+
+
+class DescLevel:
+    def __init__(self, id, dtype=0, creator=0):
+        self.id = id
+        self.dtype = dtype
+        self.creator = creator
+
+
+class DescID:
+    def __init__(self, *levels):
+        self._levels = levels
+
+    def __getitem__(self, index):
+        return self._levels[index]
+
+    def GetDepth(self):
+        return len(self._levels)
+
+
+class CKey:
+    def __init__(self, time=None):
+        self.time = time
+        self.value = 0.0
+        self.interpolation = None
+
+    def SetValue(self, curve, value):
+        self.value = value
+
+    def GetValue(self):
+        return self.value
+
+    def SetTime(self, curve, time):
+        self.time = time
+
+    def GetTime(self):
+        return self.time
+
+    def SetInterpolation(self, curve, interpolation):
+        self.interpolation = interpolation
+
+
+class CCurve:
+    def __init__(self):
+        self._keys = []
+
+    def AddKey(self, time):
+        key = CKey(time)
+        self._keys.append(key)
+        return key
+
+    def InsertKey(self, key, bUndo=True):
+        self._keys.append(key)
+        return True
+
+    def GetKey(self, index):
+        return self._keys[index]
+
+    def GetKeyCount(self):
+        return len(self._keys)
+
+
+class CTrack(BaseList2D):
+    def __init__(self, owner, description_id):
+        super().__init__(CTRACK_TYPE)
+        self._owner = owner
+        self._description_id = description_id
+        self._curve = CCurve()
+
+    def GetCurve(self):
+        return self._curve
+
+
+# ---------------------------------------------------------------------------
+# Main thread and event loop
+# ---------------------------------------------------------------------------
+
+class MainLoop:
+    """The stand-in for Cinema4D's main (GUI) thread.
+
+    Delivers SpecialEventAdd/EventAdd core messages and dialog timers to open
+    async dialogs, and runs callables posted with call(). Only one loop
+    exists; harness.FakeCinema4D starts and stops it.
+    """
+
+    def __init__(self):
+        self._events = queue.Queue()
+        self._dialogs = []
+        self._thread = None
+        self._running = False
+        self.event_add_count = 0
+        self.core_messages = 0
+
+    @property
+    def thread(self):
+        return self._thread
+
+    def is_main_thread(self):
+        if self._thread is None:
+            return _threading.current_thread() is _threading.main_thread()
+        return _threading.current_thread() is self._thread
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = _threading.Thread(target=self._run, name="C4D-MainThread", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._events.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self._thread = None
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn on the main thread and return its result"""
+        if self._thread is None or self.is_main_thread():
+            return fn(*args, **kwargs)
+        done = _threading.Event()
+        box = {}
+
+        def runner():
+            try:
+                box['result'] = fn(*args, **kwargs)
+            except BaseException as e:
+                box['error'] = e
+            finally:
+                done.set()
+
+        self._events.put(('call', runner))
+        done.wait()
+        if 'error' in box:
+            raise box['error']
+        return box.get('result')
+
+    def post_core_message(self, message_id):
+        self._events.put(('core', message_id))
+
+    def register_dialog(self, dialog):
+        if dialog not in self._dialogs:
+            self._dialogs.append(dialog)
+
+    def unregister_dialog(self, dialog):
+        if dialog in self._dialogs:
+            self._dialogs.remove(dialog)
+
+    def _next_timeout(self):
+        now = time.perf_counter()
+        deadlines = [d._timer_due for d in self._dialogs if d._timer_interval]
+        if not deadlines:
+            return 0.1
+        return max(0.0, min(deadlines) - now)
+
+    def _fire_timers(self):
+        now = time.perf_counter()
+        for dialog in list(self._dialogs):
+            if dialog._timer_interval and now >= dialog._timer_due:
+                dialog._timer_due = now + dialog._timer_interval
+                dialog.Timer(BaseContainer())
+
+    def _run(self):
+        while self._running:
+            try:
+                event = self._events.get(timeout=self._next_timeout())
+            except queue.Empty:
+                event = None
+            if event is not None:
+                kind, payload = event
+                if kind == 'call':
+                    payload()
+                else:
+                    self.core_messages += 1
+                    for dialog in list(self._dialogs):
+                        dialog.CoreMessage(payload, BaseContainer())
+            self._fire_timers()
+
+
+_main_loop = MainLoop()
+
+
+def get_main_loop():
+    return _main_loop
+
+
+def EventAdd(flags=0):
+    _main_loop.event_add_count += 1
+    _main_loop.post_core_message(EVMSG_CHANGE)
+
+
+def SpecialEventAdd(message_id, p1=0, p2=0):
+    _main_loop.post_core_message(message_id)
+
+
+def GetC4DVersion():
+    return 2024000
+
+
+# Submodules are imported last, they use the classes defined above
+from c4d import documents, gui, threading  # noqa: E402
@@ -0,0 +1,199 @@
+"""
+Fake c4d.documents: documents, the active document and file IO
+"""
+
+import threading
+
+import c4d
+
+_lock = threading.Lock()
+
+
+class BaseDocument(c4d.BaseList2D):
+    """Document holding the object hierarchy, materials and render settings"""
+
+    def __init__(self, name="Untitled 1"):
+        super().__init__(c4d.DOCUMENT_TYPE)
+        self._name = name
+        self._path = ""
+        self._first_object = None
+        self._materials = []
+        self._render_data = c4d.RenderData()
+        self._active_object = None
+        self._changes = 0
+
+    def _objects_changed(self):
+        self._changes += 1
+
+    def GetDocumentName(self):
+        return self._name
+
+    def SetDocumentName(self, name):
+        self._name = name
+
+    def GetDocumentPath(self):
+        return self._path
+
+    def SetDocumentPath(self, path):
+        self._path = path
+
+    def GetFirstObject(self):
+        return self._first_object
+
+    def GetObjects(self):
+        objects = []
+        obj = self._first_object
+        while obj:
+            objects.append(obj)
+            obj = obj.GetNext()
+        return objects
+
+    def GetLastObject(self):
+        obj = self._first_object
+        while obj and obj.GetNext():
+            obj = obj.GetNext()
+        return obj
+
+    def InsertObject(self, obj, parent=None, pred=None, checknames=False):
+        if parent is not None:
+            if pred is not None:
+                obj.InsertAfter(pred)
+            else:
+                obj.InsertUnder(parent)
+            return
+        if pred is not None:
+            obj.InsertAfter(pred)
+            return
+        obj.Remove()
+        obj._next = self._first_object
+        if self._first_object:
+            self._first_object._prev = obj
+        self._first_object = obj
+        obj._set_doc(self)
+        self._objects_changed()
+
+    def SearchObject(self, name):
+        """Depth-first search by name, like Cinema4D this walks the whole tree"""
+        stack = [self._first_object] if self._first_object else []
+        while stack:
+            obj = stack.pop()
+            if obj.GetName() == name:
+                return obj
+            if obj._next:
+                stack.append(obj._next)
+            if obj._down:
+                stack.append(obj._down)
+        return None
+
+    def GetActiveObject(self):
+        return self._active_object
+
+    def SetActiveObject(self, obj, mode=0):
+        self._active_object = obj
+
+    def GetActiveObjects(self, flags=0):
+        return [self._active_object] if self._active_object else []
+
+    def GetFirstMaterial(self):
+        return self._materials[0] if self._materials else None
+
+    def GetMaterials(self):
+        return list(self._materials)
+
+    def InsertMaterial(self, material, pred=None, checknames=False):
+        material.Remove()
+        material._doc = self
+        index = self._materials.index(pred) + 1 if pred in self._materials else 0
+        self._materials.insert(index, material)
+
+    def SearchMaterial(self, name):
+        for material in self._materials:
+            if material.GetName() == name:
+                return material
+        return None
+
+    def GetActiveRenderData(self):
+        return self._render_data
+
+    def GetTime(self):
+        return c4d.BaseTime(0)
+
+    def GetFps(self):
+        return 30
+
+    def StartUndo(self):
+        return True
+
+    def EndUndo(self):
+        return True
+
+    def AddUndo(self, undo_type, data):
+        return True
+
+    def Flush(self):
+        self._first_object = None
+        self._materials = []
+        self._objects_changed()
+
+
+_documents = [BaseDocument()]
+_active = _documents[0]
+
+
+def GetActiveDocument():
+    return _active
+
+
+def SetActiveDocument(doc):
+    global _active
+    with _lock:
+        if doc not in _documents:
+            _documents.append(doc)
+        _active = doc
+
+
+def InsertBaseDocument(doc):
+    with _lock:
+        if doc not in _documents:
+            _documents.append(doc)
+
+
+def KillDocument(doc):
+    global _active
+    with _lock:
+        if doc in _documents:
+            _documents.remove(doc)
+        if not _documents:
+            _documents.append(BaseDocument())
+        if _active is doc:
+            _active = _documents[0]
+
+
+def GetFirstDocument():
+    return _documents[0]
+
+
+def reset():
+    """Replace every open document with a single empty one"""
+    global _documents, _active
+    with _lock:
+        _documents = [BaseDocument()]
+        _active = _documents[0]
+    return _active
+
+
+def LoadFile(path):
+    """Importing files is not modelled, a named empty null stands in for the result"""
+    obj = c4d.BaseObject(c4d.Onull)
+    obj.SetName(str(path).replace("\\", "/").rsplit("/", 1)[-1].rsplit(".", 1)[0])
+    _active.InsertObject(obj)
+    return True
+
+
+def MergeDocument(doc, path, flags=0, thread=None):
+    return LoadFile(path)
+
+
+def SaveDocument(doc, path, flags=0, format=0):
+    doc.SetDocumentPath(str(path))
+    return True
@@ -0,0 +1,81 @@
+"""
+Fake c4d.gui: async dialogs driven by the fake main loop
+"""
+
+import time
+
+import c4d
+
+
+def MessageDialog(text, type=0):
+    print(f"[MessageDialog] {text}")
+    return True
+
+
+def QuestionDialog(text):
+    print(f"[QuestionDialog] {text}")
+    return True
+
+
+class GeDialog:
+    """Async dialog; Timer and CoreMessage are called on the main loop thread"""
+
+    def __init__(self):
+        self._open = False
+        self._title = ""
+        self._widgets = {}
+        self._timer_interval = 0.0
+        self._timer_due = 0.0
+
+    def CreateLayout(self):
+        return True
+
+    def InitValues(self):
+        return True
+
+    def Open(self, dlgtype, pluginid=0, xpos=-1, ypos=-1, defaultw=0, defaulth=0, subid=0):
+        if self._open:
+            return True
+        if not self.CreateLayout():
+            return False
+        self._open = True
+        c4d.get_main_loop().register_dialog(self)
+        return self.InitValues()
+
+    def Close(self):
+        if not self._open:
+            return True
+        self._open = False
+        self.SetTimer(0)
+        c4d.get_main_loop().unregister_dialog(self)
+        self.DestroyWindow()
+        return True
+
+    def IsOpen(self):
+        return self._open
+
+    def SetTitle(self, title):
+        self._title = title
+
+    def AddStaticText(self, id, flags, initw=0, inith=0, name="", borderstyle=0):
+        self._widgets[id] = name
+        return True
+
+    def SetString(self, id, value):
+        self._widgets[id] = value
+
+    def SetTimer(self, value):
+        self._timer_interval = value / 1000.0
+        self._timer_due = time.perf_counter() + self._timer_interval
+
+    def Timer(self, msg):
+        pass
+
+    def CoreMessage(self, id, msg):
+        return True
+
+    def Command(self, id, msg):
+        return True
+
+    def DestroyWindow(self):
+        pass
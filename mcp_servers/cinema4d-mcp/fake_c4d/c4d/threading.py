@@ -0,0 +1,13 @@
+"""
+Fake c4d.threading
+"""
+
+import c4d
+
+
+def GeIsMainThread():
+    return c4d.get_main_loop().is_main_thread()
+
+
+def GeIsMainThreadAndNoDrawThread():
+    return GeIsMainThread()
@@ -0,0 +1,77 @@
+"""
+Run c4d_plugin.py against the fake c4d package
+Loads the real plugin file on a fake main thread and serves it on a local
+port, so the server, tools and benchmarks can talk to it without Cinema4D:
+
+    with FakeCinema4D(port=54400) as c4d_app:
+        ...connect to ('localhost', c4d_app.port)...
+"""
+
+import importlib.util
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+
+FAKE_C4D_DIR = Path(__file__).resolve().parent
+PLUGIN_PATH = FAKE_C4D_DIR.parent / "c4d_plugin.py"
+
+if str(FAKE_C4D_DIR) not in sys.path:
+    sys.path.insert(0, str(FAKE_C4D_DIR))
+
+import c4d  # noqa: E402
+from c4d import documents  # noqa: E402
+
+
+class FakeCinema4D:
+    """A fake Cinema4D process hosting the socket plugin"""
+
+    def __init__(self, port: int = 54400, plugin_path: Path = PLUGIN_PATH):
+        self.port = port
+        self.plugin_path = Path(plugin_path)
+        self.main_loop = c4d.get_main_loop()
+        self.plugin = None
+
+    def start(self, timeout: float = 5.0):
+        """Start the main loop, load the plugin and wait until it accepts connections"""
+        self.main_loop.start()
+        os.environ['C4D_MCP_PORT'] = str(self.port)
+        spec = importlib.util.spec_from_file_location("c4d_plugin", self.plugin_path)
+        self.plugin = importlib.util.module_from_spec(spec)
+        # Script Manager scripts execute on the main thread
+        self.main_loop.call(spec.loader.exec_module, self.plugin)
+        if not self.plugin.g_connected:
+            self.main_loop.call(self.plugin.start_server)
+        self._wait_for_port(timeout)
+        return self
+
+    def stop(self):
+        if self.plugin is not None:
+            self.main_loop.call(self.plugin.stop_server)
+            self.plugin = None
+        self.main_loop.stop()
+
+    def reset_scene(self):
+        """Start over with an empty active document"""
+        return self.main_loop.call(documents.reset)
+
+    @property
+    def document(self):
+        return documents.GetActiveDocument()
+
+    def _wait_for_port(self, timeout):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            try:
+                with socket.create_connection(("localhost", self.port), timeout=0.2):
+                    return
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError(f"Fake Cinema4D did not start listening on port {self.port}")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
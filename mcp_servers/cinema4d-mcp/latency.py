@@ -0,0 +1,94 @@
+"""
+Latency histograms for the Cinema4D MCP server
+HDR-style log-linear buckets: constant relative error (about 1% with the
+default precision) from microseconds to minutes, in a few hundred counters.
+"""
+
+import math
+from typing import Dict, List
+
+# Sub-buckets per power of two, 2**7 = 128 keeps the relative error below 1%
+PRECISION_BITS = 7
+
+
+class LatencyHistogram:
+    """Records durations in microseconds and answers percentile queries"""
+
+    def __init__(self, precision_bits: int = PRECISION_BITS):
+        self.sub_buckets = 1 << precision_bits
+        self.half = self.sub_buckets // 2
+        self.precision_bits = precision_bits
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    def _index(self, value: int) -> int:
+        if value < self.sub_buckets:
+            return value
+        shift = value.bit_length() - self.precision_bits
+        return self.sub_buckets + (shift - 1) * self.half + ((value >> shift) - self.half)
+
+    def _value(self, index: int) -> float:
+        """Midpoint of a bucket"""
+        if index < self.sub_buckets:
+            return float(index)
+        offset = index - self.sub_buckets
+        shift = offset // self.half + 1
+        mantissa = offset % self.half + self.half
+        return float((mantissa << shift) + (1 << (shift - 1)))
+
+    def record(self, seconds: float):
+        """Record one duration given in seconds"""
+        value = max(0, int(seconds * 1_000_000))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total_us += value
+        self.min_us = value if self.min_us is None else min(self.min_us, value)
+        self.max_us = max(self.max_us, value)
+
+    def percentiles(self, *quantiles: float) -> List[float]:
+        """Values in milliseconds at the given quantiles (0-100)"""
+        if not self.count:
+            return [0.0 for _ in quantiles]
+        targets = [max(1, math.ceil(q / 100.0 * self.count)) for q in quantiles]
+        results = [None] * len(quantiles)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            for i, target in enumerate(targets):
+                if results[i] is None and seen >= target:
+                    results[i] = min(self._value(index), self.max_us) / 1000.0
+            if all(r is not None for r in results):
+                break
+        return results
+
+    def summary(self) -> Dict[str, float]:
+        p50, p95, p99 = self.percentiles(50, 95, 99)
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_us / self.count / 1000.0, 3) if self.count else 0.0,
+            "min_ms": round((self.min_us or 0) / 1000.0, 3),
+            "p50_ms": round(p50, 3),
+            "p95_ms": round(p95, 3),
+            "p99_ms": round(p99, 3),
+            "max_ms": round(self.max_us / 1000.0, 3)
+        }
+
+
+class LatencyRecorder:
+    """One histogram per name (tool, command, ...)"""
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+    def record(self, name: str, seconds: float):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
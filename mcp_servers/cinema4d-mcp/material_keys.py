@@ -0,0 +1,53 @@
+"""
+Content keys for Cinema4D materials
+A material is identified by its parameters plus the contents of its texture
+files, so identical create_material requests map to the same key no matter
+what the material is called or where the texture was written.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Sequence, Tuple
+
+# Parameter values are rounded so float noise does not defeat deduplication
+PRECISION = 6
+
+_digests: Dict[str, Tuple[int, int, str]] = {}  # path -> (size, mtime_ns, sha1)
+
+
+def file_digest(path: str) -> str:
+    """SHA-1 of a file's contents, cached until its size or mtime changes.
+
+    Files the server cannot read (e.g. a path on the Cinema4D workstation)
+    are keyed by their normalized path instead.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return "path:" + os.path.normcase(os.path.normpath(path))
+
+    cached = _digests.get(path)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    _digests[path] = (stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+    return _digests[path][2]
+
+
+def material_key(color: Sequence[float], roughness: float, metallic: float,
+                 texture_path: Optional[str] = None) -> str:
+    """Key shared by every create_material request that yields the same material"""
+    params = {
+        "type": "standard",
+        "color": [round(float(c), PRECISION) for c in color],
+        "roughness": round(float(roughness), PRECISION),
+        "metallic": round(float(metallic), PRECISION),
+        "textures": {"color": file_digest(texture_path)} if texture_path else {}
+    }
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
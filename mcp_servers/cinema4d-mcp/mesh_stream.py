@@ -0,0 +1,81 @@
+"""
+Binary mesh streaming for the Cinema4D MCP server
+Packs vertex, polygon and UV buffers as little-endian arrays so the plugin can
+build PolygonObjects directly instead of going through temp files and LoadFile
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+# Payload size of a single mesh_chunk message
+CHUNK_BYTES = 4 * 1024 * 1024
+
+# Wire formats, one row per element
+POINT_DTYPE = np.dtype('<f4')     # x, y, z
+POLYGON_DTYPE = np.dtype('<u4')   # a, b, c (triangles)
+UV_DTYPE = np.dtype('<f4')        # u, v for each polygon corner
+
+
+@dataclass
+class MeshBuffers:
+    """Triangle mesh in Cinema4D's coordinate system, ready to stream"""
+    points: np.ndarray               # (n, 3) float32
+    polygons: np.ndarray             # (m, 3) uint32
+    uvs: Optional[np.ndarray] = None  # (m, 3, 2) float32, per polygon corner
+
+    @property
+    def point_count(self) -> int:
+        return len(self.points)
+
+    @property
+    def polygon_count(self) -> int:
+        return len(self.polygons)
+
+    @classmethod
+    def from_arrays(cls, vertices, faces, uv=None, scale: float = 1.0) -> "MeshBuffers":
+        """Build buffers from right-handed, Y-up arrays (glTF/OBJ convention)
+
+        Cinema4D is left-handed, so Z is mirrored and the winding reversed
+        to keep normals pointing outwards.
+        """
+        points = np.asarray(vertices, dtype=np.float64) * scale
+        points[:, 2] *= -1.0
+        polygons = np.asarray(faces, dtype=np.int64)[:, ::-1]
+
+        corner_uvs = None
+        if uv is not None and len(uv) == len(points):
+            uv = np.asarray(uv, dtype=np.float64)
+            # Per-vertex UVs become per-corner UVs, V flipped for Cinema4D
+            corner_uvs = uv[polygons]
+            corner_uvs[..., 1] = 1.0 - corner_uvs[..., 1]
+
+        return cls(
+            points=np.ascontiguousarray(points, dtype=POINT_DTYPE),
+            polygons=np.ascontiguousarray(polygons, dtype=POLYGON_DTYPE),
+            uvs=None if corner_uvs is None else np.ascontiguousarray(corner_uvs, dtype=UV_DTYPE),
+        )
+
+    @classmethod
+    def load(cls, file_path: Path, scale: float = 1.0) -> "MeshBuffers":
+        """Load a mesh file (GLB, OBJ, PLY, ...) into stream buffers"""
+        import trimesh
+
+        mesh = trimesh.load(str(file_path), force='mesh', process=False)
+        uv = getattr(mesh.visual, 'uv', None)
+        return cls.from_arrays(mesh.vertices, mesh.faces, uv, scale)
+
+    def iter_chunks(self, chunk_bytes: int = CHUNK_BYTES) -> Iterator[Tuple[str, int, int, bytes]]:
+        """Yield (channel, offset, count, payload) for every chunk of every buffer"""
+        channels = [("points", self.points), ("polygons", self.polygons)]
+        if self.uvs is not None:
+            channels.append(("uvs", self.uvs))
+
+        for channel, array in channels:
+            row_bytes = array.itemsize * int(np.prod(array.shape[1:]))
+            rows_per_chunk = max(1, chunk_bytes // row_bytes)
+            for offset in range(0, len(array), rows_per_chunk):
+                rows = array[offset:offset + rows_per_chunk]
+                yield channel, offset, len(rows), rows.tobytes()
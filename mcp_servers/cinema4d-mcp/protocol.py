@@ -0,0 +1,164 @@
+"""
+Wire protocol shared by the MCP server, tools and benchmarks
+Every message is prefixed with its payload length (4 bytes, big-endian).
+Commands are JSON objects, binary attachments follow their command as
+separate messages. The Cinema4D plugin carries its own copy of these helpers
+because it has to stay a single file for the Script Manager.
+
+A hello command negotiates compression when a client connects. From the
+message after the hello response on, every payload starts with one byte
+naming its codec, and only payloads above the threshold are compressed.
+"""
+
+import json
+import socket
+import struct
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+HEADER = struct.Struct('!I')
+
+# Payloads smaller than this are not worth compressing
+COMPRESSION_THRESHOLD = 4096
+
+# Codec byte at the start of every negotiated payload
+CODEC_RAW = 0
+CODEC_IDS = {"zlib": 1, "lz4": 2}
+
+
+def available_codecs() -> List[str]:
+    """Codecs this side supports, fastest first"""
+    return ["lz4", "zlib"] if lz4_frame is not None else ["zlib"]
+
+
+def _compress(codec_id: int, data: bytes) -> bytes:
+    if codec_id == CODEC_IDS["lz4"]:
+        return lz4_frame.compress(data)
+    return zlib.compress(data, 1)
+
+
+def _decompress(codec_id: int, data: bytes) -> bytes:
+    if codec_id == CODEC_IDS["lz4"]:
+        if lz4_frame is None:
+            raise ValueError("Received lz4 payload but lz4 is not installed")
+        return lz4_frame.decompress(data)
+    if codec_id == CODEC_IDS["zlib"]:
+        return zlib.decompress(data)
+    raise ValueError(f"Unknown codec: {codec_id}")
+
+
+class FrameCodec:
+    """Compression for one connection, with ratio and timing statistics"""
+
+    def __init__(self, name: str, threshold: int = COMPRESSION_THRESHOLD):
+        self.name = name
+        self.codec_id = CODEC_IDS[name]
+        self.threshold = threshold
+        self.sent = 0
+        self.sent_compressed = 0
+        self.sent_raw_bytes = 0
+        self.sent_wire_bytes = 0
+        self.compress_time = 0.0
+        self.received = 0
+        self.received_compressed = 0
+        self.received_raw_bytes = 0
+        self.received_wire_bytes = 0
+        self.decompress_time = 0.0
+
+    def encode(self, payload: bytes) -> bytes:
+        """Prefix the codec byte, compressing large payloads when it pays off"""
+        self.sent += 1
+        self.sent_raw_bytes += len(payload)
+        frame = None
+        if len(payload) >= self.threshold:
+            start = time.perf_counter()
+            compressed = _compress(self.codec_id, payload)
+            self.compress_time += time.perf_counter() - start
+            if len(compressed) < len(payload):
+                self.sent_compressed += 1
+                frame = bytes((self.codec_id,)) + compressed
+        if frame is None:
+            frame = bytes((CODEC_RAW,)) + payload
+        self.sent_wire_bytes += len(frame)
+        return frame
+
+    def decode(self, frame: bytes) -> bytes:
+        self.received += 1
+        self.received_wire_bytes += len(frame)
+        codec_id, data = frame[0], frame[1:]
+        if codec_id != CODEC_RAW:
+            start = time.perf_counter()
+            data = _decompress(codec_id, data)
+            self.decompress_time += time.perf_counter() - start
+            self.received_compressed += 1
+        self.received_raw_bytes += len(data)
+        return data
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "codec": self.name,
+            "threshold": self.threshold,
+            "sent": self.sent,
+            "sent_compressed": self.sent_compressed,
+            "sent_ratio": self.sent_raw_bytes / self.sent_wire_bytes if self.sent_wire_bytes else 1.0,
+            "compress_ms": round(self.compress_time * 1000.0, 3),
+            "received": self.received,
+            "received_compressed": self.received_compressed,
+            "received_ratio": (self.received_raw_bytes / self.received_wire_bytes
+                               if self.received_wire_bytes else 1.0),
+            "decompress_ms": round(self.decompress_time * 1000.0, 3),
+            "bytes_saved": (self.sent_raw_bytes - self.sent_wire_bytes
+                            + self.received_raw_bytes - self.received_wire_bytes)
+        }
+
+
+def recv_exact(sock: socket.socket, size: int) -> bytes:
+    """Receive exactly size bytes from a socket"""
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(min(size - len(buf), 1024 * 1024))
+        if not chunk:
+            raise ConnectionError("Connection closed by Cinema4D")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def send_message(sock: socket.socket, payload: bytes, codec: Optional[FrameCodec] = None):
+    """Send one length-prefixed message"""
+    if codec is not None:
+        payload = codec.encode(payload)
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def recv_message(sock: socket.socket, codec: Optional[FrameCodec] = None) -> bytes:
+    """Receive one length-prefixed message"""
+    (size,) = HEADER.unpack(recv_exact(sock, HEADER.size))
+    payload = recv_exact(sock, size)
+    return codec.decode(payload) if codec is not None else payload
+
+
+def encode_command(command: Dict[str, Any], attachments: Optional[List[bytes]] = None) -> bytes:
+    """Encode a command, announcing how many binary attachments follow it"""
+    if attachments:
+        command = dict(command, attachments=len(attachments))
+    return json.dumps(command, separators=(',', ':')).encode('utf-8')
+
+
+def hello_command(codecs: Optional[List[str]] = None, threshold: int = COMPRESSION_THRESHOLD) -> Dict[str, Any]:
+    """Capability exchange sent first on a new connection"""
+    offered = available_codecs() if codecs is None else [c for c in codecs if c in available_codecs()]
+    return {"command": "hello", "compression": offered, "threshold": threshold}
+
+
+def codec_from_hello(response: Dict[str, Any]) -> Optional[FrameCodec]:
+    """The codec the plugin chose, None for no compression (or an old plugin)"""
+    name = response.get("compression") if response.get("success") else None
+    if name not in CODEC_IDS:
+        return None
+    return FrameCodec(name, int(response.get("threshold", COMPRESSION_THRESHOLD)))
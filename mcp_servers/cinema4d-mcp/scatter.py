@@ -0,0 +1,310 @@
+"""
+Host-side scatter layouts for Cinema4D
+Placement is computed here with NumPy and sent to the plugin as one binary
+matrix payload. The plugin builds instances that reference the source
+objects, so the geometry is never copied no matter how many points there are.
+
+Poisson-disk layouts keep instances from overlapping: every instance gets a
+footprint radius (its source's bounding radius times its scale) and no two
+footprints intersect. Conflicts are found with a uniform-grid spatial hash
+and resolved in parallel rounds, so the whole layout stays vectorized.
+"""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Wire formats, one row per instance
+MATRIX_DTYPE = np.dtype('<f4')   # off, v1, v2, v3 (Cinema4D matrix layout)
+SOURCE_DTYPE = np.dtype('<u4')   # index into the command's source list
+
+GOLDEN_ANGLE = np.radians(137.5)
+
+# Candidates drawn per missing point in a Poisson-disk batch, divided by the
+# share of candidates the previous batch managed to place (at most the size
+# of the first batch)
+POISSON_OVERSAMPLING = 2.0
+POISSON_MAX_BATCHES = 8
+# Batches stop once fewer than this share of their candidates are placed
+POISSON_MIN_ACCEPTANCE = 0.002
+# Random sequential packing of equal discs jams at about 55% coverage
+POISSON_PACKING = 0.55
+
+_radii: Dict[str, Tuple[int, int, float]] = {}  # path -> (size, mtime_ns, radius)
+
+
+def hpb_axes(rotations: np.ndarray) -> np.ndarray:
+    """Axis vectors (v1, v2, v3) for HPB rotations in radians, shape (n, 3, 3)
+
+    Same convention as c4d.utils.HPBToMatrix: heading about Y, then pitch
+    about X, then bank about Z.
+    """
+    rotations = np.asarray(rotations, dtype=np.float64).reshape(-1, 3)
+    ch, cp, cb = np.cos(rotations).T
+    sh, sp, sb = np.sin(rotations).T
+
+    # Rows are the axis vectors of MatrixRotY(h) * MatrixRotX(p) * MatrixRotZ(b)
+    axes = np.empty((len(rotations), 3, 3))
+    axes[:, 0, 0] = ch * cb + sh * sp * sb
+    axes[:, 0, 1] = cp * sb
+    axes[:, 0, 2] = -sh * cb + ch * sp * sb
+    axes[:, 1, 0] = -ch * sb + sh * sp * cb
+    axes[:, 1, 1] = cp * cb
+    axes[:, 1, 2] = sh * sb + ch * sp * cb
+    axes[:, 2, 0] = sh * cp
+    axes[:, 2, 1] = -sp
+    axes[:, 2, 2] = ch * cp
+    return axes
+
+
+@dataclass
+class ScatterLayout:
+    """Per-instance transforms and the source object each instance shows"""
+    positions: np.ndarray  # (n, 3)
+    rotations: np.ndarray  # (n, 3) heading, pitch, bank in radians
+    scales: np.ndarray     # (n, 3)
+    sources: np.ndarray    # (n,) index into the source list
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def matrices(self) -> np.ndarray:
+        """(n, 12) float32 rows: offset, then the scaled v1, v2 and v3 axes"""
+        axes = hpb_axes(self.rotations) * np.asarray(self.scales, dtype=np.float64)[:, :, None]
+        rows = np.concatenate([np.asarray(self.positions, dtype=np.float64),
+                               axes.reshape(len(self), 9)], axis=1)
+        return np.ascontiguousarray(rows, dtype=MATRIX_DTYPE)
+
+    def payload(self) -> List[bytes]:
+        """Attachments for the scatter_instances command"""
+        sources = np.ascontiguousarray(self.sources, dtype=SOURCE_DTYPE)
+        return [self.matrices().tobytes(), sources.tobytes()]
+
+
+def fibonacci_layout(count: int, source_count: int, radius: float = 1000.0,
+                     height_variation: float = 200.0, jitter: float = 50.0,
+                     scale_range: Tuple[float, float] = (0.7, 1.3),
+                     seed: Optional[int] = None) -> ScatterLayout:
+    """Golden-angle spiral with jitter, random heading and uniform scale"""
+    rng = np.random.default_rng(seed)
+    i = np.arange(count, dtype=np.float64)
+
+    angle = i * GOLDEN_ANGLE
+    distance = np.sqrt(i) * (radius / np.sqrt(max(count, 1)))
+    positions = np.empty((count, 3))
+    positions[:, 0] = distance * np.cos(angle) + rng.uniform(-jitter, jitter, count)
+    positions[:, 1] = rng.uniform(-height_variation / 2, height_variation / 2, count)
+    positions[:, 2] = distance * np.sin(angle) + rng.uniform(-jitter, jitter, count)
+
+    rotations = np.zeros((count, 3))
+    rotations[:, 0] = rng.uniform(0, 2 * np.pi, count)
+
+    scales = np.repeat(rng.uniform(scale_range[0], scale_range[1], count)[:, None], 3, axis=1)
+
+    return ScatterLayout(
+        positions=positions,
+        rotations=rotations,
+        scales=scales,
+        sources=rng.integers(0, max(source_count, 1), count),
+    )
+
+
+def mesh_radius(file_path: Path) -> float:
+    """Footprint radius of a mesh file: farthest point from its axis in XZ.
+
+    Measured around the object's origin rather than its bounding box centre,
+    since that is where instances are placed. Cached until the file changes.
+    """
+    from mesh_stream import MeshBuffers
+
+    stat = os.stat(file_path)
+    cached = _radii.get(str(file_path))
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+
+    points = MeshBuffers.load(Path(file_path)).points
+    radius = float(np.sqrt((points[:, 0].astype(np.float64) ** 2
+                            + points[:, 2].astype(np.float64) ** 2).max())) if len(points) else 0.0
+    _radii[str(file_path)] = (stat.st_size, stat.st_mtime_ns, radius)
+    return radius
+
+
+def neighbor_pairs(xz: np.ndarray, cell: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Every pair of points in the same or adjacent grid cells, once.
+
+    Points are hashed into square cells of the given size and sorted by cell,
+    so each cell is one contiguous run of the sort order. With cell >= the
+    largest conflict distance every conflicting pair is reported (plus some
+    that are merely close).
+    """
+    if not len(xz):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    keys = np.floor(xz / cell).astype(np.int64)
+    keys -= keys.min(axis=0) - 1  # one empty cell of margin on every side
+    width = int(keys[:, 0].max()) + 2
+    cell_ids = keys[:, 1] * width + keys[:, 0]
+    cell_count = (int(keys[:, 1].max()) + 2) * width
+
+    order = np.argsort(cell_ids, kind="stable")
+    sorted_ids = cell_ids[order]
+    if cell_count <= 8 * len(xz) + 1024:
+        # Dense table of runs, cheaper than a binary search per lookup
+        run_lengths = np.bincount(cell_ids, minlength=cell_count)
+        run_starts = np.cumsum(run_lengths) - run_lengths
+
+        def runs(target):
+            return run_starts[target], run_lengths[target]
+    else:
+        def runs(target):
+            start = np.searchsorted(sorted_ids, target, side="left")
+            return start, np.searchsorted(sorted_ids, target, side="right") - start
+
+    first, second = [], []
+    # Own cell plus the four forward neighbours visits every cell pair once
+    for dx, dy in ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)):
+        start, counts = runs(cell_ids + dy * width + dx)
+        total = int(counts.sum())
+        if not total:
+            continue
+        i = np.repeat(np.arange(len(xz)), counts)
+        run_offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        j = order[np.repeat(start, counts) + run_offsets]
+        if dx == 0 and dy == 0:
+            keep = i < j
+            i, j = i[keep], j[keep]
+        first.append(i)
+        second.append(j)
+
+    if not first:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    return np.concatenate(first), np.concatenate(second)
+
+
+def independent_points(xz: np.ndarray, radii: np.ndarray, fixed: int = 0) -> np.ndarray:
+    """Mask of a maximal set of non-overlapping discs, earlier points first.
+
+    Luby-style rounds: a live point that comes before every live point it
+    overlaps is accepted, and the points it overlaps are dropped. The first
+    `fixed` points are already placed and known not to overlap each other,
+    so they are always kept and their mutual pairs are never measured.
+    """
+    if not len(radii) or radii.max() <= 0:
+        return np.ones(len(xz), dtype=bool)  # points don't overlap anything
+    i, j = neighbor_pairs(xz, 2.0 * float(radii.max()))
+    # Orient every pair from the winner to the loser
+    winner, loser = np.minimum(i, j), np.maximum(i, j)
+    candidate = loser >= fixed
+    winner, loser = winner[candidate], loser[candidate]
+
+    x = np.ascontiguousarray(xz[:, 0])
+    z = np.ascontiguousarray(xz[:, 1])
+    dx = x[winner] - x[loser]
+    dz = z[winner] - z[loser]
+    reach = radii[winner] + radii[loser]
+    overlap = dx * dx + dz * dz < reach * reach
+    winner, loser = winner[overlap], loser[overlap]
+
+    alive = np.ones(len(xz), dtype=bool)
+    accepted = np.zeros(len(xz), dtype=bool)
+    while True:
+        live = alive[winner] & alive[loser]
+        winner, loser = winner[live], loser[live]
+        beaten = np.zeros(len(xz), dtype=bool)
+        beaten[loser] = True
+        new = alive & ~beaten
+        if not new.any():
+            break
+        accepted |= new
+        alive &= ~new
+        alive[loser[new[winner]]] = False
+        if not alive.any():
+            break
+    return accepted
+
+
+def disc_capacity(radius: float, footprint: float) -> float:
+    """Roughly how many footprints of the given radius fit in the disc, at most.
+
+    Centres stay inside the disc, so footprints may reach past its edge by
+    their own radius.
+    """
+    if footprint <= 0:
+        return float("inf")
+    return POISSON_PACKING * ((radius + footprint) / footprint) ** 2
+
+
+def poisson_disk_layout(count: int, source_radii: Sequence[float], radius: float = 1000.0,
+                        height_variation: float = 200.0, spacing: float = 0.0,
+                        scale_range: Tuple[float, float] = (0.7, 1.3),
+                        seed: Optional[int] = None) -> ScatterLayout:
+    """Non-overlapping scatter inside a disc of the given radius.
+
+    Each instance covers a footprint of its source's bounding radius times
+    its scale, plus half the spacing. Candidates are drawn in batches and
+    thinned against the points already placed; if the disc is too small for
+    count instances, the layout holds as many as fit.
+
+    count is capped at the disc's capacity for the smallest footprint up
+    front, so asking for far too many never draws more candidates than the
+    disc can use.
+    """
+    rng = np.random.default_rng(seed)
+    source_radii = np.asarray(source_radii, dtype=np.float64)
+    source_count = max(len(source_radii), 1)
+    if not len(source_radii):
+        source_radii = np.zeros(1)
+    footprint_min = float(source_radii.min()) * min(scale_range) + spacing / 2.0
+    count = int(min(count, disc_capacity(radius, footprint_min)))
+
+    xz = np.empty((0, 2))
+    sources = np.empty(0, dtype=np.int64)
+    scales = np.empty(0)
+    acceptance = 1.0
+
+    for _ in range(POISSON_MAX_BATCHES):
+        missing = count - len(xz)
+        if missing <= 0:
+            break
+        n = int(min(missing / acceptance, count) * POISSON_OVERSAMPLING) + 16
+
+        # Uniform over the disc
+        distance = radius * np.sqrt(rng.random(n))
+        angle = rng.uniform(0, 2 * np.pi, n)
+        batch_xz = np.stack([distance * np.cos(angle), distance * np.sin(angle)], axis=1)
+        batch_sources = rng.integers(0, source_count, n)
+        batch_scales = rng.uniform(scale_range[0], scale_range[1], n)
+
+        # Placed points come first and so win every conflict. Candidates are
+        # independent draws, which makes their order a random priority.
+        all_xz = np.concatenate([xz, batch_xz])
+        all_sources = np.concatenate([sources, batch_sources])
+        all_scales = np.concatenate([scales, batch_scales])
+        footprint = source_radii[all_sources] * all_scales + spacing / 2.0
+
+        placed = len(xz)
+        kept = np.flatnonzero(independent_points(all_xz, footprint, placed))[:count]
+        xz, sources, scales = all_xz[kept], all_sources[kept], all_scales[kept]
+        acceptance = (len(xz) - placed) / n
+        if acceptance < POISSON_MIN_ACCEPTANCE:
+            break  # the disc is practically full
+
+    n = len(xz)
+    positions = np.empty((n, 3))
+    positions[:, 0] = xz[:, 0]
+    positions[:, 1] = rng.uniform(-height_variation / 2, height_variation / 2, n)
+    positions[:, 2] = xz[:, 1]
+
+    rotations = np.zeros((n, 3))
+    rotations[:, 0] = rng.uniform(0, 2 * np.pi, n)
+
+    return ScatterLayout(
+        positions=positions,
+        rotations=rotations,
+        scales=np.repeat(scales[:, None], 3, axis=1),
+        sources=sources,
+    )
@@ -11,6 +11,11 @@ from c4d import documents, BaseObject, Vector
 # Target objects to scatter (will be replaced by the app)
 TARGET_OBJECTS = []
 
+def search_object(doc, name):
+    """Find an object by name, through the MCP plugin's index when available"""
+    indexed = globals().get("find_object")
+    return indexed(name, doc) if indexed else doc.SearchObject(name)
+
 def create_scatter_system(doc, objects, count=100, radius=1000, height_variation=200):
     """Create intelligent scatter system"""
     
@@ -22,19 +27,25 @@ def create_scatter_system(doc, objects, count=100, radius=1000, height_variation
     # Scatter parameters
     golden_angle = 137.5  # Golden angle for natural distribution
     
+    # Resolve each source object once instead of searching on every instance
+    sources = {name: search_object(doc, name) for name in objects}
+    
     for i in range(count):
         # Select random object from list
         if not objects:
             continue
             
         obj_name = random.choice(objects)
-        obj = doc.SearchObject(obj_name)
+        obj = sources[obj_name]
         
         if not obj:
             continue
         
-        # Clone object
-        clone = obj.GetClone()
+        # Render instance of the source, the geometry is not copied
+        instance = BaseObject(c4d.Oinstance)
+        instance.SetName(obj.GetName())
+        instance[c4d.INSTANCEOBJECT_LINK] = obj
+        instance[c4d.INSTANCEOBJECT_RENDERINSTANCE] = True
         
         # Calculate position using Fibonacci spiral
         angle = math.radians(i * golden_angle)
@@ -49,18 +60,18 @@ def create_scatter_system(doc, objects, count=100, radius=1000, height_variation
         z += random.uniform(-50, 50)
         
         # Set position
-        clone.SetAbsPos(Vector(x, y, z))
+        instance.SetAbsPos(Vector(x, y, z))
         
-        # Random rotation
+        # Random rotation around the Y axis (heading)
         rot_y = random.uniform(0, math.pi * 2)
-        clone.SetAbsRot(Vector(0, rot_y, 0))
+        instance.SetAbsRot(Vector(rot_y, 0, 0))
         
         # Random scale variation
         scale = random.uniform(0.7, 1.3)
-        clone.SetAbsScale(Vector(scale, scale, scale))
+        instance.SetAbsScale(Vector(scale, scale, scale))
         
         # Insert under scatter null
-        clone.InsertUnder(scatter_null)
+        instance.InsertUnder(scatter_null)
     
     # Add dynamics tag to scatter null
     dynamics_tag = scatter_null.MakeTag(c4d.Tcollider)
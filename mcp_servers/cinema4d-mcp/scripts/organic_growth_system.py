@@ -10,6 +10,11 @@ import math
 # Target objects (will be replaced by the app)
 TARGET_OBJECTS = []
 
+def search_object(doc, name):
+    """Find an object by name, through the MCP plugin's index when available"""
+    indexed = globals().get("find_object")
+    return indexed(name, doc) if indexed else doc.SearchObject(name)
+
 def create_organic_growth(doc, obj):
     """Apply organic growth system to object"""
     
@@ -131,7 +136,7 @@ def main():
     
     # Apply organic growth to each object
     for obj_name in objects:
-        obj = doc.SearchObject(obj_name)
+        obj = search_object(doc, obj_name)
         if obj:
             create_organic_growth(doc, obj)
             print(f"Applied organic growth to {obj_name}")
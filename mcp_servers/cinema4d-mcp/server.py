@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 
 import asyncio
+import contextvars
 import json
 import logging
-import socket
+import os
 import sys
-import threading
+import time
+import uuid
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
@@ -14,26 +16,70 @@ import mcp.types as types
 from mcp.server import NotificationOptions, Server
 from mcp.server.models import InitializationOptions
 
+from c4d_link import Cinema4DUnavailable
+from c4d_pool import Cinema4DPool, ports_from_env
+from latency import LatencyRecorder
+from material_keys import material_key
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("cinema4d-mcp-server")
 
+# Binary mesh streaming needs NumPy (and trimesh for loading files)
+try:
+    from mesh_stream import MeshBuffers
+except ImportError as e:
+    MeshBuffers = None
+    logger.warning(f"Binary mesh streaming not available: {e}")
+
+try:
+    from scatter import fibonacci_layout, mesh_radius, poisson_disk_layout
+except ImportError as e:
+    fibonacci_layout = poisson_disk_layout = None
+    logger.warning(f"Host-side scattering not available: {e}")
+
+# Scene patterns live in the application package (src/c4d)
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+try:
+    from src.c4d.mograph_engine import MoGraphEngine
+except ImportError as e:
+    MoGraphEngine = None
+    logger.warning(f"Scene patterns not available: {e}")
+
+# Document the current tool call works on. Requests for the same document go
+# to the same Cinema4D instance, anything else is load-balanced.
+current_document = contextvars.ContextVar("current_document", default=None)
+
+DOCUMENT_PROPERTY = {
+    "type": "string",
+    "description": "Scene this call belongs to (e.g. its file path); calls for the same scene run on the same Cinema4D instance"
+}
+
 class Cinema4DMCPServer:
     def __init__(self):
         self.server = Server("cinema4d-mcp-server")
-        self.c4d_socket = None
-        self.socket_port = 54321
-        self.socket_server = None
-        self.c4d_connected = False
+        # C4D_MCP_PORTS (e.g. "54321-54324") runs a pool of Cinema4D instances
+        self.socket_ports = ports_from_env()
+        self.socket_port = self.socket_ports[0]
+        # C4D_MCP_COMPRESSION: comma-separated codecs to offer, or "none"
+        codecs = os.environ.get('C4D_MCP_COMPRESSION')
+        if codecs is not None:
+            codecs = [] if codecs.strip().lower() == "none" else [c.strip() for c in codecs.split(',')]
+        self.pool = Cinema4DPool(self.socket_ports, compression=codecs)
+        self.tool_latency = LatencyRecorder()
         
         # Set up server handlers
         self._setup_handlers()
         
+    @property
+    def c4d_connected(self) -> bool:
+        return self.pool.connected
+        
     def _setup_handlers(self):
         @self.server.list_tools()
         async def handle_list_tools() -> List[types.Tool]:
             """List available tools"""
-            return [
+            tools = [
                 types.Tool(
                     name="execute_python",
                     description="Execute Python script in Cinema4D",
@@ -75,6 +121,134 @@ class Cinema4DMCPServer:
                         "required": ["file_path"]
                     }
                 ),
+                types.Tool(
+                    name="stream_mesh",
+                    description="Stream a generated mesh into Cinema4D as a polygon object, without the file importer",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "file_path": {
+                                "type": "string",
+                                "description": "Path to mesh file (GLB, OBJ, PLY, ...)"
+                            },
+                            "name": {
+                                "type": "string",
+                                "description": "Object name, defaults to the file name"
+                            },
+                            "position": {
+                                "type": "array",
+                                "items": {"type": "number"},
+                                "minItems": 3,
+                                "maxItems": 3,
+                                "description": "Position [x, y, z]",
+                                "default": [0, 0, 0]
+                            },
+                            "scale": {
+                                "type": "number",
+                                "description": "Scale factor",
+                                "default": 1.0
+                            }
+                        },
+                        "required": ["file_path"]
+                    }
+                ),
+                types.Tool(
+                    name="scatter_objects",
+                    description="Scatter instances of existing objects, referencing their geometry instead of copying it",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "objects": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Names of the source objects"
+                            },
+                            "count": {
+                                "type": "integer",
+                                "description": "Number of instances",
+                                "default": 150
+                            },
+                            "radius": {
+                                "type": "number",
+                                "description": "Radius of the scatter area",
+                                "default": 2000.0
+                            },
+                            "height_variation": {
+                                "type": "number",
+                                "description": "Random height range",
+                                "default": 100.0
+                            },
+                            "method": {
+                                "type": "string",
+                                "enum": ["poisson", "spiral"],
+                                "description": "poisson keeps instances from overlapping, spiral is the jittered golden-angle spiral",
+                                "default": "poisson"
+                            },
+                            "mesh_files": {
+                                "type": "object",
+                                "additionalProperties": {"type": "string"},
+                                "description": "Mesh file of each source object (name -> path), used for its bounding radius"
+                            },
+                            "object_radius": {
+                                "type": "number",
+                                "description": "Bounding radius of sources without a mesh file",
+                                "default": 50.0
+                            },
+                            "spacing": {
+                                "type": "number",
+                                "description": "Extra gap between instances",
+                                "default": 0.0
+                            },
+                            "seed": {
+                                "type": "integer",
+                                "description": "Random seed for a reproducible layout"
+                            },
+                            "name": {
+                                "type": "string",
+                                "description": "Name of the null holding the instances",
+                                "default": "Scattered Objects"
+                            },
+                            "collider": {
+                                "type": "boolean",
+                                "description": "Add a static collider tag to the null",
+                                "default": False
+                            }
+                        },
+                        "required": ["objects"]
+                    }
+                ),
+                types.Tool(
+                    name="build_scene_patterns",
+                    description="Build instances of parameterized scene patterns in one Cinema4D call",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "instances": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "pattern": {
+                                            "type": "string",
+                                            "description": "Pattern name (instance_scatter, organic_growth, three_point_lights, material_set)"
+                                        },
+                                        "name": {
+                                            "type": "string",
+                                            "description": "Name of the null holding this instance"
+                                        },
+                                        "params": {
+                                            "type": "object",
+                                            "description": "Pattern parameters; omitted ones use the pattern defaults"
+                                        }
+                                    },
+                                    "required": ["pattern"]
+                                },
+                                "description": "Pattern instances to build"
+                            }
+                        },
+                        "required": ["instances"]
+                    }
+                ),
                 types.Tool(
                     name="create_primitive",
                     description="Create primitive object in Cinema4D",
@@ -110,7 +284,7 @@ class Cinema4DMCPServer:
                 ),
                 types.Tool(
                     name="create_material",
-                    description="Create material in Cinema4D",
+                    description="Create material in Cinema4D, reusing an identical existing one",
                     inputSchema={
                         "type": "object",
                         "properties": {
@@ -137,8 +311,12 @@ class Cinema4DMCPServer:
                                 "type": "number",
                                 "minimum": 0,
                                 "maximum": 1,
-                                "description": "Metallic value",
+                                "description": "Metallic value, tints reflections with the color and dims the diffuse color",
                                 "default": 0.0
+                            },
+                            "texture_path": {
+                                "type": "string",
+                                "description": "Optional color texture file"
                             }
                         },
                         "required": ["name"]
@@ -219,10 +397,15 @@ class Cinema4DMCPServer:
                 ),
                 types.Tool(
                     name="get_scene_objects",
-                    description="Get list of objects in the scene",
+                    description="Get the scene hierarchy, or only the changes since a snapshot version",
                     inputSchema={
                         "type": "object",
-                        "properties": {},
+                        "properties": {
+                            "since_version": {
+                                "type": "integer",
+                                "description": "Snapshot version already known; only objects changed or removed after it are returned"
+                            }
+                        },
                         "additionalProperties": False
                     }
                 ),
@@ -236,17 +419,30 @@ class Cinema4DMCPServer:
                     }
                 )
             ]
+            
+            for tool in tools:
+                if tool.name != "get_status":
+                    tool.inputSchema["properties"]["document"] = DOCUMENT_PROPERTY
+            return tools
 
         @self.server.call_tool()
         async def handle_call_tool(
             name: str, arguments: Optional[Dict[str, Any]]
         ) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
             """Handle tool calls"""
+            start = time.perf_counter()
+            document = current_document.set((arguments or {}).get("document"))
             try:
                 if name == "execute_python":
                     return await self._execute_python(arguments or {})
                 elif name == "import_object":
                     return await self._import_object(arguments or {})
+                elif name == "stream_mesh":
+                    return await self._stream_mesh(arguments or {})
+                elif name == "scatter_objects":
+                    return await self._scatter_objects(arguments or {})
+                elif name == "build_scene_patterns":
+                    return await self._build_scene_patterns(arguments or {})
                 elif name == "create_primitive":
                     return await self._create_primitive(arguments or {})
                 elif name == "create_material":
@@ -258,7 +454,7 @@ class Cinema4DMCPServer:
                 elif name == "save_project":
                     return await self._save_project(arguments or {})
                 elif name == "get_scene_objects":
-                    return await self._get_scene_objects()
+                    return await self._get_scene_objects(arguments or {})
                 elif name == "get_status":
                     return await self._get_status()
                 else:
@@ -270,69 +466,32 @@ class Cinema4DMCPServer:
                     type="text",
                     text=f"Error: {str(e)}"
                 )]
-
-    def start_socket_server(self):
-        """Start socket server for Cinema4D communication"""
-        def socket_server_thread():
-            try:
-                self.socket_server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                self.socket_server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                self.socket_server.bind(('localhost', self.socket_port))
-                self.socket_server.listen(1)
-                logger.info(f"Socket server listening on port {self.socket_port}")
-                
-                while True:
-                    try:
-                        client_socket, addr = self.socket_server.accept()
-                        logger.info(f"Cinema4D connected from {addr}")
-                        self.c4d_socket = client_socket
-                        self.c4d_connected = True
-                        
-                        # Keep connection alive
-                        while self.c4d_connected:
-                            try:
-                                data = client_socket.recv(1024)
-                                if not data:
-                                    break
-                                # Handle incoming data from C4D if needed
-                            except socket.error:
-                                break
-                                
-                    except socket.error as e:
-                        if self.socket_server:
-                            logger.error(f"Socket error: {e}")
-                        break
-                        
-            except Exception as e:
-                logger.error(f"Socket server error: {e}")
             finally:
-                self.c4d_connected = False
-                if self.c4d_socket:
-                    self.c4d_socket.close()
-                if self.socket_server:
-                    self.socket_server.close()
-        
-        # Start socket server in background thread
-        threading.Thread(target=socket_server_thread, daemon=True).start()
+                current_document.reset(document)
+                self.tool_latency.record(name, time.perf_counter() - start)
 
-    async def send_to_c4d(self, script: str) -> str:
-        """Send Python script to Cinema4D and get response"""
-        if not self.c4d_connected or not self.c4d_socket:
-            return "Error: Not connected to Cinema4D"
-        
+    async def send_command(self, command: Dict[str, Any], attachments: Optional[List[bytes]] = None) -> str:
+        """Send a command message to Cinema4D and get the raw JSON response"""
         try:
-            # Send script
-            message = json.dumps({"script": script})
-            self.c4d_socket.send(message.encode('utf-8'))
-            
-            # Receive response
-            response = self.c4d_socket.recv(4096).decode('utf-8')
-            return response
-            
+            return await self.pool.send(command, attachments, current_document.get())
+        except Cinema4DUnavailable as e:
+            return f"Error: {str(e)}"
         except Exception as e:
             logger.error(f"Error communicating with Cinema4D: {e}")
             return f"Error: {str(e)}"
 
+    async def request(self, command: Dict[str, Any], attachments: Optional[List[bytes]] = None) -> Dict[str, Any]:
+        """Send a command and decode the JSON response"""
+        response = await self.send_command(command, attachments)
+        try:
+            return json.loads(response)
+        except json.JSONDecodeError:
+            return {"success": False, "error": response}
+
+    async def send_to_c4d(self, script: str) -> str:
+        """Send Python script to Cinema4D and get response"""
+        return await self.send_command({"script": script})
+
     async def _execute_python(self, args: Dict[str, Any]) -> List[types.TextContent]:
         """Execute Python script in Cinema4D"""
         script = args.get("script", "")
@@ -380,6 +539,95 @@ if __name__ == '__main__':
         result = await self.send_to_c4d(script)
         return [types.TextContent(type="text", text=result)]
 
+    async def _stream_mesh(self, args: Dict[str, Any]) -> List[types.TextContent]:
+        """Stream mesh buffers into a new polygon object"""
+        if MeshBuffers is None:
+            return [types.TextContent(type="text", text="Error: Mesh streaming requires numpy and trimesh")]
+        
+        file_path = Path(args.get("file_path", ""))
+        if not file_path.is_file():
+            return [types.TextContent(type="text", text=f"Error: File not found: {file_path}")]
+        
+        mesh = MeshBuffers.load(file_path)
+        
+        # Stream state lives in one plugin session, keep every chunk on the
+        # same instance even if the default endpoint moves mid-stream
+        pinned = None
+        if current_document.get() is None:
+            pinned = current_document.set(f"mesh-stream:{uuid.uuid4().hex}")
+            self.pool.pin_to_default(current_document.get())
+        try:
+            return await self._send_mesh(mesh, args, file_path)
+        finally:
+            if pinned is not None:
+                self.pool.release(current_document.get())
+                current_document.reset(pinned)
+
+    async def _send_mesh(self, mesh, args: Dict[str, Any], file_path: Path) -> List[types.TextContent]:
+        """Send mesh_begin, every buffer chunk and mesh_end"""
+        begin = await self.request({
+            "command": "mesh_begin",
+            "name": args.get("name") or file_path.stem,
+            "point_count": mesh.point_count,
+            "polygon_count": mesh.polygon_count,
+            "has_uvs": mesh.uvs is not None,
+            "position": args.get("position", [0, 0, 0]),
+            "scale": args.get("scale", 1.0)
+        })
+        if not begin.get("success"):
+            return [types.TextContent(type="text", text=json.dumps(begin))]
+        
+        stream_id = begin["stream_id"]
+        for channel, offset, count, payload in mesh.iter_chunks():
+            result = await self.request({
+                "command": "mesh_chunk",
+                "stream_id": stream_id,
+                "channel": channel,
+                "offset": offset,
+                "count": count
+            }, [payload])
+            if not result.get("success"):
+                await self.request({"command": "mesh_abort", "stream_id": stream_id})
+                return [types.TextContent(type="text", text=json.dumps(result))]
+        
+        result = await self.request({"command": "mesh_end", "stream_id": stream_id})
+        return [types.TextContent(type="text", text=json.dumps(result))]
+
+    async def _scatter_objects(self, args: Dict[str, Any]) -> List[types.TextContent]:
+        """Compute a scatter layout here and send it as one matrix payload"""
+        if fibonacci_layout is None:
+            return [types.TextContent(type="text", text="Error: Scattering requires numpy")]
+        
+        objects = args.get("objects") or []
+        if not objects:
+            return [types.TextContent(type="text", text="Error: No objects to scatter")]
+        
+        count = int(args.get("count", 150))
+        radius = float(args.get("radius", 2000.0))
+        height_variation = float(args.get("height_variation", 100.0))
+        if args.get("method", "poisson") == "spiral":
+            layout = fibonacci_layout(count, len(objects), radius=radius,
+                                      height_variation=height_variation, seed=args.get("seed"))
+        else:
+            mesh_files = args.get("mesh_files") or {}
+            default_radius = float(args.get("object_radius", 50.0))
+            radii = []
+            for name in objects:
+                path = mesh_files.get(name)
+                radii.append(mesh_radius(Path(path)) if path and Path(path).is_file() else default_radius)
+            layout = poisson_disk_layout(count, radii, radius=radius, height_variation=height_variation,
+                                         spacing=float(args.get("spacing", 0.0)), seed=args.get("seed"))
+        result = await self.request({
+            "command": "scatter_instances",
+            "name": args.get("name", "Scattered Objects"),
+            "sources": objects,
+            "count": len(layout),
+            "collider": bool(args.get("collider", False))
+        }, layout.payload())
+        if result.get("success"):
+            result["requested"] = count
+        return [types.TextContent(type="text", text=json.dumps(result))]
+
     async def _create_primitive(self, args: Dict[str, Any]) -> List[types.TextContent]:
         """Create primitive object"""
         primitive_type = args.get("primitive_type", "cube")
@@ -447,50 +695,38 @@ if __name__ == '__main__':
         result = await self.send_to_c4d(script)
         return [types.TextContent(type="text", text=result)]
 
+    async def _build_scene_patterns(self, args: Dict[str, Any]) -> List[types.TextContent]:
+        """Queue every pattern instance and build them with one instantiate_patterns call"""
+        if MoGraphEngine is None:
+            return [types.TextContent(type="text", text="Error: Scene patterns are not available")]
+
+        instances = args.get("instances") or []
+        if not instances:
+            return [types.TextContent(type="text", text="Error: No pattern instances to build")]
+
+        engine = MoGraphEngine(self.request)
+        for instance in instances:
+            engine.add(instance["pattern"], instance.get("name"), **(instance.get("params") or {}))
+        result = await engine.build()
+        return [types.TextContent(type="text", text=json.dumps(result))]
+
     async def _create_material(self, args: Dict[str, Any]) -> List[types.TextContent]:
-        """Create material"""
-        name = args.get("name", "Material")
+        """Create material, reusing an identical one already in the document"""
         color = args.get("color", [0.8, 0.8, 0.8])
         roughness = args.get("roughness", 0.3)
         metallic = args.get("metallic", 0.0)
+        texture_path = args.get("texture_path")
         
-        script = f"""
-import c4d
-from c4d import documents
-
-def main():
-    doc = documents.GetActiveDocument()
-    if not doc:
-        return "No active document"
-    
-    # Create material
-    mat = c4d.BaseMaterial(c4d.Mmaterial)
-    if not mat:
-        return "Failed to create material"
-    
-    mat.SetName("{name}")
-    
-    # Set color
-    mat[c4d.MATERIAL_COLOR_COLOR] = c4d.Vector({color[0]}, {color[1]}, {color[2]})
-    mat[c4d.MATERIAL_USE_COLOR] = True
-    
-    # Set reflection properties
-    mat[c4d.MATERIAL_USE_REFLECTION] = True
-    mat[c4d.MATERIAL_REFLECTION_BRIGHTNESS] = {1.0 - roughness}
-    
-    # Insert material into document
-    doc.InsertMaterial(mat)
-    c4d.EventAdd()
-    
-    return f"Created material: {{mat.GetName()}}"
-
-if __name__ == '__main__':
-    result = main()
-    print(result)
-"""
-        
-        result = await self.send_to_c4d(script)
-        return [types.TextContent(type="text", text=result)]
+        result = await self.request({
+            "command": "create_material",
+            "name": args.get("name", "Material"),
+            "color": color,
+            "roughness": roughness,
+            "metallic": metallic,
+            "texture_path": texture_path,
+            "key": material_key(color, roughness, metallic, texture_path)
+        })
+        return [types.TextContent(type="text", text=json.dumps(result))]
 
     async def _assign_material(self, args: Dict[str, Any]) -> List[types.TextContent]:
         """Assign material to object"""
@@ -506,13 +742,17 @@ def main():
     if not doc:
         return "No active document"
     
+    # Indexed lookups provided by the plugin, tree search as a fallback
+    search_object = globals().get("find_object")
+    search_material = globals().get("find_material")
+    
     # Find object
-    obj = doc.SearchObject("{object_name}")
+    obj = search_object("{object_name}", doc) if search_object else doc.SearchObject("{object_name}")
     if not obj:
         return f"Object '{object_name}' not found"
     
     # Find material
-    mat = doc.SearchMaterial("{material_name}")
+    mat = search_material("{material_name}", doc) if search_material else doc.SearchMaterial("{material_name}")
     if not mat:
         return f"Material '{material_name}' not found"
     
@@ -620,51 +860,22 @@ if __name__ == '__main__':
         result = await self.send_to_c4d(script)
         return [types.TextContent(type="text", text=result)]
 
-    async def _get_scene_objects(self) -> List[types.TextContent]:
-        """Get scene objects"""
-        script = """
-import c4d
-import json
-from c4d import documents
-
-def get_object_info(obj):
-    info = {
-        "name": obj.GetName(),
-        "type": obj.GetTypeName(),
-        "position": list(obj.GetAbsPos()),
-        "rotation": list(obj.GetAbsRot()),
-        "scale": list(obj.GetAbsScale())
-    }
-    return info
-
-def main():
-    doc = documents.GetActiveDocument()
-    if not doc:
-        return "No active document"
-    
-    objects = []
-    obj = doc.GetFirstObject()
-    
-    while obj:
-        objects.append(get_object_info(obj))
-        obj = obj.GetNext()
-    
-    return json.dumps(objects, indent=2)
-
-if __name__ == '__main__':
-    result = main()
-    print(result)
-"""
+    async def _get_scene_objects(self, args: Dict[str, Any]) -> List[types.TextContent]:
+        """Get scene hierarchy snapshot (incremental when since_version is given)"""
+        command = {"command": "scene_snapshot"}
+        if args.get("since_version") is not None:
+            command["since_version"] = int(args["since_version"])
         
-        result = await self.send_to_c4d(script)
+        result = await self.send_command(command)
         return [types.TextContent(type="text", text=result)]
 
     async def _get_status(self) -> List[types.TextContent]:
         """Get connection status"""
         status = {
             "connected": self.c4d_connected,
-            "socket_port": self.socket_port,
-            "has_socket": self.c4d_socket is not None
+            "socket_ports": self.socket_ports,
+            "pool": self.pool.get_stats(),
+            "tools": self.tool_latency.summary()
         }
         
         return [types.TextContent(
@@ -674,8 +885,8 @@ if __name__ == '__main__':
 
     async def run(self):
         """Run the MCP server"""
-        # Start socket server for Cinema4D communication
-        self.start_socket_server()
+        # Connect to the Cinema4D plugin, reconnecting in the background
+        await self.pool.start()
         
         async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
             await self.server.run(
@@ -699,8 +910,7 @@ async def main():
     except KeyboardInterrupt:
         logger.info("Server shutting down...")
     finally:
-        if server.socket_server:
-            server.socket_server.close()
+        await server.pool.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
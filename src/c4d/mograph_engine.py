@@ -0,0 +1,65 @@
+"""
+Bulk instantiation of scene patterns in Cinema4D
+Instances are queued with their parameters and built by one
+instantiate_patterns call. Pattern build functions are only sent when the
+plugin does not know their key yet (first use, or after a Cinema4D restart),
+so a scene made of many patterns costs a single round trip.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from loguru import logger
+
+from .scene_patterns import DEFAULT_LIBRARY, PatternError, PatternLibrary, ScenePattern
+
+# Sends a command to the Cinema4D plugin and returns the decoded response,
+# e.g. Cinema4DMCPServer.request
+RequestFunction = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class MoGraphEngine:
+    """Queue of pattern instances for one Cinema4D document"""
+
+    def __init__(self, request: RequestFunction, library: PatternLibrary = DEFAULT_LIBRARY):
+        self.request = request
+        self.library = library
+        self.queue: List[Dict[str, Any]] = []
+        self._patterns: Dict[str, ScenePattern] = {}  # key -> pattern, for queued instances
+
+    def add(self, pattern: Union[str, ScenePattern], name: Optional[str] = None, **params) -> "MoGraphEngine":
+        """Queue one instance. Parameters are validated here, not in Cinema4D."""
+        if isinstance(pattern, str):
+            pattern = self.library.get(pattern)
+        self._patterns[pattern.key] = pattern
+        self.queue.append({"key": pattern.key, "name": name, "params": pattern.resolve(params)})
+        return self
+
+    def command(self) -> Dict[str, Any]:
+        return {"command": "instantiate_patterns", "instances": self.queue}
+
+    async def define(self, keys: List[str]) -> Dict[str, Any]:
+        """Send the build functions for these pattern keys"""
+        patterns = [self._patterns[key].wire() for key in keys]
+        result = await self.request({"command": "define_patterns", "patterns": patterns})
+        if not result.get("success"):
+            raise PatternError(f"Cinema4D rejected patterns: {result.get('errors') or result.get('error')}")
+        return result
+
+    async def build(self) -> Dict[str, Any]:
+        """Build every queued instance in one call and clear the queue"""
+        if not self.queue:
+            return {"success": True, "built": 0, "failed": 0, "results": []}
+
+        result = await self.request(self.command())
+        if result.get("missing"):
+            logger.info(f"Defining {len(result['missing'])} scene patterns in Cinema4D")
+            await self.define(result["missing"])
+            result = await self.request(self.command())
+
+        if result.get("results") is not None:
+            self.queue = []
+            self._patterns = {}
+        failed = [r for r in result.get("results", []) if not r.get("success")]
+        for failure in failed:
+            logger.warning(f"Pattern {failure['pattern']} failed: {failure.get('error')}")
+        return result
@@ -0,0 +1,414 @@
+"""
+Parameterized scene pattern templates for Cinema4D
+A pattern is a build function written against the c4d API plus a typed
+parameter schema. The function's source is validated and serialized once per
+pattern; building a scene afterwards only ships each instance's parameters,
+and the Cinema4D plugin runs every queued instance in one main-thread call
+(see mograph_engine.MoGraphEngine).
+
+Build functions run inside Cinema4D, not here: they import what they need
+themselves and may only use builtins plus the plugin's lookup helpers.
+"""
+
+import builtins
+import hashlib
+import inspect
+import json
+import symtable
+import textwrap
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Globals the plugin provides to build functions besides the builtins
+PLUGIN_HELPERS = {"find_object", "find_object_by_guid", "find_material", "find_material_by_key"}
+
+PARAMETER_TYPES = {"float", "int", "bool", "string", "strings", "vector", "vectors"}
+
+
+class PatternError(ValueError):
+    """A pattern definition or its parameters are invalid"""
+
+
+def _vector(name: str, value: Any) -> List[float]:
+    if not isinstance(value, (list, tuple)) or len(value) != 3:
+        raise PatternError(f"{name}: expected [x, y, z], got {value!r}")
+    try:
+        return [float(v) for v in value]
+    except (TypeError, ValueError):
+        raise PatternError(f"{name}: expected numbers, got {value!r}") from None
+
+
+@dataclass(frozen=True)
+class PatternParameter:
+    """One typed parameter of a pattern, with optional bounds or choices.
+
+    A default of None makes the parameter optional without a value; required
+    parameters have no default at all.
+    """
+    name: str
+    type: str
+    default: Any = inspect.Parameter.empty
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    choices: Optional[Tuple[Any, ...]] = None
+    description: str = ""
+
+    def __post_init__(self):
+        if self.type not in PARAMETER_TYPES:
+            raise PatternError(f"{self.name}: unknown parameter type {self.type!r}")
+        if self.default is not inspect.Parameter.empty and self.default is not None:
+            object.__setattr__(self, "default", self.coerce(self.default))
+
+    @property
+    def required(self) -> bool:
+        return self.default is inspect.Parameter.empty
+
+    def coerce(self, value: Any) -> Any:
+        """Validate a value and convert it to its JSON-friendly form"""
+        if value is None and self.default is None:
+            return None
+        name = self.name
+        if self.type == "bool":
+            if not isinstance(value, bool):
+                raise PatternError(f"{name}: expected a boolean, got {value!r}")
+        elif self.type in ("int", "float"):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise PatternError(f"{name}: expected a number, got {value!r}")
+            if self.type == "int":
+                if value != int(value):
+                    raise PatternError(f"{name}: expected an integer, got {value!r}")
+                value = int(value)
+            else:
+                value = float(value)
+            if self.minimum is not None and value < self.minimum:
+                raise PatternError(f"{name}: {value} is below the minimum {self.minimum}")
+            if self.maximum is not None and value > self.maximum:
+                raise PatternError(f"{name}: {value} is above the maximum {self.maximum}")
+        elif self.type == "string":
+            if not isinstance(value, str):
+                raise PatternError(f"{name}: expected a string, got {value!r}")
+        elif self.type == "strings":
+            if not isinstance(value, (list, tuple)) or not all(isinstance(v, str) for v in value):
+                raise PatternError(f"{name}: expected a list of strings, got {value!r}")
+            value = list(value)
+        elif self.type == "vector":
+            value = _vector(name, value)
+        else:
+            if not isinstance(value, (list, tuple)):
+                raise PatternError(f"{name}: expected a list of [x, y, z], got {value!r}")
+            value = [_vector(name, v) for v in value]
+
+        if self.choices is not None and value not in self.choices:
+            raise PatternError(f"{name}: {value!r} is not one of {list(self.choices)}")
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        spec = {"name": self.name, "type": self.type}
+        if not self.required:
+            spec["default"] = self.default
+        for key in ("minimum", "maximum", "choices", "description"):
+            value = getattr(self, key)
+            if value:
+                spec[key] = list(value) if key == "choices" else value
+        return spec
+
+
+def _check_globals(source: str, function_name: str):
+    """Reject build functions that depend on this module's globals"""
+    allowed = set(dir(builtins)) | PLUGIN_HELPERS
+    tables = [symtable.symtable(source, f"<pattern {function_name}>", "exec")]
+    while tables:
+        table = tables.pop()
+        if table.get_type() != "module":
+            for symbol in table.get_symbols():
+                if symbol.is_global() and symbol.get_name() not in allowed:
+                    raise PatternError(
+                        f"{function_name}: uses the global {symbol.get_name()!r}, "
+                        f"import it inside the build function")
+        tables.extend(table.get_children())
+
+
+@dataclass(frozen=True)
+class ScenePattern:
+    """A build function and its parameters, serialized once for the plugin"""
+    name: str
+    category: str
+    description: str
+    parameters: Tuple[PatternParameter, ...]
+    source: str = field(repr=False)
+
+    def __post_init__(self):
+        names = [parameter.name for parameter in self.parameters]
+        if len(set(names)) != len(names):
+            raise PatternError(f"{self.name}: duplicate parameter names")
+        try:
+            compile(self.source, f"<pattern {self.name}>", "exec")
+        except SyntaxError as e:
+            raise PatternError(f"{self.name}: {e}") from None
+        _check_globals(self.source, self.name)
+
+    @classmethod
+    def from_function(cls, function: Callable, category: str,
+                      parameters: Sequence[PatternParameter], description: str = "") -> "ScenePattern":
+        """Take the source of a build(doc, parent, params) function"""
+        if list(inspect.signature(function).parameters) != ["doc", "parent", "params"]:
+            raise PatternError(f"{function.__name__}: build functions take (doc, parent, params)")
+        source = textwrap.dedent(inspect.getsource(function))
+        # Drop the registering decorator, the plugin only needs the function
+        source = source[source.index("def "):]
+        return cls(function.__name__, category, description or inspect.getdoc(function) or "",
+                   tuple(parameters), source)
+
+    @cached_property
+    def definition(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "category": self.category,
+            "parameters": [parameter.to_dict() for parameter in self.parameters],
+            "source": self.source
+        }
+
+    @cached_property
+    def key(self) -> str:
+        """Content hash: a changed function or schema is a new pattern"""
+        canonical = json.dumps(self.definition, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+    def wire(self) -> Dict[str, str]:
+        """What define_patterns needs to compile the build function"""
+        return {"key": self.key, "name": self.name, "source": self.source}
+
+    def resolve(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Validated parameters with defaults filled in"""
+        known = {parameter.name for parameter in self.parameters}
+        unknown = sorted(set(params) - known)
+        if unknown:
+            raise PatternError(f"{self.name}: unknown parameters {unknown}")
+
+        resolved = {}
+        for parameter in self.parameters:
+            if parameter.name in params:
+                resolved[parameter.name] = parameter.coerce(params[parameter.name])
+            elif parameter.required:
+                raise PatternError(f"{self.name}: missing parameter {parameter.name!r}")
+            else:
+                resolved[parameter.name] = parameter.default
+        return resolved
+
+
+class PatternLibrary:
+    """Patterns by name, registered with the pattern() decorator"""
+
+    def __init__(self):
+        self.patterns: Dict[str, ScenePattern] = {}
+
+    def register(self, pattern: ScenePattern) -> ScenePattern:
+        if pattern.name in self.patterns:
+            raise PatternError(f"Pattern {pattern.name!r} is already registered")
+        self.patterns[pattern.name] = pattern
+        return pattern
+
+    def pattern(self, category: str, *parameters: PatternParameter, description: str = ""):
+        """Decorator turning a build function into a registered pattern"""
+        def decorator(function: Callable) -> Callable:
+            self.register(ScenePattern.from_function(function, category, parameters, description))
+            return function
+        return decorator
+
+    def get(self, name: str) -> ScenePattern:
+        try:
+            return self.patterns[name]
+        except KeyError:
+            raise PatternError(f"Unknown pattern {name!r}") from None
+
+    def names(self, category: Optional[str] = None) -> List[str]:
+        return [name for name, pattern in self.patterns.items()
+                if category is None or pattern.category == category]
+
+
+DEFAULT_LIBRARY = PatternLibrary()
+P = PatternParameter
+
+
+@DEFAULT_LIBRARY.pattern(
+    "scatter",
+    P("sources", "strings", description="Objects to instance"),
+    P("count", "int", 100, minimum=1, maximum=100000),
+    P("radius", "float", 1000.0, minimum=0),
+    P("height_variation", "float", 200.0, minimum=0),
+    P("jitter", "float", 50.0, minimum=0),
+    P("scale_min", "float", 0.7, minimum=0),
+    P("scale_max", "float", 1.3, minimum=0),
+    P("seed", "int", None),
+)
+def instance_scatter(doc, parent, params):
+    """Render instances of the sources on a jittered golden-angle spiral"""
+    import c4d
+    import math
+    import random
+
+    sources = [obj for obj in (find_object(name, doc) for name in params["sources"]) if obj]
+    if not sources:
+        raise ValueError(f"Source objects not found: {params['sources']}")
+
+    rng = random.Random(params["seed"])
+    count = params["count"]
+    radius = params["radius"]
+    jitter = params["jitter"]
+    half_height = params["height_variation"] / 2
+    instances = []
+    for i in range(count):
+        source = rng.choice(sources)
+        instance = c4d.BaseObject(c4d.Oinstance)
+        instance.SetName(source.GetName())
+        instance[c4d.INSTANCEOBJECT_LINK] = source
+        instance[c4d.INSTANCEOBJECT_RENDERINSTANCE] = True
+
+        angle = math.radians(i * 137.5)
+        distance = math.sqrt(i) * (radius / math.sqrt(count))
+        instance.SetAbsPos(c4d.Vector(distance * math.cos(angle) + rng.uniform(-jitter, jitter),
+                                      rng.uniform(-half_height, half_height),
+                                      distance * math.sin(angle) + rng.uniform(-jitter, jitter)))
+        instance.SetAbsRot(c4d.Vector(rng.uniform(0, math.pi * 2), 0, 0))
+        scale = rng.uniform(params["scale_min"], params["scale_max"])
+        instance.SetAbsScale(c4d.Vector(scale, scale, scale))
+        instances.append(instance)
+
+    for instance in reversed(instances):
+        instance.InsertUnder(parent)
+    return {"instances": count}
+
+
+@DEFAULT_LIBRARY.pattern(
+    "growth",
+    P("target", "string", description="Object to grow"),
+    P("strength", "float", 50.0),
+    P("noise_scale", "float", 0.2, minimum=0),
+    P("noise_seed", "int", 12345),
+    P("start_radius", "float", 10.0, minimum=0),
+    P("end_radius", "float", 500.0, minimum=0),
+    P("duration", "float", 2.0, minimum=0.01, description="Growth time in seconds"),
+)
+def organic_growth(doc, parent, params):
+    """Noise displacement and jiggle on the target, driven by a growing sphere field"""
+    import c4d
+
+    target = find_object(params["target"], doc)
+    if target is None:
+        raise ValueError(f"Target object not found: {params['target']}")
+
+    displacer = c4d.BaseObject(c4d.Odisplace)
+    displacer.SetName("Organic Displacer")
+    strength = params["strength"]
+    displacer[c4d.DISPLACE_STRENGTH] = c4d.Vector(strength, strength, strength)
+    noise = c4d.BaseShader(c4d.Xnoise)
+    noise[c4d.SLA_NOISE_SEED] = params["noise_seed"]
+    noise[c4d.SLA_NOISE_SCALE] = params["noise_scale"]
+    noise[c4d.SLA_NOISE_OCTAVES] = 3
+    displacer.InsertShader(noise)
+    displacer[c4d.DISPLACE_SHADING_SHADER] = noise
+    displacer.InsertUnder(target)
+
+    jiggle = c4d.BaseObject(c4d.Ojiggle)
+    jiggle.SetName("Organic Jiggle")
+    jiggle[c4d.JIGGLE_SPRING] = 30
+    jiggle[c4d.JIGGLE_DRAG] = 10
+    jiggle.InsertUnder(target)
+
+    # The field lives under the pattern's null, its radius animates the growth
+    growth_field = c4d.BaseObject(c4d.Ospherefield)
+    growth_field.SetName("Growth Field")
+    growth_field[c4d.FIELD_INNER_OFFSET] = 0.8
+    growth_field.InsertUnder(parent)
+
+    track = c4d.CTrack(growth_field, c4d.DescID(c4d.DescLevel(c4d.PRIM_SPHERE_RAD, c4d.DTYPE_REAL, 0)))
+    growth_field.InsertTrackSorted(track)
+    curve = track.GetCurve()
+    for seconds, value in ((0.0, params["start_radius"]), (params["duration"], params["end_radius"])):
+        key = c4d.CKey()
+        key.SetTime(curve, c4d.BaseTime(seconds))
+        key.SetValue(curve, value)
+        key.SetInterpolation(curve, c4d.CINTERPOLATION_SPLINE)
+        curve.InsertKey(key)
+
+    fields = c4d.InExcludeData()
+    fields.InsertObject(growth_field, 0)
+    displacer[c4d.FIELDS] = fields
+    return {"target": target.GetName()}
+
+
+@DEFAULT_LIBRARY.pattern(
+    "lighting",
+    P("target", "vector", [0.0, 0.0, 0.0], description="Point the key and rim lights aim at"),
+    P("distance", "float", 1000.0, minimum=0),
+    P("key_brightness", "float", 150.0, minimum=0),
+    P("fill_brightness", "float", 50.0, minimum=0),
+    P("rim_brightness", "float", 200.0, minimum=0),
+    P("key_color", "vector", [1.0, 0.95, 0.8]),
+    P("fill_color", "vector", [0.7, 0.8, 1.0]),
+    P("volumetric", "bool", False),
+)
+def three_point_lights(doc, parent, params):
+    """Key, fill and rim lights around a target null"""
+    import c4d
+    import math
+
+    tx, ty, tz = params["target"]
+    distance = params["distance"]
+    target = c4d.BaseObject(c4d.Onull)
+    target.SetName("Light Target")
+    target.SetAbsPos(c4d.Vector(tx, ty, tz))
+
+    def light(name, light_type, color, brightness, offset, aimed):
+        obj = c4d.BaseObject(c4d.Olight)
+        obj.SetName(name)
+        obj[c4d.LIGHT_TYPE] = light_type
+        obj[c4d.LIGHT_COLOR] = c4d.Vector(*color)
+        obj[c4d.LIGHT_BRIGHTNESS] = brightness
+        obj.SetAbsPos(c4d.Vector(tx + offset[0] * distance, ty + offset[1] * distance,
+                                 tz + offset[2] * distance))
+        if aimed:
+            obj[c4d.LIGHT_DETAILS_OUTERANGLE] = math.radians(60)
+            obj[c4d.LIGHT_VISIBILITY_VOLUMETRIC] = params["volumetric"]
+            tag = obj.MakeTag(c4d.Ttargetexpression)
+            tag[c4d.TARGETEXPRESSIONTAG_LINK] = target
+        return obj
+
+    lights = [
+        light("Key Light", c4d.LIGHT_TYPE_SPOT, params["key_color"], params["key_brightness"],
+              (0.5, 0.8, -0.5), True),
+        light("Fill Light", c4d.LIGHT_TYPE_AREA, params["fill_color"], params["fill_brightness"],
+              (-0.8, 0.4, 0.3), False),
+        light("Rim Light", c4d.LIGHT_TYPE_SPOT, [0.9, 0.9, 1.0], params["rim_brightness"],
+              (0.0, 0.6, 0.8), True),
+    ]
+    for obj in reversed(lights + [target]):
+        obj.InsertUnder(parent)
+    return {"lights": len(lights)}
+
+
+@DEFAULT_LIBRARY.pattern(
+    "materials",
+    P("prefix", "string", "Material"),
+    P("colors", "vectors", description="One material per color"),
+    P("roughness", "float", 0.3, minimum=0, maximum=1),
+    P("reuse", "bool", True, description="Keep materials that already exist under the same name"),
+)
+def material_set(doc, parent, params):
+    """Standard materials named <prefix> <n>, one per color"""
+    import c4d
+
+    created = []
+    for i, color in enumerate(params["colors"], 1):
+        name = f"{params['prefix']} {i}"
+        if params["reuse"] and find_material(name, doc) is not None:
+            continue
+        mat = c4d.BaseMaterial(c4d.Mmaterial)
+        mat.SetName(name)
+        mat[c4d.MATERIAL_COLOR_COLOR] = c4d.Vector(*color)
+        mat[c4d.MATERIAL_USE_REFLECTION] = True
+        mat[c4d.MATERIAL_REFLECTION_BRIGHTNESS] = 1.0 - params["roughness"]
+        doc.InsertMaterial(mat)
+        created.append(name)
+    return {"created": created}
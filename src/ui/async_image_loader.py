@@ -1,267 +1,820 @@
 """
 Asynchronous image loading system for improved UI performance.
+
+Loads run on a fixed pool of worker threads fed by a priority queue, so a
+folder of thousands of images never means thousands of threads. Thumbnails
+in the viewport are loaded first, and requests for images that scrolled away
+are cancelled before they reach a worker. Bulk preloads of a whole gallery
+are decoded in a process pool instead (see bulk_decode).
+
+Callers can also ask for a blurred preview. It comes from the memory or disk
+cache in a boosted first pass through the queue, or, on a cold cache, from
+the reduced image before the final resize.
 """
 
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Deque, List, Tuple
+from collections import OrderedDict, deque
+import hashlib
+import heapq
+import io
+import itertools
+import os
+import threading
 import time
-import weakref
-from functools import lru_cache
 
-from PySide6.QtCore import QThread, Signal, QMutex, QMutexLocker, QTimer
+from PySide6.QtCore import QCoreApplication, QObject, QSettings, QThread, QTimer, Qt, Signal
 from PySide6.QtGui import QPixmap, QImage
 from PIL import Image
 from loguru import logger
 
+from .bulk_decode import BYTES_PER_PIXEL, BulkDecoder, pack_pixels
+from .thumbnail_decode import PREVIEW_SIZE, decode_reduced, finish_thumbnail, make_preview, thumbnail_size
+from .thumbnail_store import ThumbnailStore, THUMBNAIL_CACHE_DIR
 
-class AsyncImageLoader(QThread):
-    """Background thread for loading and processing images"""
-    
-    image_loaded = Signal(Path, QPixmap, int)  # path, pixmap, size
-    loading_failed = Signal(Path, str)  # path, error_message
+# Load priorities, higher runs first
+PRIORITY_BACKGROUND = 0  # preloads and thumbnails far off-screen
+PRIORITY_NEARBY = 1      # within about a screen of the viewport
+PRIORITY_VISIBLE = 2     # in the viewport
+
+# Tasks still waiting for their preview rank just above the same priority
+PREVIEW_BOOST = 0.5
+
+# Cache size key for blurred previews, negative so it never names a real thumbnail
+PREVIEW_KEY_SIZE = -PREVIEW_SIZE
+
+# GUI-thread time per event loop pass spent turning decoded images into pixmaps
+CONVERT_BUDGET_MS = 8
+
+
+def default_disk_cache_mb() -> int:
+    """Disk thumbnail budget: the "Cache size" performance setting"""
+    return QSettings("ComfyUI-Cinema4D", "Bridge").value("performance/cache_size", 1000, type=int)
+
+
+def default_worker_count(max_operations: Optional[int] = None) -> int:
+    """Worker threads: the "Max concurrent operations" setting, capped by CPU count"""
+    if max_operations is None:
+        settings = QSettings("ComfyUI-Cinema4D", "Bridge")
+        max_operations = settings.value("performance/max_operations", 4, type=int)
+    return max(1, min(int(max_operations), os.cpu_count() or 1))
+
+
+class ImageLoadTask:
+    """One image and size to load, shared by every caller waiting for it"""
     
-    def __init__(self, image_path: Path, size: int, cache_manager=None):
-        super().__init__()
+    def __init__(self, image_path: Path, size: int, priority: int):
         self.image_path = image_path
         self.size = size
-        self.cache_manager = cache_manager
-        self._cancelled = False
-        
-    def cancel(self):
-        """Cancel the loading operation"""
-        self._cancelled = True
-        
-    def run(self):
-        """Load image in background thread"""
-        if self._cancelled:
-            return
-            
-        try:
-            # Check cache first if cache manager is available
-            if self.cache_manager:
-                cached_pixmap = self.cache_manager.get_cached_pixmap(self.image_path, self.size)
-                if cached_pixmap and not self._cancelled:
-                    self.image_loaded.emit(self.image_path, cached_pixmap, self.size)
-                    return
-            
-            # Load and process image
-            img = Image.open(self.image_path)
-            
-            if self._cancelled:
+        self.priority = priority
+        self.callbacks: List[Callable] = []
+        self.preview_callbacks: List[Callable] = []
+        self.error_callbacks: List[Callable] = []
+        self.preview_pending = False  # first pass: look for a cached preview
+        self.preview_sent = False
+        self.cancelled = False
+        self.entry: Optional[int] = None  # sequence number of its live queue entry, None once taken
+        self.image: Optional[QImage] = None  # decoded, waiting for pixmap conversion
+        self.pixels: Optional[bytes] = None  # the buffer self.image points into
+        self.bulk = False  # waiting for a slot in the bulk decoder
+        self.preload = False  # keeps loading after every caller has withdrawn
+
+
+class ImageLoadQueue:
+    """Priority queue of load tasks shared by the worker threads.
+    
+    Entries are never searched for or removed: reprioritizing pushes a new
+    entry and cancelling only marks the task, so both are O(log n) at most.
+    Stale entries are dropped when they reach the front.
+    """
+    
+    def __init__(self):
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._stop_requests = 0
+    
+    @staticmethod
+    def _rank(task: ImageLoadTask) -> float:
+        return -(task.priority + PREVIEW_BOOST) if task.preview_pending else -task.priority
+    
+    def push(self, task: ImageLoadTask):
+        with self._condition:
+            if task.cancelled:
                 return
-                
-            # Create thumbnail
-            img.thumbnail((self.size, self.size), Image.Resampling.LANCZOS)
-            
-            if self._cancelled:
+            task.entry = next(self._sequence)
+            heapq.heappush(self._heap, (self._rank(task), task.entry, task))
+            self._condition.notify()
+    
+    def reprioritize(self, task: ImageLoadTask, priority: int) -> bool:
+        """Move a task that is still waiting, False if a worker already has it"""
+        with self._condition:
+            if task.entry is None:
+                return False
+            task.priority = priority
+            task.entry = next(self._sequence)
+            heapq.heappush(self._heap, (self._rank(task), task.entry, task))
+            return True
+    
+    def discard(self, task: ImageLoadTask) -> bool:
+        """Cancel a task, True if no worker had picked it up yet"""
+        with self._condition:
+            task.cancelled = True
+            waiting = task.entry is not None
+            task.entry = None
+            return waiting
+    
+    def pop(self) -> Optional[ImageLoadTask]:
+        """Next task to run, blocking until there is one. None tells the worker to exit."""
+        with self._condition:
+            while True:
+                if self._stop_requests:
+                    self._stop_requests -= 1
+                    return None
+                while self._heap:
+                    _, entry, task = heapq.heappop(self._heap)
+                    if entry == task.entry:
+                        task.entry = None
+                        return task
+                self._condition.wait()
+    
+    def stop_workers(self, count: int):
+        """Ask count workers to exit once they are idle"""
+        with self._condition:
+            self._stop_requests += count
+            self._condition.notify_all()
+    
+    def clear(self):
+        with self._condition:
+            for _, entry, task in self._heap:
+                if entry == task.entry:
+                    task.cancelled = True
+                    task.entry = None
+            self._heap.clear()
+    
+    def __len__(self) -> int:
+        with self._condition:
+            return sum(1 for _, entry, task in self._heap if entry == task.entry)
+
+
+def to_qimage(img: Image.Image) -> Tuple[QImage, bytes]:
+    """QImage over a single packed copy of the pixels, safe to build on any thread.
+    
+    Pixels are packed in the 32-bit layout raster pixmaps use (little-endian
+    BGRA, premultiplied when there is alpha), so QPixmap.fromImage on the GUI
+    thread is a plain copy instead of a per-pixel conversion. The QImage does
+    not own the buffer: keep the returned bytes alive as long as the image.
+    """
+    pixels = pack_pixels(img)
+    return wrap_pixels(pixels, img.width, img.height, img.mode == "RGBA"), pixels
+
+
+def wrap_pixels(pixels, width: int, height: int, alpha: bool) -> QImage:
+    """QImage over pixels packed by pack_pixels, without copying them"""
+    image_format = QImage.Format_ARGB32_Premultiplied if alpha else QImage.Format_RGB32
+    return QImage(pixels, width, height, width * BYTES_PER_PIXEL, image_format)
+
+
+class ImageLoadSignals(QObject):
+    """Results from the workers, delivered on the thread that owns this object"""
+    
+    image_decoded = Signal(object)  # task, with its QImage ready
+    preview_decoded = Signal(object, object)  # task, (QImage, pixels) of its preview
+    bulk_finished = Signal(object)  # future of a bulk decode, from the pool's thread
+    loading_failed = Signal(object, str)  # task, error_message
+
+
+class ImageLoadWorker(QThread):
+    """Pool thread that loads queued images until asked to stop"""
+    
+    def __init__(self, queue: ImageLoadQueue, signals: ImageLoadSignals,
+                 disk_cache: Optional[ThumbnailStore] = None):
+        super().__init__()
+        self.queue = queue
+        self.signals = signals
+        self.disk_cache = disk_cache
+    
+    def run(self):
+        while True:
+            task = self.queue.pop()
+            if task is None:
                 return
             
-            # Convert to QPixmap
-            if img.mode == "RGBA":
-                data = img.tobytes("raw", "RGBA")
-                qimage = QImage(data, img.width, img.height, QImage.Format_RGBA8888)
-            else:
-                img = img.convert("RGB")
-                data = img.tobytes("raw", "RGB")
-                qimage = QImage(data, img.width, img.height, QImage.Format_RGB888)
-            
-            if self._cancelled:
-                return
+            try:
+                if task.preview_pending:
+                    task.preview_pending = False
+                    if self._cached_preview(task):
+                        self.queue.push(task)  # the crisp pass, at the task's own priority
+                        continue
                 
-            pixmap = QPixmap.fromImage(qimage)
+                result = self._thumbnail(task)
+                if result is None or task.cancelled:
+                    continue
+                img, source = result
+                # QPixmap is GUI-thread only, the manager converts the QImage
+                task.image, task.pixels = to_qimage(img)
+            except Exception as e:
+                if not task.cancelled:
+                    logger.error(f"Failed to load {task.image_path}: {e}")
+                    self.signals.loading_failed.emit(task, str(e))
+                continue
             
-            # Cache the result if cache manager is available
-            if self.cache_manager and not self._cancelled:
-                self.cache_manager.cache_pixmap(self.image_path, self.size, pixmap)
+            if not task.cancelled:
+                self.signals.image_decoded.emit(task)
+            if source is not None:
+                try:
+                    self._store(task, img, *source)
+                except Exception as e:
+                    logger.warning(f"Failed to cache thumbnail for {task.image_path}: {e}")
+    
+    def _cached_preview(self, task: ImageLoadTask) -> bool:
+        """Deliver a preview from the disk cache, unless the thumbnail itself is there"""
+        if not self.disk_cache or self.disk_cache.lookup(task.image_path, task.size) is not None:
+            return False
+        preview = self.disk_cache.get(task.image_path, PREVIEW_KEY_SIZE)
+        if preview is None:
+            return False
+        self._emit_preview(task, preview)
+        return True
+    
+    def _emit_preview(self, task: ImageLoadTask, preview: Image.Image):
+        if preview.mode not in ("RGB", "RGBA"):
+            preview = preview.convert("RGB")
+        if not task.cancelled:
+            task.preview_sent = True
+            self.signals.preview_decoded.emit(task, to_qimage(preview))
+    
+    def _thumbnail(self, task: ImageLoadTask) -> Optional[Tuple[Image.Image, Optional[tuple]]]:
+        """RGB or RGBA thumbnail from the disk cache, or decoded from the original.
+        
+        Decoded thumbnails come with what _store needs to cache them:
+        the source bytes, their stat and the preview.
+        """
+        if self.disk_cache:
+            img = self.disk_cache.get(task.image_path, task.size)
+            if img is not None:
+                return (img if img.mode in ("RGB", "RGBA") else img.convert("RGB")), None
+        
+        # Load and process image, from bytes read once for both decoding and hashing
+        stat = os.stat(task.image_path)
+        data = task.image_path.read_bytes()
+        
+        if task.cancelled:
+            return None
             
-            # Emit result
-            if not self._cancelled:
-                self.image_loaded.emit(self.image_path, pixmap, self.size)
-                
-        except Exception as e:
-            if not self._cancelled:
-                logger.error(f"Failed to load {self.image_path}: {e}")
-                self.loading_failed.emit(self.image_path, str(e))
+        # Create thumbnail, the preview goes out before the final resize
+        img, target = decode_reduced(io.BytesIO(data), task.size)
+        preview = None
+        if self.disk_cache or task.preview_callbacks:
+            preview = make_preview(img)
+            if task.preview_callbacks and not task.preview_sent:
+                self._emit_preview(task, preview)
+        
+        if task.cancelled:
+            return None
+        return finish_thumbnail(img, target), (data, stat, preview)
+    
+    def _store(self, task: ImageLoadTask, img: Image.Image, data: bytes, stat: os.stat_result,
+               preview: Optional[Image.Image]):
+        """Write a decoded thumbnail and its preview to the disk cache, off the critical path"""
+        if not self.disk_cache:
+            return
+        digest = hashlib.sha1(data).hexdigest()
+        self.disk_cache.put(task.image_path, task.size, img, digest, stat)
+        if preview is not None:
+            self.disk_cache.put(task.image_path, PREVIEW_KEY_SIZE, preview, digest, stat)
 
 
 class QPixmapCache:
-    """Thread-safe QPixmap cache with LRU eviction"""
+    """Thread-safe QPixmap cache with LRU eviction.
+    
+    Entries are kept in recency order, so a hit and an eviction are both
+    O(1). Sizes are the pixmap's real footprint (width x height x depth).
+    The sizes cached for each image are tracked as a rendition family, so
+    a size can be derived from a larger one instead of decoded again.
+    A plain lock rather than QMutexLocker, whose context manager leaks a
+    reference to None on every exit in current PySide6 releases.
+    """
     
     def __init__(self, max_size_mb: int = 50):
         self.max_size_bytes = max_size_mb * 1024 * 1024
         self.current_size = 0
-        self.cache: Dict[str, Dict[str, Any]] = {}
-        self.access_times: Dict[str, float] = {}
-        self.mutex = QMutex()
+        self.cache: "OrderedDict[str, Tuple[QPixmap, int, str, int]]" = OrderedDict()  # oldest first
+        self.renditions: Dict[str, Dict[int, str]] = {}  # image path -> {size: cache key}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
         
     def _generate_cache_key(self, image_path: Path, size: int) -> str:
         """Generate cache key for image and size"""
         return f"{image_path.as_posix()}_{size}"
     
+    def _forget_rendition(self, path_key: str, size: int):
+        """Drop a size from its image's family (caller holds the lock)"""
+        family = self.renditions.get(path_key)
+        if family is not None:
+            family.pop(size, None)
+            if not family:
+                del self.renditions[path_key]
+    
+    @staticmethod
+    def _pixmap_bytes(pixmap: QPixmap) -> int:
+        """Memory held by a pixmap, from its bit depth rather than assuming RGBA"""
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+    
     def get_cached_pixmap(self, image_path: Path, size: int) -> Optional[QPixmap]:
         """Get cached pixmap if available"""
         cache_key = self._generate_cache_key(image_path, size)
         
-        with QMutexLocker(self.mutex):
-            if cache_key in self.cache:
-                self.access_times[cache_key] = time.time()
-                return self.cache[cache_key]['pixmap']
-        
-        return None
+        with self.lock:
+            entry = self.cache.get(cache_key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.cache.move_to_end(cache_key)
+            self.hits += 1
+            return entry[0]
+    
+    def get_larger_rendition(self, image_path: Path, size: int) -> Optional[QPixmap]:
+        """The smallest cached rendition of an image bigger than size, if any"""
+        with self.lock:
+            family = self.renditions.get(image_path.as_posix())
+            larger = [cached for cached in family if cached > size] if family else None
+            if not larger:
+                return None
+            cache_key = family[min(larger)]
+            self.cache.move_to_end(cache_key)
+            return self.cache[cache_key][0]
     
     def cache_pixmap(self, image_path: Path, size: int, pixmap: QPixmap):
         """Cache a pixmap with size management"""
         cache_key = self._generate_cache_key(image_path, size)
+        pixmap_size = self._pixmap_bytes(pixmap)
         
-        # Estimate pixmap size (width * height * 4 bytes for RGBA)
-        pixmap_size = pixmap.width() * pixmap.height() * 4
-        
-        with QMutexLocker(self.mutex):
+        with self.lock:
+            # Replacing an entry frees its bytes first
+            previous = self.cache.pop(cache_key, None)
+            if previous is not None:
+                self.current_size -= previous[1]
+                self._forget_rendition(previous[2], previous[3])
+            
+            if pixmap_size > self.max_size_bytes:
+                logger.debug(f"Not caching {cache_key}, {pixmap_size} bytes exceed the cache budget")
+                return
+            
             # Check if we need to evict items
             while self.current_size + pixmap_size > self.max_size_bytes and self.cache:
                 self._evict_oldest_item()
             
-            # Add new item
-            self.cache[cache_key] = {
-                'pixmap': pixmap,
-                'size': pixmap_size,
-                'timestamp': time.time()
-            }
-            self.access_times[cache_key] = time.time()
+            path_key = image_path.as_posix()
+            self.cache[cache_key] = (pixmap, pixmap_size, path_key, size)
+            self.renditions.setdefault(path_key, {})[size] = cache_key
             self.current_size += pixmap_size
             
             logger.debug(f"Cached pixmap {cache_key}, cache size: {self.current_size / 1024 / 1024:.1f}MB")
     
     def _evict_oldest_item(self):
-        """Evict the least recently used item"""
-        if not self.access_times:
-            return
-            
-        # Find oldest item
-        oldest_key = min(self.access_times.keys(), key=lambda k: self.access_times[k])
-        
-        # Remove from cache
-        if oldest_key in self.cache:
-            item_size = self.cache[oldest_key]['size']
-            self.current_size -= item_size
-            del self.cache[oldest_key]
-            del self.access_times[oldest_key]
-            logger.debug(f"Evicted {oldest_key} from cache")
+        """Evict the least recently used item (caller holds the lock)"""
+        oldest_key, (_, item_size, path_key, size) = self.cache.popitem(last=False)
+        self.current_size -= item_size
+        self._forget_rendition(path_key, size)
+        self.evictions += 1
+        logger.debug(f"Evicted {oldest_key} from cache")
     
     def clear(self):
         """Clear entire cache"""
-        with QMutexLocker(self.mutex):
+        with self.lock:
             self.cache.clear()
-            self.access_times.clear()
+            self.renditions.clear()
             self.current_size = 0
             logger.info("Cleared image cache")
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        with QMutexLocker(self.mutex):
+        with self.lock:
+            lookups = self.hits + self.misses
             return {
                 'size_mb': self.current_size / 1024 / 1024,
                 'max_size_mb': self.max_size_bytes / 1024 / 1024,
                 'item_count': len(self.cache),
-                'utilization': self.current_size / self.max_size_bytes
+                'image_count': len(self.renditions),
+                'utilization': self.current_size / self.max_size_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions
             }
 
 
 class AsyncImageManager:
     """Manages asynchronous image loading with caching"""
     
-    def __init__(self, cache_size_mb: int = 50):
+    def __init__(self, cache_size_mb: int = 50, max_workers: Optional[int] = None,
+                 disk_cache_dir: Optional[Path] = THUMBNAIL_CACHE_DIR):
         self.cache = QPixmapCache(cache_size_mb)
-        self.active_loaders: Dict[str, AsyncImageLoader] = {}
-        self.pending_requests: Dict[str, list] = {}  # Track multiple requests for same image
+        self.disk_cache = ThumbnailStore(disk_cache_dir, default_disk_cache_mb()) if disk_cache_dir else None
+        self.queue = ImageLoadQueue()
+        self.signals = ImageLoadSignals()
+        self.signals.image_decoded.connect(self._on_image_decoded)
+        self.signals.preview_decoded.connect(self._on_preview_decoded)
+        self.signals.loading_failed.connect(self._on_loading_failed)
+        self.signals.bulk_finished.connect(self._on_bulk_finished)
+        self.max_workers = default_worker_count(max_workers)
+        self.workers: List[ImageLoadWorker] = []
+        self.active_loaders: Dict[str, ImageLoadTask] = {}  # queued or running, by cache key
+        self.stats = {'requested': 0, 'loaded': 0, 'failed': 0, 'cancelled': 0, 'reprioritized': 0,
+                      'derived': 0}
+        self._shutdown_hooked = False
         
-    def load_image_async(self, image_path: Path, size: int, callback=None):
-        """Load image asynchronously with caching"""
-        cache_key = f"{image_path.as_posix()}_{size}"
+        # Bulk preloads: tasks waiting for a slot, and decodes running in the pool
+        self._bulk: Optional[BulkDecoder] = None
+        self._bulk_pending: Deque[ImageLoadTask] = deque()
+        self._bulk_futures: Dict[Any, Tuple[ImageLoadTask, int]] = {}  # future -> task, slot
         
-        # Check cache first
-        cached_pixmap = self.cache.get_cached_pixmap(image_path, size)
+        # Decoded images waiting to become pixmaps, converted in frame-sized batches
+        self._decoded: Deque[ImageLoadTask] = deque()
+        self._convert_timer = QTimer()
+        self._convert_timer.setInterval(0)
+        self._convert_timer.timeout.connect(self._convert_decoded)
+        
+        # The disk index is written once loading has been quiet for a moment
+        self._flush_timer = QTimer()
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(2000)
+        self._flush_timer.timeout.connect(self.flush_disk_cache)
+    
+    @staticmethod
+    def _cache_key(image_path: Path, size: int) -> str:
+        return f"{image_path.as_posix()}_{size}"
+    
+    def _ensure_workers(self):
+        """Start the pool on first use, with a clean shutdown when the app quits"""
+        if self.workers:
+            return
+        self._hook_shutdown()
+        self._start_workers(self.max_workers)
+    
+    def _hook_shutdown(self):
+        if self._shutdown_hooked:
+            return
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+            self._shutdown_hooked = True
+    
+    def _start_workers(self, count: int):
+        for _ in range(count):
+            worker = ImageLoadWorker(self.queue, self.signals, self.disk_cache)
+            worker.finished.connect(lambda worker=worker: self._on_worker_finished(worker))
+            self.workers.append(worker)
+            worker.start(QThread.LowPriority)
+    
+    def _on_worker_finished(self, worker: ImageLoadWorker):
+        if worker in self.workers:
+            self.workers.remove(worker)
+        worker.deleteLater()
+    
+    def set_max_workers(self, max_operations: int):
+        """Resize the pool, e.g. when "Max concurrent operations" changes"""
+        count = default_worker_count(max_operations)
+        if self.workers:
+            if count > self.max_workers:
+                self._start_workers(count - self.max_workers)
+            elif count < self.max_workers:
+                self.queue.stop_workers(self.max_workers - count)
+        self.max_workers = count
+        logger.debug(f"Image loader pool set to {count} workers")
+        
+    def load_image_async(self, image_path: Path, size: int, callback=None,
+                         priority: int = PRIORITY_VISIBLE, preview_callback=None,
+                         error_callback=None):
+        """Load image asynchronously with caching.
+        
+        preview_callback, called like callback, gets a tiny blurred preview
+        first if the thumbnail is not cached yet. error_callback is called
+        with (image_path, error_message, size) if the load fails.
+        """
+        cache_key = self._cache_key(image_path, size)
+        
+        # Check cache first, then for a larger size to scale down (zoom changes)
+        cached_pixmap = self.cache.get_cached_pixmap(image_path, size) or self._derive(image_path, size)
         if cached_pixmap:
             if callback:
                 callback(image_path, cached_pixmap, size)
             return
         
+        if preview_callback:
+            preview = self.cache.get_cached_pixmap(image_path, PREVIEW_KEY_SIZE)
+            if preview:
+                preview_callback(image_path, preview, size)
+                preview_callback = None
+        
         # Check if already loading
-        if cache_key in self.active_loaders:
-            # Add callback to pending requests
-            if cache_key not in self.pending_requests:
-                self.pending_requests[cache_key] = []
-            if callback:
-                self.pending_requests[cache_key].append(callback)
+        task = self.active_loaders.get(cache_key)
+        if task is not None:
+            if callback and callback not in task.callbacks:
+                task.callbacks.append(callback)
+            if preview_callback and preview_callback not in task.preview_callbacks:
+                task.preview_callbacks.append(preview_callback)
+            if error_callback and error_callback not in task.error_callbacks:
+                task.error_callbacks.append(error_callback)
+            if priority > task.priority:
+                self.set_priority(image_path, size, priority)
             return
         
-        # Start new loading task
-        loader = AsyncImageLoader(image_path, size, self.cache)
-        loader.image_loaded.connect(lambda path, pixmap, sz: self._on_image_loaded(path, pixmap, sz, cache_key))
-        loader.loading_failed.connect(lambda path, error: self._on_loading_failed(path, error, cache_key))
-        
-        # Add initial callback
-        if cache_key not in self.pending_requests:
-            self.pending_requests[cache_key] = []
+        # Queue new loading task, looking for a cached preview first if one is wanted
+        task = ImageLoadTask(image_path, size, priority)
         if callback:
-            self.pending_requests[cache_key].append(callback)
+            task.callbacks.append(callback)
+        if preview_callback:
+            task.preview_callbacks.append(preview_callback)
+            task.preview_pending = self.disk_cache is not None
+        if error_callback:
+            task.error_callbacks.append(error_callback)
+        self.active_loaders[cache_key] = task
+        self.stats['requested'] += 1
+        self._ensure_workers()
+        self.queue.push(task)
+    
+    def _derive(self, image_path: Path, size: int) -> Optional[QPixmap]:
+        """A rendition scaled down from a larger cached one, cached in turn.
         
-        self.active_loaders[cache_key] = loader
-        loader.start()
+        A smooth downscale of a thumbnail costs well under a millisecond,
+        against a disk read and decode of the original.
+        """
+        pixmap = self.cache.get_larger_rendition(image_path, size)
+        if pixmap is None:
+            return None
+        if max(pixmap.width(), pixmap.height()) > size:
+            width, height = thumbnail_size(pixmap.width(), pixmap.height(), size)
+            pixmap = pixmap.scaled(width, height, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        self.cache.cache_pixmap(image_path, size, pixmap)
+        self.stats['derived'] += 1
+        return pixmap
+    
+    def set_priority(self, image_path: Path, size: int, priority: int) -> bool:
+        """Move a waiting request up or down the queue"""
+        task = self.active_loaders.get(self._cache_key(image_path, size))
+        if task is None or task.priority == priority:
+            return False
+        if task.bulk and priority > PRIORITY_BACKGROUND:
+            # Needed now: leave the bulk backlog for the thread pool
+            task.bulk = False
+            task.priority = priority
+            self._ensure_workers()
+            self.queue.push(task)
+            self.stats['reprioritized'] += 1
+            return True
+        if self.queue.reprioritize(task, priority):
+            self.stats['reprioritized'] += 1
+            return True
+        return False
+    
+    def cancel(self, image_path: Path, size: int, callback=None, preview_callback=None,
+               error_callback=None) -> bool:
+        """Withdraw a request. The load itself stops once nobody is waiting for it,
+        unless it is a bulk preload, which only an explicit cancel without a callback stops.
+        """
+        cache_key = self._cache_key(image_path, size)
+        task = self.active_loaders.get(cache_key)
+        if task is None:
+            return False
+        if callback is not None and callback in task.callbacks:
+            task.callbacks.remove(callback)
+        if preview_callback is not None and preview_callback in task.preview_callbacks:
+            task.preview_callbacks.remove(preview_callback)
+        if error_callback is not None and error_callback in task.error_callbacks:
+            task.error_callbacks.remove(error_callback)
+        if callback is not None and (task.callbacks or task.preload):
+            return False
         
-    def _on_image_loaded(self, image_path: Path, pixmap: QPixmap, size: int, cache_key: str):
-        """Handle successful image loading"""
-        # Call all pending callbacks
-        if cache_key in self.pending_requests:
-            for callback in self.pending_requests[cache_key]:
-                try:
-                    callback(image_path, pixmap, size)
-                except Exception as e:
-                    logger.error(f"Error in image load callback: {e}")
-            del self.pending_requests[cache_key]
+        # A queued task never reaches a worker, a running one drops its result
+        self.queue.discard(task)
+        del self.active_loaders[cache_key]
+        self.stats['cancelled'] += 1
+        return True
         
-        # Clean up loader
-        if cache_key in self.active_loaders:
-            self.active_loaders[cache_key].deleteLater()
-            del self.active_loaders[cache_key]
-    
-    def _on_loading_failed(self, image_path: Path, error: str, cache_key: str):
-        """Handle failed image loading"""
-        logger.error(f"Failed to load image {image_path}: {error}")
+    def _on_preview_decoded(self, task: ImageLoadTask, decoded: tuple):
+        """Previews are a few KB, converted right away rather than batched"""
+        image, _pixels = decoded
+        pixmap = QPixmap.fromImage(image)
+        self.cache.cache_pixmap(task.image_path, PREVIEW_KEY_SIZE, pixmap)
+        if self.active_loaders.get(self._cache_key(task.image_path, task.size)) is not task:
+            return
+        for callback in task.preview_callbacks:
+            try:
+                callback(task.image_path, pixmap, task.size)
+            except Exception as e:
+                logger.error(f"Error in image preview callback: {e}")
+    
+    def _on_image_decoded(self, task: ImageLoadTask):
+        self._decoded.append(task)
+        if not self._convert_timer.isActive():
+            self._convert_timer.start()
+    
+    def _convert_decoded(self):
+        """Turn decoded images into pixmaps until the frame budget is spent.
         
-        # Clean up pending requests
-        if cache_key in self.pending_requests:
-            del self.pending_requests[cache_key]
+        The timer fires again on the next event loop pass, so painting and
+        input are handled between batches during bulk loads.
+        """
+        deadline = time.perf_counter() + CONVERT_BUDGET_MS / 1000.0
+        while self._decoded:
+            task = self._decoded.popleft()
+            image, task.image, task.pixels = task.image, None, None
+            if self.active_loaders.get(self._cache_key(task.image_path, task.size)) is not task:
+                continue  # cancelled while waiting
+            pixmap = QPixmap.fromImage(image)
+            self.cache.cache_pixmap(task.image_path, task.size, pixmap)
+            self._on_image_loaded(task, pixmap)
+            if time.perf_counter() >= deadline:
+                break
+        if not self._decoded:
+            self._convert_timer.stop()
+    
+    def _on_image_loaded(self, task: ImageLoadTask, pixmap: QPixmap):
+        """Handle successful image loading"""
+        cache_key = self._cache_key(task.image_path, task.size)
+        if self.active_loaders.get(cache_key) is not task:
+            return  # cancelled while the result was on its way
+        del self.active_loaders[cache_key]
+        self.stats['loaded'] += 1
+        if self.disk_cache:
+            self._flush_timer.start()  # workers write to the disk cache after delivering
         
-        # Clean up loader
-        if cache_key in self.active_loaders:
-            self.active_loaders[cache_key].deleteLater()
-            del self.active_loaders[cache_key]
+        # Call all pending callbacks
+        for callback in task.callbacks:
+            try:
+                callback(task.image_path, pixmap, task.size)
+            except Exception as e:
+                logger.error(f"Error in image load callback: {e}")
+    
+    def _on_loading_failed(self, task: ImageLoadTask, error: str):
+        """Handle failed image loading, telling every caller still waiting"""
+        cache_key = self._cache_key(task.image_path, task.size)
+        self.stats['failed'] += 1
+        logger.error(f"Failed to load image {task.image_path}: {error}")
+        if self.active_loaders.get(cache_key) is not task:
+            return  # cancelled, nobody is waiting
+        del self.active_loaders[cache_key]
+        
+        error_callbacks = task.error_callbacks
+        task.callbacks, task.preview_callbacks, task.error_callbacks = [], [], []
+        for callback in error_callbacks:
+            try:
+                callback(task.image_path, error, task.size)
+            except Exception as e:
+                logger.error(f"Error in image error callback: {e}")
     
     def cancel_all_loading(self):
         """Cancel all active loading operations"""
-        for loader in self.active_loaders.values():
-            loader.cancel()
-            loader.wait(1000)  # Wait up to 1 second for thread to finish
-            loader.deleteLater()
-        
+        self.queue.clear()
+        self._bulk_pending.clear()
+        self._decoded.clear()
+        for task in self.active_loaders.values():
+            task.cancelled = True
+        self.stats['cancelled'] += len(self.active_loaders)
         self.active_loaders.clear()
-        self.pending_requests.clear()
     
-    def preload_images(self, image_paths: list, size: int = 256):
-        """Preload multiple images in background"""
+    def shutdown(self):
+        """Cancel everything and stop the worker threads"""
+        self.cancel_all_loading()
+        workers = list(self.workers)
+        self.queue.stop_workers(len(workers))
+        for worker in workers:
+            worker.wait(1000)  # Wait up to 1 second for a running load to finish
+        self.workers.clear()
+        self._stop_bulk()
+        self.flush_disk_cache()
+    
+    def flush_disk_cache(self):
+        """Persist the disk thumbnail index"""
+        if self.disk_cache:
+            self.disk_cache.flush()
+    
+    def set_disk_cache_size(self, max_size_mb: int):
+        """Resize the disk thumbnail budget, e.g. when "Cache size" changes"""
+        if self.disk_cache:
+            self.disk_cache.set_max_size(max_size_mb)
+    
+    def preload_images(self, image_paths: list, size: int = 256, bulk: bool = False,
+                       processes: Optional[int] = None):
+        """Preload multiple images in background.
+        
+        bulk decodes in a pool of worker processes (every core but one unless
+        processes is given) instead of the loader threads, for warming a whole
+        gallery. One bulk size at a time: other sizes use the threads.
+        """
+        image_paths = [Path(image_path) for image_path in image_paths]
+        if bulk and (self._bulk is None or self._bulk.size == size):
+            self._preload_bulk(image_paths, size, processes)
+            return
         for image_path in image_paths:
-            if isinstance(image_path, str):
-                image_path = Path(image_path)
-            self.load_image_async(image_path, size)
+            self.load_image_async(image_path, size, priority=PRIORITY_BACKGROUND)
+    
+    def _preload_bulk(self, image_paths: List[Path], size: int, processes: Optional[int]):
+        for image_path in image_paths:
+            cache_key = self._cache_key(image_path, size)
+            if cache_key in self.active_loaders or self.cache.get_cached_pixmap(image_path, size) \
+                    or self._derive(image_path, size):
+                continue
+            task = ImageLoadTask(image_path, size, PRIORITY_BACKGROUND)
+            task.bulk = task.preload = True
+            self.active_loaders[cache_key] = task
+            self.stats['requested'] += 1
+            self._bulk_pending.append(task)
+        
+        if self._bulk_pending and self._bulk is None:
+            self._hook_shutdown()
+            self._bulk = BulkDecoder(size, processes)
+            logger.debug(f"Bulk image decoding on {self._bulk.processes} processes")
+        self._submit_bulk()
+    
+    def _submit_bulk(self):
+        """Start pending bulk decodes while there are free slots"""
+        if self._bulk is None:
+            return
+        slots = self._bulk.slots
+        while self._bulk_pending and slots.free:
+            task = self._bulk_pending.popleft()
+            if not task.bulk or self.active_loaders.get(self._cache_key(task.image_path, task.size)) is not task:
+                continue  # cancelled, or moved to the thread pool
+            task.bulk = False
+            slot = slots.acquire()
+            cached = self.disk_cache.lookup(task.image_path, task.size) if self.disk_cache else None
+            future = self._bulk.submit(slot, task.image_path, cached,
+                                       self.disk_cache.directory if self.disk_cache else None)
+            self._bulk_futures[future] = (task, slot)
+            future.add_done_callback(self.signals.bulk_finished.emit)
+        
+        if not self._bulk_pending and len(slots.free) == slots.count:
+            self._stop_bulk()  # done, give the memory of the worker processes back
+    
+    def _on_bulk_finished(self, future):
+        entry = self._bulk_futures.pop(future, None)
+        if entry is None:
+            return  # from a decoder that has been shut down
+        task, slot = entry
+        try:
+            if self.active_loaders.get(self._cache_key(task.image_path, task.size)) is not task:
+                return  # cancelled while decoding
+            result = future.result()
+            # Out of the slot right away: raster pixmaps made from a QImage
+            # share its buffer, so they must never point into a reused slot
+            view = self._bulk.slots.view(slot, result["width"] * result["height"] * BYTES_PER_PIXEL)
+            task.pixels = bytes(view)
+            view.release()
+        except Exception as e:
+            self._on_loading_failed(task, str(e))
+            return
+        finally:
+            self._release_slot(slot)
+        
+        if self.disk_cache:
+            if result["cached"]:
+                self.disk_cache.mark_used(task.image_path, task.size)
+            else:
+                self.disk_cache.mark_used(task.image_path, task.size, hit=False)
+                if result["file"]:
+                    self.disk_cache.record(task.image_path, task.size, result["file"],
+                                           result["file_bytes"], result["stat"])
+        
+        task.image = wrap_pixels(task.pixels, result["width"], result["height"], result["alpha"])
+        self._on_image_decoded(task)
+    
+    def _release_slot(self, slot: int):
+        if self._bulk is not None:
+            self._bulk.slots.release(slot)
+            self._submit_bulk()
+    
+    def _stop_bulk(self):
+        if self._bulk is not None:
+            self._bulk.shutdown()
+            self._bulk = None
+        self._bulk_futures.clear()
+        self._bulk_pending.clear()
+    
+    def get_loader_stats(self) -> Dict[str, Any]:
+        """Worker pool and queue statistics"""
+        return dict(self.stats, workers=len(self.workers), max_workers=self.max_workers,
+                    queued=len(self.queue), active=len(self.active_loaders),
+                    awaiting_conversion=len(self._decoded),
+                    bulk_pending=len(self._bulk_pending), bulk_running=len(self._bulk_futures),
+                    bulk_processes=self._bulk.processes if self._bulk else 0)
     
     def get_cache_stats(self):
         """Get cache statistics"""
-        return self.cache.get_cache_stats()
+        stats = self.cache.get_cache_stats()
+        if self.disk_cache:
+            stats['disk'] = self.disk_cache.get_stats()
+        return stats
     
-    def clear_cache(self):
-        """Clear the image cache"""
+    def clear_cache(self, disk: bool = False):
+        """Clear the image cache, and the disk thumbnails if asked to"""
         self.cache.clear()
+        if disk and self.disk_cache:
+            self.disk_cache.clear()
 
 
 # Global instance
@@ -272,4 +825,4 @@ def get_async_image_manager() -> AsyncImageManager:
     global _async_image_manager
     if _async_image_manager is None:
         _async_image_manager = AsyncImageManager()
-    return _async_image_manager
\ No newline at end of file
+    return _async_image_manager
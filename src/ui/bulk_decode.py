@@ -0,0 +1,152 @@
+"""
+Bulk thumbnail decoding in worker processes.
+
+Preloading a whole gallery in threads is bound by the GIL around Pillow's
+Python-level work. Here each image is decoded and resized in a process pool,
+and the packed pixels are written straight into a slot of a shared memory
+block, so only a small result dict is pickled back. The GUI thread wraps the
+slot in a QImage and copies it into a pixmap once.
+
+Nothing in this module imports Qt: it is imported again by every spawned
+worker process.
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+import hashlib
+import io
+import os
+
+from PIL import Image
+
+from .thumbnail_decode import decode_thumbnail
+from .thumbnail_store import thumbnail_name, write_thumbnail
+
+BYTES_PER_PIXEL = 4
+
+
+def default_process_count() -> int:
+    """Every core but one, which stays with the GUI"""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def pack_pixels(img: Image.Image) -> bytes:
+    """Little-endian BGRA, premultiplied with alpha: the layout to_qimage uses"""
+    if img.mode == "RGBA":
+        return img.convert("RGBa").tobytes("raw", "BGRa")
+    return img.convert("RGBA").tobytes("raw", "BGRA")
+
+
+# Shared memory blocks this worker process has attached to, by name
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    block = _attached.get(name)
+    if block is None:
+        for old in _attached.values():
+            old.close()  # the manager moved on to a new block
+        _attached.clear()
+        block = _attached[name] = shared_memory.SharedMemory(name=name)
+    return block
+
+
+def decode_into(block_name: str, offset: int, capacity: int, image_path: str, size: int,
+                cached: Optional[Dict[str, Any]] = None,
+                cache_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Decode one thumbnail into block[offset:offset + capacity] (runs in a worker process).
+
+    cached is the disk cache index entry for the image, used if the source is
+    unchanged. Otherwise the thumbnail is decoded from the original and, given
+    a cache_dir, written there for the manager to index.
+    """
+    stat = os.stat(image_path)
+    result: Dict[str, Any] = {"cached": False, "file": None, "file_bytes": None, "stat": stat}
+    img = None
+    if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["bytes"] == stat.st_size:
+        try:
+            img = Image.open(cached["path"])
+            img.load()
+            result["cached"] = True
+        except OSError:
+            img = None  # fall back to the original
+
+    if img is None:
+        with open(image_path, "rb") as f:
+            data = f.read()
+        img = decode_thumbnail(io.BytesIO(data), size)
+        if cache_dir:
+            name = thumbnail_name(hashlib.sha1(data).hexdigest(), size)
+            file_path = Path(cache_dir) / name
+            try:
+                if file_path.exists():  # same content under another path
+                    result["file_bytes"] = file_path.stat().st_size
+                else:
+                    result["file_bytes"] = write_thumbnail(file_path, img)
+                result["file"] = name
+            except OSError:
+                pass  # the manager just does not index it
+
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGB")
+    pixels = pack_pixels(img)
+    if len(pixels) > capacity:
+        raise ValueError(f"{img.width}x{img.height} thumbnail does not fit a {size}px slot")
+    _attach(block_name).buf[offset:offset + len(pixels)] = pixels
+    result.update(width=img.width, height=img.height, alpha=img.mode == "RGBA")
+    return result
+
+
+class SharedSlots:
+    """Fixed-size pixel buffers in one shared memory block"""
+
+    def __init__(self, count: int, slot_bytes: int):
+        self.slot_bytes = slot_bytes
+        self.block = shared_memory.SharedMemory(create=True, size=count * slot_bytes)
+        self.free: List[int] = list(range(count))
+        self.count = count
+
+    @property
+    def name(self) -> str:
+        return self.block.name
+
+    def acquire(self) -> Optional[int]:
+        return self.free.pop() if self.free else None
+
+    def release(self, slot: int):
+        self.free.append(slot)
+
+    def view(self, slot: int, nbytes: int) -> memoryview:
+        offset = slot * self.slot_bytes
+        return self.block.buf[offset:offset + nbytes]
+
+    def close(self):
+        """Free the block. Workers still writing keep their own mapping until they exit."""
+        try:
+            self.block.close()
+        except BufferError:
+            pass  # a view is still alive, the mapping goes with the process
+        self.block.unlink()
+
+
+class BulkDecoder:
+    """Process pool plus the shared slots its results land in, for one thumbnail size"""
+
+    def __init__(self, size: int, processes: Optional[int] = None, slots_per_process: int = 4):
+        self.size = size
+        self.processes = processes or default_process_count()
+        # spawn: forking a process that runs Qt threads is not safe
+        self.executor = ProcessPoolExecutor(self.processes, mp_context=get_context("spawn"))
+        self.slots = SharedSlots(self.processes * slots_per_process, size * size * BYTES_PER_PIXEL)
+
+    def submit(self, slot: int, image_path: Path, cached: Optional[Dict[str, Any]] = None,
+               cache_dir: Optional[Path] = None) -> Future:
+        return self.executor.submit(
+            decode_into, self.slots.name, slot * self.slots.slot_bytes, self.slots.slot_bytes,
+            str(image_path), self.size, cached, str(cache_dir) if cache_dir else None)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.slots.close()
@@ -428,6 +428,11 @@ class ApplicationSettingsDialog(QDialog):
                         workflow_manager.clear_cache()
                         cache_cleared = True
                         
+                # Drop cached thumbnails, in memory and on disk
+                from src.ui.async_image_loader import get_async_image_manager
+                get_async_image_manager().clear_cache(disk=True)
+                cache_cleared = True
+                        
                 # Clear any temp directories
                 temp_dirs = [
                     self.config.base_dir / "temp",
@@ -1103,6 +1108,10 @@ class ApplicationSettingsDialog(QDialog):
                     workflow_manager.set_max_concurrent_operations(value)
                 elif hasattr(workflow_manager, 'max_concurrent_operations'):
                     workflow_manager.max_concurrent_operations = value
+            
+            # Image loading shares the limit
+            from src.ui.async_image_loader import get_async_image_manager
+            get_async_image_manager().set_max_workers(value)
             logger.debug(f"Max concurrent operations changed to {value}")
         except Exception as e:
             logger.error(f"Failed to change max operations: {e}")
@@ -1160,6 +1169,10 @@ class ApplicationSettingsDialog(QDialog):
                     file_monitor = parent_app.file_monitor
                     if hasattr(file_monitor, 'set_cache_size'):
                         file_monitor.set_cache_size(value)
+            
+            # Disk thumbnail cache budget
+            from src.ui.async_image_loader import get_async_image_manager
+            get_async_image_manager().set_disk_cache_size(value)
             logger.debug(f"Cache size changed to {value}MB")
         except Exception as e:
             logger.error(f"Failed to change cache size: {e}")
@@ -0,0 +1,240 @@
+"""
+Persistent thumbnail cache shared across sessions.
+
+Thumbnails are stored as small WebP files (JPEG where Pillow lacks WebP)
+named after the source's content hash and the thumbnail size, so identical
+images share one file. An index maps each source path and size to its file
+together with the source's mtime and byte size; a cold start checks those
+with a stat and never has to open the originals again.
+"""
+
+from pathlib import Path
+from typing import Optional, Dict, Any
+import json
+import os
+import threading
+import time
+
+from PIL import Image, features
+from loguru import logger
+
+# Project-level cache directory, emptied by "Clear Cache Now" in the settings
+THUMBNAIL_CACHE_DIR = Path(__file__).resolve().parents[2] / "cache" / "thumbnails"
+
+INDEX_VERSION = 1
+THUMBNAIL_FORMAT = "WEBP" if features.check("webp") else "JPEG"
+THUMBNAIL_QUALITY = 85
+
+# Pruning goes below the budget so it does not run again on the next write
+PRUNE_TARGET = 0.9
+
+
+def thumbnail_name(digest: str, size: int) -> str:
+    """File name of the thumbnail of a source with this content hash"""
+    return f"{digest}_{size}.{'webp' if THUMBNAIL_FORMAT == 'WEBP' else 'jpg'}"
+
+
+def write_thumbnail(file_path: Path, image: Image.Image) -> int:
+    """Atomically write a thumbnail file and return its size, safe in other processes"""
+    if THUMBNAIL_FORMAT == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = file_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    image.save(temp_path, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY)
+    os.replace(temp_path, file_path)
+    return file_path.stat().st_size
+
+
+class ThumbnailStore:
+    """Disk thumbnail cache with a size budget and LRU pruning"""
+
+    def __init__(self, directory: Path = THUMBNAIL_CACHE_DIR, max_size_mb: int = 1000):
+        self.directory = Path(directory)
+        self.index_path = self.directory / "index.json"
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.lock = threading.Lock()
+        # "path|size" -> {"file", "mtime_ns", "bytes"}: what the source looked like
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # thumbnail file name -> {"bytes", "used"}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.current_size = 0
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.pruned = 0
+        self._load_index()
+
+    @staticmethod
+    def _entry_key(image_path: Path, size: int) -> str:
+        return f"{Path(image_path).as_posix()}|{size}"
+
+    def _load_index(self):
+        """Read the index, a missing or unreadable one starts an empty cache"""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable thumbnail index {self.index_path}: {e}")
+            return
+        if index.get("version") != INDEX_VERSION:
+            return
+        self.entries = index.get("entries", {})
+        self.files = index.get("files", {})
+        self.current_size = sum(info["bytes"] for info in self.files.values())
+        logger.debug(f"Thumbnail index: {len(self.entries)} entries, {self.current_size / 1024 / 1024:.1f}MB")
+
+    def flush(self):
+        """Write the index if it changed, atomically so a crash never truncates it"""
+        with self.lock:
+            if not self.dirty:
+                return
+            index = {"version": INDEX_VERSION, "entries": self.entries, "files": self.files}
+            payload = json.dumps(index, separators=(",", ":"))
+            self.dirty = False
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temp_path = self.index_path.with_suffix(".tmp")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"Failed to write thumbnail index: {e}")
+
+    def get(self, image_path: Path, size: int) -> Optional[Image.Image]:
+        """Cached thumbnail if the source is unchanged since it was made"""
+        key = self._entry_key(image_path, size)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        try:
+            stat = os.stat(image_path)
+            if stat.st_mtime_ns != entry["mtime_ns"] or stat.st_size != entry["bytes"]:
+                self.misses += 1
+                return None
+            image = Image.open(self.directory / entry["file"])
+            image.load()
+        except OSError:
+            # Source gone, or the cache was cleared behind our back
+            with self.lock:
+                if self.entries.get(key) is entry:
+                    del self.entries[key]
+                    self.dirty = True
+            self.misses += 1
+            return None
+
+        with self.lock:
+            info = self.files.get(entry["file"])
+            if info is not None:
+                info["used"] = time.time()
+                self.dirty = True
+        self.hits += 1
+        return image
+
+    def lookup(self, image_path: Path, size: int) -> Optional[Dict[str, Any]]:
+        """Index entry for a thumbnail, for readers that check and open it themselves"""
+        with self.lock:
+            entry = self.entries.get(self._entry_key(image_path, size))
+        return dict(entry, path=str(self.directory / entry["file"])) if entry else None
+
+    def mark_used(self, image_path: Path, size: int, hit: bool = True):
+        """Account for a lookup done outside get()"""
+        with self.lock:
+            entry = self.entries.get(self._entry_key(image_path, size))
+            info = self.files.get(entry["file"]) if entry else None
+            if info is not None:
+                info["used"] = time.time()
+                self.dirty = True
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, image_path: Path, size: int, image: Image.Image, digest: str, stat: os.stat_result):
+        """Store a thumbnail made from a source with the given content hash and stat"""
+        name = thumbnail_name(digest, size)
+
+        with self.lock:
+            known = name in self.files
+        file_size = None
+        if not known:
+            try:
+                file_size = write_thumbnail(self.directory / name, image)
+            except OSError as e:
+                logger.warning(f"Failed to store thumbnail for {image_path}: {e}")
+                return
+        self.record(image_path, size, name, file_size, stat)
+
+    def record(self, image_path: Path, size: int, name: str, file_size: Optional[int], stat):
+        """Index a thumbnail file already written, file_size None if it was known"""
+        with self.lock:
+            if name not in self.files and file_size is not None:
+                self.files[name] = {"bytes": file_size, "used": time.time()}
+                self.current_size += file_size
+                self.writes += 1
+            self.entries[self._entry_key(image_path, size)] = {
+                "file": name, "mtime_ns": stat.st_mtime_ns, "bytes": stat.st_size
+            }
+            self.dirty = True
+            if self.current_size > self.max_size_bytes:
+                self._prune()
+
+    def _prune(self):
+        """Delete least recently used files down to the target (caller holds the lock)"""
+        target = self.max_size_bytes * PRUNE_TARGET
+        removed = set()
+        for name, info in sorted(self.files.items(), key=lambda item: item[1]["used"]):
+            if self.current_size <= target:
+                break
+            try:
+                os.remove(self.directory / name)
+            except OSError:
+                pass
+            self.current_size -= info["bytes"]
+            removed.add(name)
+
+        for name in removed:
+            del self.files[name]
+        self.entries = {key: entry for key, entry in self.entries.items() if entry["file"] not in removed}
+        self.pruned += len(removed)
+        logger.debug(f"Pruned {len(removed)} thumbnails, disk cache at {self.current_size / 1024 / 1024:.1f}MB")
+
+    def set_max_size(self, max_size_mb: int):
+        with self.lock:
+            self.max_size_bytes = max_size_mb * 1024 * 1024
+            if self.current_size > self.max_size_bytes:
+                self._prune()
+
+    def clear(self):
+        """Delete every cached thumbnail and the index"""
+        with self.lock:
+            for name in list(self.files) + [self.index_path.name]:
+                try:
+                    os.remove(self.directory / name)
+                except OSError:
+                    pass
+            self.entries.clear()
+            self.files.clear()
+            self.current_size = 0
+            self.dirty = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'directory': str(self.directory),
+                'size_mb': self.current_size / 1024 / 1024,
+                'max_size_mb': self.max_size_bytes / 1024 / 1024,
+                'entries': len(self.entries),
+                'files': len(self.files),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'writes': self.writes,
+                'pruned': self.pruned
+            }
@@ -4,22 +4,26 @@ Custom UI widgets for the application
 
 import sys
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 import numpy as np
 
 from PySide6.QtWidgets import (
     QWidget, QGridLayout, QLabel, QVBoxLayout, QHBoxLayout,
-    QScrollArea, QFrame, QPushButton, QTextEdit, QCheckBox,
-    QSizePolicy
+    QScrollArea, QPushButton, QTextEdit,
+    QSizePolicy, QAbstractItemView, QStyledItemDelegate, QStyleOptionViewItem
 )
-from PySide6.QtCore import Qt, Signal, Slot, QSize, QTimer
-from PySide6.QtGui import QPixmap, QPainter, QBrush, QColor, QFont, QImage
+from PySide6.QtCore import (
+    Qt, Signal, Slot, QSize, QTimer, QAbstractListModel, QModelIndex, QRect, QRectF, QEvent
+)
+from PySide6.QtGui import QPixmap, QPainter, QBrush, QColor, QFont, QImage, QPen, QPalette, QRegion
 
 from PIL import Image
 from loguru import logger
 
 # Import async image loading
-from src.ui.async_image_loader import get_async_image_manager
+from src.ui.async_image_loader import (
+    get_async_image_manager, PRIORITY_NEARBY, PRIORITY_VISIBLE
+)
 
 # 3D visualization imports
 try:
@@ -249,233 +253,513 @@ class Simple3DViewer(QWidget):
             viewer.deleteLater()
         cls._viewer_pool.clear()
 
-class ImageThumbnail(QFrame):
-    """Thumbnail widget for images"""
+class ImageGridModel(QAbstractListModel):
+    """Image paths, their selection and thumbnail requests for ImageGridWidget.
     
-    clicked = Signal(Path)
-    selected = Signal(Path, bool)
+    Thumbnails are requested from the async loader the first time a row is
+    painted, so only images that come into view are ever decoded. Pixmaps
+    stay in the loader's cache; the model only keeps scaled-up previews
+    until the real thumbnail arrives. Failed loads are not retried until
+    retry_failed(), the next smart refresh.
+    """
     
-    def __init__(self, image_path: Path, size: int = 256):
-        super().__init__()
-        self.image_path = image_path
-        self.size = size
-        self._selected = False
-        self._loading = False
-        
-        self.setFixedSize(size + 20, size + 40)
-        self.setFrameStyle(QFrame.NoFrame)  # Remove default frame, use CSS instead
-        self.setObjectName("image_thumbnail")  # Set object name for specific CSS targeting
-        
-        # Main layout without spacing for absolute positioning
-        main_layout = QVBoxLayout(self)
-        main_layout.setContentsMargins(2, 2, 2, 2)
-        main_layout.setSpacing(3)
-        
-        # Container for image with overlay checkbox
-        image_container = QWidget()
-        image_container.setFixedSize(size, size)
-        main_layout.addWidget(image_container)
-        
-        # Image label (fills container)
-        self.image_label = QLabel(image_container)
-        self.image_label.setFixedSize(size, size)
-        self.image_label.setAlignment(Qt.AlignCenter)
-        self.image_label.setStyleSheet("background-color: #2a2a2a;")
-        
-        # Selection checkbox (positioned in bottom-right corner)
-        self.select_check = QCheckBox(image_container)
-        self.select_check.setText("")  # No text, just checkbox
-        checkbox_size = 16
-        self.select_check.setFixedSize(checkbox_size, checkbox_size)
-        self.select_check.move(size - checkbox_size - 4, size - checkbox_size - 4)  # 4px margin from edges
-        self.select_check.setStyleSheet("""
-            QCheckBox::indicator {
-                width: 12px;
-                height: 12px;
-                background-color: rgba(23, 23, 23, 180);
-                border: 1px solid #404040;
-                border-radius: 2px;
-            }
-            QCheckBox::indicator:checked {
-                background-color: #22c55e;
-                border-color: #22c55e;
-            }
-            QCheckBox::indicator:hover {
-                border-color: #22c55e;
-                background-color: rgba(34, 197, 94, 50);
-            }
-        """)
-        self.select_check.stateChanged.connect(self._on_selection_changed)
-        self.select_check.show()
-        
-        # Debug: Log initial checkbox state
-        from loguru import logger
-        logger.debug(f"ImageThumbnail created: {image_path.name}, checkbox checked: {self.select_check.isChecked()}, _selected: {self._selected}")
-        
-        # Filename label
-        self.name_label = QLabel(image_path.name)
-        self.name_label.setAlignment(Qt.AlignCenter)
-        self.name_label.setMaximumWidth(size)
-        self.name_label.setWordWrap(True)
-        font = self.name_label.font()
-        font.setPointSize(9)
-        self.name_label.setFont(font)
-        main_layout.addWidget(self.name_label)
-        
-        # Load thumbnail asynchronously
-        self._load_thumbnail_async()
-        
-        # Apply initial style
-        self._update_style()
-        
-    def _load_thumbnail_async(self):
-        """Load thumbnail asynchronously"""
-        if self._loading:
-            return
-            
-        self._loading = True
-        
-        # Show loading placeholder
-        self.image_label.setText("Loading...")
-        self.image_label.setStyleSheet("""
-            background-color: #2a2a2a;
-            color: #888888;
-            border: 1px dashed #444444;
-        """)
-        
-        # Load image asynchronously
-        async_manager = get_async_image_manager()
-        async_manager.load_image_async(
-            self.image_path, 
-            self.size, 
-            self._on_image_loaded
-        )
+    PathRole = Qt.UserRole + 1
+    PreviewRole = Qt.UserRole + 2
+    ErrorRole = Qt.UserRole + 3
     
-    def _on_image_loaded(self, image_path: Path, pixmap: QPixmap, size: int):
-        """Handle async image loading completion"""
-        if image_path != self.image_path:
-            return  # This callback is for a different image
-            
-        self._loading = False
-        
-        try:
-            # Scale to fit if needed
-            if pixmap.width() > self.size or pixmap.height() > self.size:
-                scaled_pixmap = pixmap.scaled(
-                    self.size, self.size,
-                    Qt.KeepAspectRatio,
-                    Qt.SmoothTransformation
-                )
+    selection_changed = Signal(Path, bool)
+    
+    def __init__(self, thumbnail_size: int = 256, parent=None):
+        super().__init__(parent)
+        self.thumbnail_size = thumbnail_size
+        self._paths: List[Path] = []
+        self._rows: Dict[Path, int] = {}
+        self._selected: Set[Path] = set()
+        self._requested: Dict[Path, int] = {}  # loads in flight, by priority
+        self._previews: Dict[Path, QPixmap] = {}
+        self._failed: Dict[Path, str] = {}  # load errors, by path
+    
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._paths)
+    
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        path = self._paths[index.row()]
+        if role == Qt.DisplayRole:
+            return path.name
+        if role == Qt.DecorationRole:
+            return self.thumbnail(index.row())
+        if role == self.PreviewRole:
+            return self._previews.get(path)
+        if role == self.ErrorRole:
+            return self._failed.get(path)
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if path in self._selected else Qt.Unchecked
+        if role == self.PathRole:
+            return path
+        if role == Qt.ToolTipRole:
+            error = self._failed.get(path)
+            return f"{path}\n{error}" if error else str(path)
+        return None
+    
+    def flags(self, index: QModelIndex):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsUserCheckable
+    
+    def setData(self, index: QModelIndex, value, role: int = Qt.EditRole) -> bool:
+        if not index.isValid() or role != Qt.CheckStateRole:
+            return False
+        return self.set_selected(self._paths[index.row()], Qt.CheckState(value) == Qt.Checked)
+    
+    def paths(self) -> List[Path]:
+        return list(self._paths)
+    
+    def path_at(self, row: int) -> Path:
+        return self._paths[row]
+    
+    def contains(self, path: Path) -> bool:
+        return path in self._rows
+    
+    def append_paths(self, paths: List[Path]):
+        paths = [path for path in paths if path not in self._rows]
+        if not paths:
+            return
+        first = len(self._paths)
+        self.beginInsertRows(QModelIndex(), first, first + len(paths) - 1)
+        for row, path in enumerate(paths, first):
+            self._rows[path] = row
+        self._paths.extend(paths)
+        self.endInsertRows()
+    
+    def remove_paths(self, paths: Set[Path]):
+        """Remove rows in contiguous runs, one removal per run, last run first"""
+        rows = sorted(self._rows[path] for path in paths if path in self._rows)
+        if not rows:
+            return
+        runs: List[List[int]] = []
+        for row in rows:
+            if runs and runs[-1][1] == row - 1:
+                runs[-1][1] = row
             else:
-                scaled_pixmap = pixmap
-            
-            # Set the pixmap
-            self.image_label.setPixmap(scaled_pixmap)
-            self.image_label.setStyleSheet("background-color: #2a2a2a;")
-            
-        except Exception as e:
-            logger.error(f"Failed to display thumbnail for {self.image_path}: {e}")
-            self._show_error_placeholder()
-    
-    def _show_error_placeholder(self):
-        """Show error placeholder"""
-        self._loading = False
-        self.image_label.clear()
-        self.image_label.setText("Failed to\nload image")
-        self.image_label.setStyleSheet("""
-            background-color: #2a2a2a;
-            color: #ff6b6b;
-            border: 1px solid #ff6b6b;
-        """)
+                runs.append([row, row])
+        
+        for first, last in reversed(runs):
+            removed = self._paths[first:last + 1]
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._paths[first:last + 1]
+            for path in removed:
+                del self._rows[path]
+            self.endRemoveRows()
+            for path in removed:
+                self._forget(path)
+        
+        # Rows before the first removal keep their numbers
+        for row in range(rows[0], len(self._paths)):
+            self._rows[self._paths[row]] = row
     
-    def mousePressEvent(self, event):
-        """Handle mouse press"""
-        if event.button() == Qt.LeftButton:
-            self.clicked.emit(self.image_path)
-        super().mousePressEvent(event)
+    def clear(self):
+        self.beginResetModel()
+        for path in list(self._requested):
+            self.cancel(path)
+        self._paths.clear()
+        self._rows.clear()
+        self._selected.clear()
+        self._previews.clear()
+        self._failed.clear()
+        self.endResetModel()
+    
+    def _forget(self, path: Path):
+        self.cancel(path)
+        self._selected.discard(path)
+        self._previews.pop(path, None)
+        self._failed.pop(path, None)
+    
+    # Selection
+    
+    def is_selected(self, path: Path) -> bool:
+        return path in self._selected
+    
+    def set_selected(self, path: Path, selected: bool) -> bool:
+        """Select or deselect an image, False if nothing changed"""
+        row = self._rows.get(path)
+        if row is None or (path in self._selected) == selected:
+            return False
+        if selected:
+            self._selected.add(path)
+        else:
+            self._selected.discard(path)
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        self.selection_changed.emit(path, selected)
+        return True
+    
+    def selected_paths(self) -> List[Path]:
+        """Selected images in grid order"""
+        return [path for path in self._paths if path in self._selected]
+    
+    # Thumbnails
+    
+    def thumbnail(self, row: int) -> Optional[QPixmap]:
+        """Thumbnail for a row if it is loaded, otherwise requested for display"""
+        path = self._paths[row]
+        pixmap = get_async_image_manager().cache.get_cached_pixmap(path, self.thumbnail_size)
+        if pixmap is None and path not in self._requested and path not in self._failed:
+            self.request(row, PRIORITY_VISIBLE)
+        return pixmap
+    
+    def request(self, row: int, priority: int):
+        """Ask the loader for a row's thumbnail, or move a pending request"""
+        path = self._paths[row]
+        if path in self._failed:
+            return
+        if path in self._requested:
+            if self._requested[path] != priority:
+                self._requested[path] = priority
+                get_async_image_manager().set_priority(path, self.thumbnail_size, priority)
+            return
+        self._requested[path] = priority
+        get_async_image_manager().load_image_async(
+            path, self.thumbnail_size, self._on_thumbnail_loaded, priority,
+            preview_callback=self._on_preview_loaded, error_callback=self._on_thumbnail_failed)
+    
+    def cancel(self, path: Path):
+        if self._requested.pop(path, None) is not None:
+            get_async_image_manager().cancel(path, self.thumbnail_size, self._on_thumbnail_loaded,
+                                             self._on_preview_loaded, self._on_thumbnail_failed)
+    
+    def retry_failed(self):
+        """Let failed thumbnails load again the next time they are painted"""
+        failed, self._failed = self._failed, {}
+        for path in failed:
+            self._row_changed(path, self.ErrorRole)
+    
+    def requested_rows(self) -> Dict[int, int]:
+        """Rows with a load in flight, and its priority"""
+        return {self._rows[path]: priority for path, priority in self._requested.items()}
+    
+    def _row_changed(self, path: Path, role: int):
+        row = self._rows.get(path)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [role])
+    
+    def _on_thumbnail_loaded(self, image_path: Path, pixmap: QPixmap, size: int):
+        if size != self.thumbnail_size:
+            return
+        self._requested.pop(image_path, None)
+        self._previews.pop(image_path, None)
+        self._row_changed(image_path, Qt.DecorationRole)
     
-    def _on_selection_changed(self, state):
-        """Handle selection change"""
-        # Fix: State 2 = Checked, State 0 = Unchecked  
-        self._selected = state == 2
-        from loguru import logger
-        logger.info(f"ImageThumbnail selection changed: {self.image_path.name}, Qt state: {state}, _selected: {self._selected}")
-        self.selected.emit(self.image_path, self._selected)
-        self._update_style()
+    def _on_thumbnail_failed(self, image_path: Path, error: str, size: int):
+        if size != self.thumbnail_size or image_path not in self._rows:
+            return
+        self._requested.pop(image_path, None)
+        self._previews.pop(image_path, None)
+        self._failed[image_path] = error
+        self._row_changed(image_path, self.ErrorRole)
     
-    def _update_style(self):
-        """Update visual style based on selection"""
-        # Set property for CSS selector and force style update
-        self.setProperty("selected", self._selected)
-        
-        # Apply base style that includes both states
-        self.setStyleSheet("""
-            QFrame#image_thumbnail {
-                border: 1px solid transparent;
-                border-radius: 3px;
-                background-color: transparent;
-            }
-            QFrame#image_thumbnail[selected="true"] {
-                border: 1px solid #4CAF50;
-            }
-        """)
-        
-        # Force style refresh
-        self.style().polish(self)
+    def _on_preview_loaded(self, image_path: Path, pixmap: QPixmap, size: int):
+        if size != self.thumbnail_size or image_path not in self._rows:
+            return
+        # Scaled once here rather than on every paint
+        self._previews[image_path] = pixmap.scaled(
+            self.thumbnail_size, self.thumbnail_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self._row_changed(image_path, self.PreviewRole)
+
+
+class ImageGridDelegate(QStyledItemDelegate):
+    """Paints a grid cell: image, selection checkbox, file name"""
+    
+    CHECK_SIZE = 12
+    CHECK_MARGIN = 6
     
-    def set_selected(self, selected: bool):
-        """Set selection state"""
-        self.select_check.setChecked(selected)
+    def __init__(self, thumbnail_size: int = 256, parent=None):
+        super().__init__(parent)
+        self.thumbnail_size = thumbnail_size
+        self.name_font = QFont()
+        self.name_font.setPointSize(9)
+    
+    def sizeHint(self, option, index) -> QSize:
+        return QSize(self.thumbnail_size + 20, self.thumbnail_size + 40)
+    
+    def image_rect(self, cell: QRect) -> QRect:
+        return QRect(cell.x() + (cell.width() - self.thumbnail_size) // 2, cell.y() + 4,
+                     self.thumbnail_size, self.thumbnail_size)
+    
+    def check_rect(self, cell: QRect) -> QRect:
+        image = self.image_rect(cell)
+        offset = self.CHECK_SIZE + self.CHECK_MARGIN
+        return QRect(image.right() - offset, image.bottom() - offset, self.CHECK_SIZE, self.CHECK_SIZE)
+    
+    def paint(self, painter: QPainter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        cell = option.rect
+        image_rect = self.image_rect(cell)
+        checked = index.data(Qt.CheckStateRole) == Qt.Checked
+        
+        if checked:
+            painter.setPen(QPen(QColor("#4CAF50"), 1))
+            painter.setBrush(Qt.NoBrush)
+            painter.drawRoundedRect(QRectF(cell).adjusted(0.5, 0.5, -0.5, -0.5), 3, 3)
+        
+        painter.fillRect(image_rect, QColor("#2a2a2a"))
+        pixmap = index.data(Qt.DecorationRole) or index.data(ImageGridModel.PreviewRole)
+        if pixmap is not None:
+            if pixmap.width() > self.thumbnail_size or pixmap.height() > self.thumbnail_size:
+                pixmap = pixmap.scaled(self.thumbnail_size, self.thumbnail_size,
+                                       Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            painter.drawPixmap(image_rect.x() + (image_rect.width() - pixmap.width()) // 2,
+                               image_rect.y() + (image_rect.height() - pixmap.height()) // 2, pixmap)
+        elif index.data(ImageGridModel.ErrorRole):
+            painter.setPen(QPen(QColor("#ef4444"), 1))
+            painter.drawRect(image_rect.adjusted(0, 0, -1, -1))
+            painter.drawText(image_rect, Qt.AlignCenter, "Failed to load")
+        else:
+            painter.setPen(QPen(QColor("#444444"), 1, Qt.DashLine))
+            painter.drawRect(image_rect.adjusted(0, 0, -1, -1))
+            painter.setPen(QColor("#888888"))
+            painter.drawText(image_rect, Qt.AlignCenter, "Loading...")
+        
+        # Selection checkbox in the bottom-right corner of the image
+        check = self.check_rect(cell)
+        painter.setPen(QPen(QColor("#22c55e" if checked else "#404040"), 1))
+        painter.setBrush(QColor("#22c55e") if checked else QColor(23, 23, 23, 180))
+        painter.drawRoundedRect(QRectF(check).adjusted(0.5, 0.5, -0.5, -0.5), 2, 2)
+        
+        # File name under the image
+        painter.setFont(self.name_font)
+        painter.setPen(option.palette.color(QPalette.Text))
+        name_rect = QRect(cell.x() + 2, image_rect.bottom() + 4, cell.width() - 4,
+                          cell.bottom() - image_rect.bottom() - 4)
+        name = painter.fontMetrics().elidedText(index.data(Qt.DisplayRole), Qt.ElideMiddle, name_rect.width())
+        painter.drawText(name_rect, Qt.AlignHCenter | Qt.AlignTop, name)
+        painter.restore()
+    
+    def editorEvent(self, event, model, option, index) -> bool:
+        """Toggle selection on clicks inside the checkbox"""
+        if (event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton
+                and self.check_rect(option.rect).adjusted(-4, -4, 4, 4).contains(event.position().toPoint())):
+            checked = index.data(Qt.CheckStateRole) == Qt.Checked
+            return model.setData(index, Qt.Unchecked if checked else Qt.Checked, Qt.CheckStateRole)
+        return False
 
 
-class ImageGridWidget(QScrollArea):
-    """Grid widget for displaying images"""
+class ImageGridWidget(QAbstractItemView):
+    """Grid widget for displaying images.
+    
+    A virtualized view: cells are painted by ImageGridDelegate only while
+    visible, so a gallery costs one model row per image rather than a widget
+    tree, and thumbnails are loaded as rows come into view.
+    
+    Cells sit on a uniform grid, so a row's place is computed from its number
+    and nothing is laid out per item. Inserting or removing rows only resizes
+    the scroll range and repaints the cells that moved into view.
+    """
     
     image_selected = Signal(Path, bool)
     image_clicked = Signal(Path)
     
+    BULK_PRELOAD_MIN = 100  # new images at once that are decoded in worker processes
+    GRID_SPACING = 10
+    
     def __init__(self, columns: int = 4, thumbnail_size: int = 256):
         super().__init__()
         self.columns = columns
         self.thumbnail_size = thumbnail_size
-        self.thumbnails: List[ImageThumbnail] = []
         
         # State preservation
         self._preserved_state = None
         self._preserve_state = True
         
-        # Setup scroll area
-        self.setWidgetResizable(True)
+        self.grid_model = ImageGridModel(thumbnail_size, self)
+        self.grid_model.selection_changed.connect(self.image_selected.emit)
+        self.grid_delegate = ImageGridDelegate(thumbnail_size, self)
+        self.setModel(self.grid_model)
+        self.setItemDelegate(self.grid_delegate)
+        # QAbstractItemView has no rowsRemoved hook to override
+        self.grid_model.rowsRemoved.connect(self._rows_moved)
+        self.grid_model.modelReset.connect(self._rows_moved)
+        
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         
-        # Content widget
-        self.content = QWidget()
-        self.setWidget(self.content)
-        
-        # Grid layout
-        self.grid_layout = QGridLayout(self.content)
-        self.grid_layout.setSpacing(10)
-        self.grid_layout.setContentsMargins(10, 10, 10, 10)
+        # Re-rank pending thumbnail loads once scrolling or layout settles
+        self._visibility_timer = QTimer(self)
+        self._visibility_timer.setSingleShot(True)
+        self._visibility_timer.setInterval(50)
+        self._visibility_timer.timeout.connect(self._update_load_priorities)
+        self.verticalScrollBar().valueChanged.connect(lambda _value: self._visibility_timer.start())
+    
+    # Grid geometry
+    
+    def _grid_size(self) -> QSize:
+        """Cells wide enough that `columns` of them fill the viewport"""
+        cell = self.grid_delegate.sizeHint(None, None)
+        width = max(cell.width() + self.GRID_SPACING, self.viewport().width() // max(1, self.columns))
+        return QSize(width, cell.height() + self.GRID_SPACING)
+    
+    def _item_rect(self, row: int, grid: Optional[QSize] = None) -> QRect:
+        """Cell of a row in content coordinates, centred in its grid slot"""
+        grid = grid or self._grid_size()
+        columns = max(1, self.columns)
+        cell = self.grid_delegate.sizeHint(None, None)
+        return QRect((row % columns) * grid.width() + (grid.width() - cell.width()) // 2,
+                     (row // columns) * grid.height() + self.GRID_SPACING // 2,
+                     cell.width(), cell.height())
+    
+    def visualRect(self, index: QModelIndex) -> QRect:
+        if not index.isValid():
+            return QRect()
+        return self._item_rect(index.row()).translated(-self.horizontalOffset(), -self.verticalOffset())
+    
+    def indexAt(self, point) -> QModelIndex:
+        grid = self._grid_size()
+        x = point.x() + self.horizontalOffset()
+        y = point.y() + self.verticalOffset()
+        column = x // grid.width()
+        if x < 0 or y < 0 or column >= max(1, self.columns):
+            return QModelIndex()
+        row = (y // grid.height()) * max(1, self.columns) + column
+        if row >= self.grid_model.rowCount() or not self._item_rect(row, grid).contains(x, y):
+            return QModelIndex()
+        return self.grid_model.index(row)
+    
+    def scrollTo(self, index: QModelIndex, hint=QAbstractItemView.EnsureVisible):
+        rect = self.visualRect(index)
+        if not rect.isValid():
+            return
+        bar = self.verticalScrollBar()
+        if rect.top() < 0:
+            bar.setValue(bar.value() + rect.top())
+        elif rect.bottom() >= self.viewport().height():
+            bar.setValue(bar.value() + min(rect.top(), rect.bottom() - self.viewport().height() + 1))
+    
+    def moveCursor(self, action, modifiers) -> QModelIndex:
+        current = self.currentIndex()
+        if not current.isValid():
+            return self.grid_model.index(0) if self.grid_model.rowCount() else QModelIndex()
+        steps = {
+            QAbstractItemView.MoveLeft: -1, QAbstractItemView.MovePrevious: -1,
+            QAbstractItemView.MoveRight: 1, QAbstractItemView.MoveNext: 1,
+            QAbstractItemView.MoveUp: -max(1, self.columns), QAbstractItemView.MoveDown: max(1, self.columns),
+        }
+        row = current.row() + steps.get(action, 0)
+        return self.grid_model.index(row) if 0 <= row < self.grid_model.rowCount() else current
+    
+    def horizontalOffset(self) -> int:
+        return self.horizontalScrollBar().value()
+    
+    def verticalOffset(self) -> int:
+        return self.verticalScrollBar().value()
+    
+    def isIndexHidden(self, index: QModelIndex) -> bool:
+        return False
+    
+    def setSelection(self, rect, command):
+        pass  # selection is the model's checkbox state
+    
+    def visualRegionForSelection(self, selection) -> QRegion:
+        return QRegion()
+    
+    def updateGeometries(self):
+        """Scroll ranges from the row count alone"""
+        grid = self._grid_size()
+        columns = max(1, self.columns)
+        lines = (self.grid_model.rowCount() + columns - 1) // columns
+        viewport = self.viewport().size()
+        
+        vertical = self.verticalScrollBar()
+        vertical.setRange(0, max(0, lines * grid.height() - viewport.height()))
+        vertical.setPageStep(viewport.height())
+        vertical.setSingleStep(max(1, grid.height() // 4))
+        horizontal = self.horizontalScrollBar()
+        horizontal.setRange(0, max(0, columns * grid.width() - viewport.width()))
+        horizontal.setPageStep(viewport.width())
+        horizontal.setSingleStep(max(1, grid.width() // 4))
+        super().updateGeometries()
+    
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        option = QStyleOptionViewItem()
+        self.initViewItemOption(option)
+        area = event.rect()
+        for row in self._visible_rows():
+            index = self.grid_model.index(row)
+            option.rect = self.visualRect(index)
+            if option.rect.intersects(area):
+                self.grid_delegate.paint(painter, option, index)
+        painter.end()
+    
+    # Incremental updates: no stored layout, so only the scroll range and
+    # the cells in view change
+    
+    def rowsInserted(self, parent: QModelIndex, start: int, end: int):
+        super().rowsInserted(parent, start, end)
+        self._rows_moved(parent, start)
+    
+    def _rows_moved(self, parent: QModelIndex = QModelIndex(), start: int = 0, _end: int = 0):
+        self.updateGeometries()
+        # Rows from start on shifted; nothing to repaint if they are all below the viewport
+        if start < self._grid_slots().stop:
+            self.viewport().update()
+        self._visibility_timer.start()
+    
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.updateGeometries()
+        self.viewport().update()
+        self._visibility_timer.start()
+    
+    def mousePressEvent(self, event):
+        index = self.indexAt(event.position().toPoint())
+        if (index.isValid() and event.button() == Qt.LeftButton
+                and not self.grid_delegate.check_rect(self.visualRect(index)).contains(event.position().toPoint())):
+            self.image_clicked.emit(self.grid_model.path_at(index.row()))
+        super().mousePressEvent(event)
+    
+    def _grid_slots(self) -> range:
+        """Grid slots intersecting the viewport, whether or not a row fills them"""
+        grid = self._grid_size()
+        columns = max(1, self.columns)
+        first_line = self.verticalOffset() // grid.height()
+        last_line = (self.verticalOffset() + self.viewport().height() - 1) // grid.height()
+        return range(first_line * columns, (last_line + 1) * columns)
+    
+    def _visible_rows(self) -> range:
+        """Rows intersecting the viewport, from the uniform grid geometry"""
+        slots = self._grid_slots()
+        count = self.grid_model.rowCount()
+        return range(min(slots.start, count), min(slots.stop, count))
+    
+    def _update_load_priorities(self):
+        """Load visible thumbnails first, then those about a screen away.
+        
+        Loads further out are cancelled; they restart when their rows are
+        painted again. Only rows near the viewport are visited.
+        """
+        visible = self._visible_rows()
+        margin = len(visible)
+        nearby = range(max(0, visible.start - margin), min(self.grid_model.rowCount(), visible.stop + margin))
+        
+        for row in visible:
+            self.grid_model.request(row, PRIORITY_VISIBLE)
+        for row in nearby:
+            if row not in visible:
+                self.grid_model.request(row, PRIORITY_NEARBY)
+        for row in self.grid_model.requested_rows():
+            if row not in nearby:
+                self.grid_model.cancel(self.grid_model.path_at(row))
     
     def add_image(self, image_path: Path):
         """Add image to grid"""
-        # Create thumbnail
-        thumbnail = ImageThumbnail(image_path, self.thumbnail_size)
-        thumbnail.clicked.connect(self.image_clicked.emit)
-        thumbnail.selected.connect(self.image_selected.emit)
-        
-        # Add to grid
-        row = len(self.thumbnails) // self.columns
-        col = len(self.thumbnails) % self.columns
-        
-        self.grid_layout.addWidget(thumbnail, row, col)
-        self.thumbnails.append(thumbnail)
-        
-        # Ensure thumbnail and its checkbox are visible
-        thumbnail.show()
-        thumbnail.select_check.show()
-        thumbnail.select_check.setVisible(True)
+        self.grid_model.append_paths([image_path])
     
     def preserve_state(self):
         """Preserve current grid state for restoration"""
@@ -483,10 +767,10 @@ class ImageGridWidget(QScrollArea):
             return
             
         self._preserved_state = {
-            'images': [thumb.image_path for thumb in self.thumbnails],
-            'selections': [thumb.image_path for thumb in self.thumbnails if thumb._selected],
+            'images': self.grid_model.paths(),
+            'selections': self.grid_model.selected_paths(),
             'scroll_position': self.verticalScrollBar().value(),
-            'thumbnail_count': len(self.thumbnails)
+            'thumbnail_count': self.grid_model.rowCount()
         }
         logger.debug(f"Preserved state: {len(self._preserved_state['images'])} images, {len(self._preserved_state['selections'])} selected")
     
@@ -496,10 +780,9 @@ class ImageGridWidget(QScrollArea):
             return
             
         # Restore selections
-        for thumbnail in self.thumbnails:
-            should_be_selected = thumbnail.image_path in self._preserved_state['selections']
-            if thumbnail._selected != should_be_selected:
-                thumbnail.set_selected(should_be_selected)
+        selections = set(self._preserved_state['selections'])
+        for path in self.grid_model.paths():
+            self.grid_model.set_selected(path, path in selections)
         
         # Restore scroll position with a small delay to ensure layout is complete
         QTimer.singleShot(100, lambda: self.verticalScrollBar().setValue(self._preserved_state['scroll_position']))
@@ -511,72 +794,47 @@ class ImageGridWidget(QScrollArea):
         if self._preserve_state:
             self.preserve_state()
         
-        # Get current image paths
-        existing_paths = {thumb.image_path for thumb in self.thumbnails}
+        # Only the difference is applied: runs of removed rows, then one
+        # appended run, painted once at the end
         new_paths = set(new_images)
+        removed = {path for path in self.grid_model.paths() if path not in new_paths}
+        # Files that failed may have been mid-write, give them another try
+        self.grid_model.retry_failed()
+        added = [path for path in new_images if not self.grid_model.contains(path) and path.exists()]
         
-        # Remove thumbnails for images that no longer exist
-        to_remove = []
-        for i, thumbnail in enumerate(self.thumbnails):
-            if thumbnail.image_path not in new_paths:
-                to_remove.append(i)
-        
-        # Remove in reverse order to maintain indices
-        for i in reversed(to_remove):
-            thumbnail = self.thumbnails.pop(i)
-            self.grid_layout.removeWidget(thumbnail)
-            thumbnail.deleteLater()
-        
-        # Add new images
-        for image_path in new_images:
-            if image_path not in existing_paths and image_path.exists():
-                self.add_image(image_path)
-        
-        # Reorganize grid to fill gaps
-        self._reorganize_grid()
+        self.setUpdatesEnabled(False)
+        try:
+            self.grid_model.remove_paths(removed)
+            # Warm the cache in bulk when a whole session arrives
+            if len(added) >= self.BULK_PRELOAD_MIN:
+                get_async_image_manager().preload_images(added, self.thumbnail_size, bulk=True)
+            self.grid_model.append_paths(added)
+        finally:
+            self.setUpdatesEnabled(True)
         
         # Restore state
         if self._preserve_state:
             self.restore_state()
         
-        logger.debug(f"Smart refresh completed: {len(self.thumbnails)} total thumbnails")
+        logger.debug(f"Smart refresh completed: {self.grid_model.rowCount()} total thumbnails")
     
     def clear(self):
         """Clear all images (with optional state preservation)"""
         if self._preserve_state:
             self.preserve_state()
-            
-        for thumbnail in self.thumbnails:
-            self.grid_layout.removeWidget(thumbnail)
-            thumbnail.deleteLater()
-        self.thumbnails.clear()
-        
+        self.grid_model.clear()
         logger.debug("Grid cleared")
     
     def get_selected_images(self) -> List[Path]:
         """Get list of selected images"""
-        selected = []
-        for thumbnail in self.thumbnails:
-            if thumbnail._selected:
-                selected.append(thumbnail.image_path)
-        return selected
+        return self.grid_model.selected_paths()
     
     def set_columns(self, columns: int):
         """Set number of columns"""
         self.columns = columns
-        self._reorganize_grid()
-    
-    def _reorganize_grid(self):
-        """Reorganize grid layout"""
-        # Remove all widgets
-        for thumbnail in self.thumbnails:
-            self.grid_layout.removeWidget(thumbnail)
-        
-        # Re-add in new configuration
-        for i, thumbnail in enumerate(self.thumbnails):
-            row = i // self.columns
-            col = i % self.columns
-            self.grid_layout.addWidget(thumbnail, row, col)
+        self.updateGeometries()
+        self.viewport().update()
+        self._visibility_timer.start()
 
 
 